@@ -26,6 +26,27 @@ def init_db():
     db.create_all()
     print("DATABASE TABLES CREATED")
 
+@app.cli.command("rebuild-ratings")
+def rebuild_ratings():
+    """Rebuild stored rating aggregates from the ratings tables."""
+    from app.services.ratings import rebuild_rating_aggregates
+    rebuild_rating_aggregates()
+    print("RATING AGGREGATES REBUILT")
+
+@app.cli.command("rebuild-status-latency")
+def rebuild_status_latency():
+    """Rebuild kitchen latency histograms from the order status history."""
+    from app.services.order_timing import rebuild_status_latency
+    rebuild_status_latency()
+    print("STATUS LATENCY HISTOGRAMS REBUILT")
+
+@app.cli.command("backfill-daily-stats")
+def backfill_daily_stats():
+    """Rebuild the daily and hourly sales rollup behind owner reports from orders."""
+    from app.services.sales_rollup import rebuild_daily_stats
+    rebuild_daily_stats()
+    print("DAILY SALES ROLLUP REBUILT")
+
 @app.cli.command("seed-data")
 def seed_data():
     """Seed the database with initial data."""
@@ -111,6 +132,8 @@ def seed_data():
         
         for item in menu_items:
             db.session.add(item)
+        db.session.flush()
+        restaurant.refresh_dietary_flags()
 
     # Additional customer (idempotent).
     if User.query.filter_by(username='customer2').first() is None:
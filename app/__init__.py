@@ -3,13 +3,15 @@
 import logging
 import os
 
-from flask import Flask, render_template, request
+from flask import Flask, render_template
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from app.services.read_replica import RoutingSession
+
 # Initialize extensions.
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 
@@ -20,8 +22,10 @@ def create_app(test_config=None):
     # Configuration.
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev_key_only_for_development'),
-        SQLALCHEMY_DATABASE_URI='sqlite:///justeat.db',
+        SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL', 'sqlite:///justeat.db'),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # Passed to create_engine as is, e.g. {'pool_size': 10, 'max_overflow': 10}.
+        SQLALCHEMY_ENGINE_OPTIONS={},
         UPLOAD_FOLDER=os.path.join(app.static_folder, 'uploads')
     )
     
@@ -45,6 +49,49 @@ def create_app(test_config=None):
     db.init_app(app)
     migrate.init_app(app, db)
     
+    # WAL journaling and tuned pragmas on every SQLite connection.
+    from app.services import sqlite_engine
+    sqlite_engine.init_app(app)
+    
+    # Read-only requests go to the 'replica' bind when one is configured.
+    from app.services import read_replica
+    read_replica.init_app(app)
+    
+    # Optional single-writer group commit for SQLite writes.
+    from app.services import write_queue
+    write_queue.init_app(app)
+    
+    # Buffer daily dish order counters in memory (write-behind).
+    from app.services import order_counters
+    order_counters.init_app(app)
+    
+    # Register FTS5 index DDL hooks before any create_all().
+    from app.services import restaurant_search  # noqa: F401
+    
+    # In-memory dish search index.
+    from app.services import dish_search
+    dish_search.init_app(app)
+    
+    # Short-lived per-owner dashboard cache.
+    from app.services import owner_dashboard
+    owner_dashboard.init_app(app)
+    
+    # Live order events for Server-Sent Events streams.
+    from app.services import order_events
+    order_events.init_app(app)
+    
+    # Order status history and kitchen latency reports.
+    from app.services import order_timing
+    order_timing.init_app(app)
+    
+    # Server-side carts keyed by customer.
+    from app.services import cart_store
+    cart_store.init_app(app)
+    
+    # Demand and basket analytics cached per restaurant and day.
+    from app.services import order_analytics
+    order_analytics.init_app(app)
+    
     # Setup login manager.
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
@@ -70,45 +117,6 @@ def create_app(test_config=None):
     app.register_blueprint(owner_controller.bp)
     app.register_blueprint(main_controller.bp)
     
-    # Context processor for automatic daily reset.
-    @app.before_request
-    def ensure_daily_reset():
-        """Ensure all menu items are checked for daily reset on every request."""
-        # Skip database operations for static files and non-HTML requests.
-        if request.endpoint and (
-            request.endpoint.startswith('static') or 
-            request.endpoint.startswith('_internal') or
-            request.path.startswith('/static/')
-        ):
-            return
-        
-        try:
-            from app.models.menu import MenuItem
-            from datetime import datetime
-            
-            # Get today's date.
-            today = datetime.utcnow().date()
-            
-            # Find all menu items that need daily reset.
-            items_to_reset = MenuItem.query.filter(MenuItem.last_order_date != today).all()
-            
-            if items_to_reset:
-                # Reset all items that need it.
-                for item in items_to_reset:
-                    item.times_ordered_today = 0
-                    item.last_order_date = today
-                
-                # Commit the changes.
-                db.session.commit()
-        except Exception as e:
-            # Do not let daily reset errors break the app.
-            app.logger.warning(f"Daily reset check failed: {e}")
-            # Roll back any partial changes.
-            try:
-                db.session.rollback()
-            except:
-                pass
-    
     # Error handlers.
     @app.errorhandler(404)
     def page_not_found(e):
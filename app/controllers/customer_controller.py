@@ -12,10 +12,11 @@ from flask import (
     flash,
     current_app,
     abort,
-    session,
+    get_template_attribute,
 )
 from flask_login import login_required, current_user
 from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 
 from app import db
 from app.forms.customer_forms import (
@@ -42,12 +43,33 @@ from app.models import (
     STATUS_COMPLETED,
 )
 from app.models.dish_rating import DishRating
+from app.services.dish_search import DIETARY_FACETS, search_dishes
+from app.services.cart_store import CartRestaurantMismatch, get_cart_store
+from app.services.checkout import place_order, price_cart
+from app.services.order_events import event_stream_response, order_channel, publish_order_event
+from app.services.owner_dashboard import invalidate_dashboard
+from app.services.ratings import add_dish_ratings, add_feedback
+from app.services.restaurant_search import rank_restaurants
+from app.services.write_queue import run_write
 from app.utils.constants import CUISINE_OPTIONS
-from app.utils.decorators import customer_required
+from app.utils.decorators import customer_required, replica_reads
+from app.utils.pagination import clamp_page_size, keyset_paginate
 
 bp = Blueprint('customer', __name__, url_prefix='/customer')
 logger = logging.getLogger(__name__)
 
+DISH_SEARCH_PAGE_SIZE = 24
+RESTAURANT_PAGE_SIZE = 24
+MAX_RESTAURANT_PAGE_SIZE = 60
+ORDER_HISTORY_PAGE_SIZE = 20
+MAX_ORDER_HISTORY_PAGE_SIZE = 50
+
+def _wants_json():
+    """Check whether the request asks for a JSON response."""
+    return (request.args.get('format') == 'json'
+            or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+            or request.accept_mimetypes.best == 'application/json')
+
 @bp.route('/dashboard')
 @login_required
 @customer_required
@@ -147,6 +169,7 @@ def preferences():
 @bp.route('/restaurants')
 @login_required
 @customer_required
+@replica_reads
 def restaurants():
     """Restaurants listing route."""
     search_form = SearchForm()
@@ -168,51 +191,70 @@ def restaurants():
     # Build query.
     restaurant_query = Restaurant.query
     
-    if query:
-        restaurant_query = restaurant_query.filter(Restaurant.name.ilike(f'%{query}%'))
-    
-    if location:
-        restaurant_query = restaurant_query.filter(Restaurant.location.ilike(f'%{location}%'))
+    # Full-text search; matches are paged by relevance, everything else by name.
+    restaurant_query, rank = rank_restaurants(
+        restaurant_query,
+        text_terms=query,
+        location=location,
+        text_columns=('name', 'description', 'cuisines')
+    )
     
-    # We will filter by cuisines after fetching, due to JSON storage.
-    
-    # Get restaurants.
-    restaurants = restaurant_query.all()
-    # Filter by selected cuisines (match any).
-    if cuisines_selected:
-        sel = set([c for c in cuisines_selected if c])
-        if sel:
-            restaurants = [r for r in restaurants if sel.intersection(set(r.get_cuisines()))]
+    # Filter by selected cuisines (match any) through the cuisine index.
+    sel = [c for c in cuisines_selected if c]
+    if sel:
+        restaurant_query = restaurant_query.filter(Restaurant.serves_any_cuisine(sel))
     
     # Apply dietary filters when user checks the preference box.
     if apply_dietary_preferences:
         customer_dietary_restrictions = current_user.customer_profile.get_dietary_restrictions()
-        if customer_dietary_restrictions:
-            # Filter restaurants that have menu items matching user's dietary preferences.
-            filtered_restaurants = []
-            for restaurant in restaurants:
-                has_matching_items = False
-                
-                # Check if restaurant has items matching any of the user's dietary preferences.
-                for item in restaurant.menu_items:
-                    if 'vegetarian' in customer_dietary_restrictions and item.is_vegetarian:
-                        has_matching_items = True
-                        break
-                    elif 'vegan' in customer_dietary_restrictions and item.is_vegan:
-                        has_matching_items = True
-                        break
-                    elif 'guilt_free' in customer_dietary_restrictions and item.is_guilt_free:
-                        has_matching_items = True
-                        break
-                
-                if has_matching_items:
-                    filtered_restaurants.append(restaurant)
-            
-            restaurants = filtered_restaurants
+        dietary_condition = Restaurant.matches_dietary_restrictions(customer_dietary_restrictions)
+        if dietary_condition is not None:
+            restaurant_query = restaurant_query.filter(dietary_condition)
+    
+    # Get one page of restaurants, seeking past the cursor instead of using OFFSET.
+    sort_keys = [(rank if rank is not None else Restaurant.name, False), (Restaurant.id, False)]
+    per_page = clamp_page_size(request.args.get('per_page', type=int),
+                               RESTAURANT_PAGE_SIZE, MAX_RESTAURANT_PAGE_SIZE)
+    restaurants, next_cursor = keyset_paginate(restaurant_query, sort_keys,
+                                               cursor=request.args.get('cursor'), limit=per_page)
+    
+    next_url = None
+    if next_cursor:
+        args = request.args.to_dict(flat=False)
+        args.pop('format', None)
+        args['cursor'] = next_cursor
+        next_url = url_for('customer.restaurants', **args)
     
     # Add favorite status to each restaurant.
+    favorite_ids = set(current_user.customer_profile.get_preferences().get('favorite_restaurants', []))
     for restaurant in restaurants:
-        restaurant.is_favorite = current_user.customer_profile.is_favorite(restaurant.id)
+        restaurant.is_favorite = restaurant.id in favorite_ids
+    
+    if _wants_json():
+        grid_card = get_template_attribute('customer/_restaurant_cards.html', 'grid_card')
+        list_card = get_template_attribute('customer/_restaurant_cards.html', 'list_card')
+        return current_app.response_class(
+            response=json.dumps({
+                'restaurants': [{
+                    'id': restaurant.id,
+                    'name': restaurant.name,
+                    'location': restaurant.location,
+                    'cuisines': restaurant.get_cuisines(),
+                    'average_rating': restaurant.average_rating,
+                    'total_reviews': restaurant.total_reviews,
+                    'is_favorite': restaurant.is_favorite,
+                    'url': url_for('customer.restaurant_detail', id=restaurant.id)
+                } for restaurant in restaurants],
+                'html': {
+                    'gridView': ''.join(grid_card(r, apply_dietary_preferences) for r in restaurants),
+                    'listView': ''.join(list_card(r, apply_dietary_preferences) for r in restaurants)
+                },
+                'next_cursor': next_cursor,
+                'next_url': next_url
+            }),
+            status=200,
+            mimetype='application/json'
+        )
     
     return render_template('customer/restaurants.html',
                            restaurants=restaurants,
@@ -220,11 +262,60 @@ def restaurants():
                            query=query,
                            location=location,
                            cuisines=cuisines_selected,
-                           apply_dietary_preferences=apply_dietary_preferences)
+                           apply_dietary_preferences=apply_dietary_preferences,
+                           next_url=next_url)
+
+@bp.route('/dishes')
+@login_required
+@customer_required
+@replica_reads
+def dishes():
+    """City-wide dish search route with facet filters."""
+    query = request.args.get('query', '').strip()
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    dietary = [d for d in request.args.getlist('dietary') if d in DIETARY_FACETS]
+    categories = [c for c in request.args.getlist('category') if c]
+    cuisines_selected = [c for c in request.args.getlist('cuisines') if c]
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = DISH_SEARCH_PAGE_SIZE
+    
+    result = search_dishes(
+        text=query,
+        min_price=min_price,
+        max_price=max_price,
+        dietary=dietary,
+        categories=categories,
+        cuisines=cuisines_selected,
+        offset=(page - 1) * per_page,
+        limit=per_page
+    )
+    
+    # Load the page of dishes with their restaurants, keeping index order.
+    dishes_by_id = {
+        item.id: item for item in MenuItem.query
+        .options(joinedload(MenuItem.restaurant))
+        .filter(MenuItem.id.in_(result['ids'])).all()
+    }
+    dish_list = [dishes_by_id[i] for i in result['ids'] if i in dishes_by_id]
+    
+    return render_template('customer/dishes.html',
+                           dishes=dish_list,
+                           total=result['total'],
+                           facets=result['facets'],
+                           query=query,
+                           min_price=min_price,
+                           max_price=max_price,
+                           dietary=dietary,
+                           categories=categories,
+                           cuisines=cuisines_selected,
+                           page=page,
+                           has_next=page * per_page < result['total'])
 
 @bp.route('/restaurant/<int:id>')
 @login_required
 @customer_required
+@replica_reads
 def restaurant_detail(id):
     """Restaurant detail route."""
     restaurant = Restaurant.query.get_or_404(id)
@@ -353,80 +444,40 @@ def toggle_favorite(restaurant_id):
 @customer_required
 def cart():
     """Shopping cart route."""
-    # Get cart from session or initialize.
-    cart = session.get('cart', {})
-    cart_items = []
-    restaurant_name = None
-    restaurant_id = None
-    total = 0
-    
-    if cart:
-        # Get menu items in cart.
-        item_ids = [int(id) for id in cart.keys()]
-        menu_items = MenuItem.query.filter(MenuItem.id.in_(item_ids)).all()
-        
-        for item in menu_items:
-            quantity = int(cart[str(item.id)])
-            subtotal = item.price * quantity
-            total += subtotal
-            
-            cart_items.append({
-                'id': item.id,
-                'name': item.name,
-                'price': item.price,
-                'quantity': quantity,
-                'subtotal': subtotal
-            })
-            
-            if restaurant_id is None:
-                restaurant_id = item.restaurant_id
-                restaurant = Restaurant.query.get(restaurant_id)
-                restaurant_name = restaurant.name
+    customer_id = current_user.customer_profile.id
+    store = get_cart_store()
+    stored = store.get(customer_id)
     
     if request.method == 'POST':
         # Place order.
-        if not cart_items:
+        if not stored.items:
             flash("YOUR CART IS EMPTY.", "warning")
             return redirect(url_for('customer.cart'))
         
-        # Create order.
-        order = Order(
-            customer_id=current_user.customer_profile.id,
-            restaurant_id=restaurant_id,
-            status=STATUS_PENDING,
-            total_amount=total
-        )
-        db.session.add(order)
-        db.session.flush()  # To get order ID.
-        
-        # Create order items.
-        for item in cart_items:
-            menu_item = MenuItem.query.get(item['id'])
-            order_item = OrderItem(
-                order_id=order.id,
-                menu_item_id=item['id'],
-                quantity=item['quantity'],
-                price=menu_item.price
-            )
-            db.session.add(order_item)
-            
-            # Update times ordered today count with automatic daily reset.
-            menu_item.increment_daily_order_count(item['quantity'])
-        
-        db.session.commit()
+        # Re-price at checkout; never charge a price the customer has not seen.
+        summary = price_cart({line.id: line.quantity for line in stored.items})
+        if [(line.id, line.price, line.quantity) for line in summary.items] != \
+                [(line.id, line.price, line.quantity) for line in stored.items]:
+            store.replace(customer_id, summary)
+            db.session.commit()
+            flash("SOME ITEMS IN YOUR CART HAVE CHANGED. PLEASE REVIEW YOUR ORDER.", "warning")
+            return redirect(url_for('customer.cart'))
         
-        # Clear cart.
-        session['cart'] = {}
+        # Places the order and empties the cart in one transaction.
+        order = place_order(customer_id, summary)
+        invalidate_dashboard(summary.owner_id)
+        publish_order_event('order_created', order)
         
         logger.info(f"Order #{order.id} placed successfully by {current_user.username}")
         flash("YOUR ORDER HAS BEEN PLACED SUCCESSFULLY!", "success")
         return redirect(url_for('customer.order_detail', id=order.id))
     
+    restaurant = db.session.get(Restaurant, stored.restaurant_id) if stored.items else None
     return render_template('customer/cart.html', 
-                           cart_items=cart_items,
-                           restaurant_name=restaurant_name,
-                           restaurant_id=restaurant_id,
-                           total=total)
+                           cart_items=[line._asdict() for line in stored.items],
+                           restaurant_name=restaurant.name if restaurant else None,
+                           restaurant_id=stored.restaurant_id,
+                           total=stored.total)
 
 @bp.route('/add_to_cart/<int:item_id>')
 @login_required
@@ -436,13 +487,13 @@ def add_to_cart(item_id):
     menu_item = MenuItem.query.get_or_404(item_id)
     restaurant_id = menu_item.restaurant_id
     quantity = int(request.args.get('quantity', 1))
+    customer_id = current_user.customer_profile.id
     
-    # Initialize cart if not present.
-    if 'cart' not in session:
-        session['cart'] = {}
-    
-    # Check if cart is empty or from the same restaurant.
-    if session['cart'] and any(MenuItem.query.get(int(id)).restaurant_id != restaurant_id for id in session['cart']):
+    # Add or update cart; the store holds one restaurant per cart.
+    try:
+        stored = get_cart_store().add_item(customer_id, menu_item, quantity)
+        db.session.commit()
+    except CartRestaurantMismatch:
         message = "YOU CAN ONLY ORDER FROM ONE RESTAURANT AT A TIME. PLEASE CLEAR YOUR CART FIRST."
         # If AJAX request, return JSON.
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.accept_mimetypes.best == 'application/json':
@@ -450,7 +501,7 @@ def add_to_cart(item_id):
                 response=json.dumps({
                     'ok': False,
                     'message': message,
-                    'cart_count': len(session.get('cart', {}))
+                    'cart_count': get_cart_store().totals(customer_id).item_count
                 }),
                 status=400,
                 mimetype='application/json'
@@ -458,14 +509,6 @@ def add_to_cart(item_id):
         flash(message, "warning")
         return redirect(url_for('customer.restaurant_detail', id=restaurant_id))
     
-    # Add or update cart.
-    if str(item_id) in session['cart']:
-        session['cart'][str(item_id)] = session['cart'][str(item_id)] + quantity
-    else:
-        session['cart'][str(item_id)] = quantity
-    
-    session.modified = True
-    
     # For AJAX requests, return JSON payload instead of redirect.
     success_message = f"'{menu_item.name}' ADDED TO YOUR CART."
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.accept_mimetypes.best == 'application/json':
@@ -473,10 +516,11 @@ def add_to_cart(item_id):
             response=json.dumps({
                 'ok': True,
                 'message': success_message,
-                'cart_count': len(session.get('cart', {})),
+                'cart_count': stored.item_count,
+                'cart_total': stored.total,
                 'restaurant_id': restaurant_id,
                 'item_id': item_id,
-                'quantity': session['cart'][str(item_id)]
+                'quantity': next(line.quantity for line in stored.items if line.id == item_id)
             }),
             status=200,
             mimetype='application/json'
@@ -492,12 +536,8 @@ def update_cart_item(item_id):
     quantity = int(request.form.get('quantity', 1))
     
     # Update quantity or remove if zero.
-    if quantity > 0:
-        session['cart'][str(item_id)] = quantity
-    else:
-        session['cart'].pop(str(item_id), None)
-    
-    session.modified = True
+    get_cart_store().set_quantity(current_user.customer_profile.id, item_id, max(quantity, 0))
+    db.session.commit()
     
     flash("YOUR CART HAS BEEN UPDATED.", "info")
     return redirect(url_for('customer.cart'))
@@ -507,8 +547,8 @@ def update_cart_item(item_id):
 @customer_required
 def clear_cart():
     """Clear cart route."""
-    session['cart'] = {}
-    session.modified = True
+    get_cart_store().clear(current_user.customer_profile.id)
+    db.session.commit()
     
     flash("YOUR CART HAS BEEN CLEARED.", "info")
     return redirect(url_for('customer.cart'))
@@ -523,33 +563,64 @@ def orders():
     status_filter = request.args.get('status', '')
     
     # Build query.
-    orders_query = Order.query.filter_by(customer_id=current_user.customer_profile.id)
+    orders_query = Order.query.filter_by(customer_id=current_user.customer_profile.id)\
+        .options(joinedload(Order.restaurant))
     
     if status_filter:
         orders_query = orders_query.filter(Order.status == status_filter)
     
-    if search_query:
-        # Search by order ID or restaurant name.
+    search_term = search_query.strip().lstrip('#')
+    # str.isdigit() also accepts digits like '²' that int() rejects.
+    if search_term.isascii() and search_term.isdigit() and int(search_term) < 2 ** 63:
+        # Order numbers are looked up by primary key.
+        orders_query = orders_query.filter(Order.id == int(search_term))
+    elif search_term:
         orders_query = orders_query.join(Restaurant).filter(
-            or_(
-                Order.id.ilike(f'%{search_query}%'),
-                Restaurant.name.ilike(f'%{search_query}%')
-            )
+            Restaurant.name.ilike(f'%{search_term}%')
         )
     
-    # Get orders sorted by date (newest first).
-    orders = orders_query.order_by(Order.created_at.desc()).all()
-    
-    # Pre-load feedback for each order to avoid template errors.
-    for order in orders:
-        if order.feedback.count() > 0:
-            # Force loading of feedback.
-            _ = list(order.feedback)
+    # Get one page of orders, newest first.
+    per_page = clamp_page_size(request.args.get('per_page', type=int),
+                               ORDER_HISTORY_PAGE_SIZE, MAX_ORDER_HISTORY_PAGE_SIZE)
+    orders, next_cursor = keyset_paginate(
+        orders_query,
+        [(Order.created_at, True), (Order.id, True)],
+        cursor=request.args.get('cursor'),
+        limit=per_page
+    )
+    
+    # Load feedback for the whole page in one query.
+    feedback_by_order = {}
+    if orders:
+        for feedback in Feedback.query.filter(Feedback.order_id.in_([o.id for o in orders])):
+            feedback_by_order.setdefault(feedback.order_id, feedback)
+    
+    next_url = None
+    if next_cursor:
+        args = request.args.to_dict(flat=False)
+        args['cursor'] = next_cursor
+        next_url = url_for('customer.orders', **args)
     
     return render_template('customer/orders.html', 
                            orders=orders,
+                           feedback_by_order=feedback_by_order,
                            search_query=search_query,
-                           status_filter=status_filter)
+                           status_filter=status_filter,
+                           next_url=next_url,
+                           is_first_page=not request.args.get('cursor'))
+
+@bp.route('/order/<int:id>/events')
+@login_required
+@customer_required
+def order_events(id):
+    """Server-Sent Events stream of one order's status changes."""
+    order = Order.query.get_or_404(id)
+    
+    # Ensure order belongs to current user.
+    if order.customer_id != current_user.customer_profile.id:
+        abort(403)
+    
+    return event_stream_response([order_channel(order.id)])
 
 @bp.route('/order/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -610,17 +681,11 @@ def order_detail(id):
                     return redirect(url_for('customer.order_detail', id=order.id))
                 
                 # Save dish ratings.
-                for dish_rating_data in dish_ratings_submitted:
-                    dish_rating = DishRating(
-                        order_id=order.id,
-                        customer_id=current_user.customer_profile.id,
-                        restaurant_id=order.restaurant_id,
-                        menu_item_id=dish_rating_data['menu_item_id'],
-                        rating=dish_rating_data['rating']
-                    )
-                    db.session.add(dish_rating)
-                
-                db.session.commit()
+                run_write(add_dish_ratings, order.id, current_user.customer_profile.id, order.restaurant_id, {
+                    dish_rating_data['menu_item_id']: dish_rating_data['rating']
+                    for dish_rating_data in dish_ratings_submitted
+                })
+                invalidate_dashboard(order.restaurant.owner_id)
                 flash("YOUR DISH RATINGS HAVE BEEN SUBMITTED. THANK YOU!", "success")
                 return redirect(url_for('customer.order_detail', id=order.id))
             
@@ -645,16 +710,9 @@ def order_detail(id):
                     flash("Feedback has already been submitted for this order.", "info")
                     return redirect(url_for('customer.order_detail', id=order.id))
                     
-                feedback = Feedback(
-                    order_id=order.id,
-                    customer_id=current_user.customer_profile.id,
-                    restaurant_id=order.restaurant_id,
-                    rating=rating,
-                    message=message
-                )
-                
-                db.session.add(feedback)
-                db.session.commit()
+                run_write(add_feedback, order.id, current_user.customer_profile.id,
+                          order.restaurant_id, rating, message)
+                invalidate_dashboard(order.restaurant.owner_id)
                 
                 flash("YOUR FEEDBACK HAS BEEN SUBMITTED. THANK YOU!", "success")
                 return redirect(url_for('customer.order_detail', id=order.id))
@@ -689,33 +747,23 @@ def get_recommendations(customer):
     # Find restaurants that match customer preferences (match-any on cuisines list).
     if favorite_cuisines:
         # Start with candidates not already ordered from.
-        candidate_query = Restaurant.query
+        candidate_query = Restaurant.query.filter(Restaurant.serves_any_cuisine(favorite_cuisines))
         if ordered_restaurant_ids:
             candidate_query = candidate_query.filter(~Restaurant.id.in_(ordered_restaurant_ids))
-        candidates = candidate_query.all()
-        favorite_set = set(favorite_cuisines)
-        cuisine_recommendations = [r for r in candidates if favorite_set.intersection(set(r.get_cuisines()))]
+        cuisine_recommendations = candidate_query.order_by(Restaurant.id).limit(5).all()
         recommendations.extend(cuisine_recommendations)
     
     # Find restaurants with items matching dietary preferences (for recommendations only).
     if dietary_restrictions:
-        from sqlalchemy import or_
-        dietary_conditions = []
-        
-        if 'vegetarian' in dietary_restrictions:
-            dietary_conditions.append(MenuItem.is_vegetarian == True)
-        if 'vegan' in dietary_restrictions:
-            dietary_conditions.append(MenuItem.is_vegan == True)
-        if 'guilt_free' in dietary_restrictions:
-            dietary_conditions.append(MenuItem.is_guilt_free == True)
-        
-        if dietary_conditions:
-            dietary_restaurants = Restaurant.query.join(MenuItem).filter(
-                or_(*dietary_conditions),
-                ~Restaurant.id.in_([r.id for r in recommendations]),
-                ~Restaurant.id.in_(ordered_restaurant_ids) if ordered_restaurant_ids else True
-            ).distinct().all()
-            recommendations.extend(dietary_restaurants)
+        dietary_condition = Restaurant.matches_dietary_restrictions(dietary_restrictions)
+        if dietary_condition is not None:
+            dietary_query = Restaurant.query.filter(
+                dietary_condition,
+                ~Restaurant.id.in_([r.id for r in recommendations])
+            )
+            if ordered_restaurant_ids:
+                dietary_query = dietary_query.filter(~Restaurant.id.in_(ordered_restaurant_ids))
+            recommendations.extend(dietary_query.order_by(Restaurant.id).limit(5).all())
     
     # Limit to 5 recommendations.
     return recommendations[:5]
@@ -1,8 +1,11 @@
 """Restaurant owner controller for restaurant management."""
 
+import heapq
+import json
 import logging
 import os
 import uuid
+from datetime import datetime, timedelta
 
 from flask import (
     Blueprint,
@@ -13,9 +16,12 @@ from flask import (
     flash,
     current_app,
     abort,
+    Response,
+    stream_with_context,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import desc, func
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 
 from app import db
@@ -25,14 +31,29 @@ from app.forms.owner_forms import (
     OrderUpdateForm,
     RestaurantForm,
 )
-from app.models import Feedback, MenuItem, Order, OrderItem, Restaurant
+from app.models import Feedback, MenuItem, Order, Restaurant
+from app.models import STATUS_CONFIRMED, STATUS_PENDING, STATUS_PREPARING, STATUS_READY
 from app.models.dish_rating import DishRating
+from app.services.order_analytics import WEEKDAY_LABELS, order_analytics
+from app.services.order_events import event_stream_response, publish_order_event, restaurant_channel
+from app.services.order_export import EXPORT_FORMATS, EXPORT_MIMETYPES, export_orders, gzip_chunks
+from app.services.order_timing import kitchen_latency, set_order_status
+from app.services.owner_dashboard import get_dashboard, invalidate_dashboard
+from app.services.restaurant_search import filter_restaurants
+from app.services.sales_rollup import GRANULARITIES, best_sellers, sales_report, sales_totals
+from app.services.write_queue import run_write
 from app.utils.constants import CUISINE_OPTIONS
-from app.utils.decorators import owner_required
+from app.utils.decorators import owner_required, replica_reads
+from app.utils.pagination import clamp_page_size, keyset_paginate_each
 
 bp = Blueprint('owner', __name__, url_prefix='/owner')
 logger = logging.getLogger(__name__)
 
+ORDER_BOARD_PAGE_SIZE = 20
+MAX_ORDER_BOARD_PAGE_SIZE = 50
+LIVE_ORDER_STATUSES = (STATUS_PENDING, STATUS_CONFIRMED, STATUS_PREPARING, STATUS_READY)
+DEFAULT_REPORT_DAYS = 30
+
 def allowed_file(filename):
     """Check if file has an allowed extension."""
     return '.' in filename and \
@@ -53,49 +74,8 @@ def save_image(file):
 @owner_required
 def dashboard():
     """Restaurant owner dashboard route."""
-    # Get owner's restaurants.
-    restaurants = Restaurant.query.filter_by(owner_id=current_user.owner_profile.id).all()
-    
-    # Get recent orders across all restaurants.
-    recent_orders = Order.query.join(Restaurant).filter(
-        Restaurant.owner_id == current_user.owner_profile.id
-    ).order_by(Order.created_at.desc()).limit(10).all()
-    
-    # Get pending feedback.
-    pending_feedback = Feedback.query\
-        .join(Order, Feedback.order_id == Order.id)\
-        .filter(Order.restaurant_id.in_([r.id for r in Restaurant.query.filter_by(owner_id=current_user.owner_profile.id)]),
-                Feedback.is_resolved == False)\
-        .all()
-    
-    # Get recent dish ratings.
-    recent_dish_ratings = DishRating.query\
-        .join(MenuItem, DishRating.menu_item_id == MenuItem.id)\
-        .filter(MenuItem.restaurant_id.in_([r.id for r in restaurants]))\
-        .order_by(DishRating.created_at.desc()).limit(10).all()
-    
-    # Get dish rating statistics.
-    dish_rating_stats = {}
-    for restaurant in restaurants:
-        total_dish_ratings = DishRating.query.join(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id
-        ).count()
-        
-        avg_dish_rating = db.session.query(func.avg(DishRating.rating)).join(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id
-        ).scalar() or 0
-        
-        dish_rating_stats[restaurant.id] = {
-            'total_ratings': total_dish_ratings,
-            'average_rating': round(avg_dish_rating, 1) if avg_dish_rating else 0
-        }
-    
-    return render_template('owner/dashboard.html',
-                           restaurants=restaurants,
-                           recent_orders=recent_orders,
-                           pending_feedback=pending_feedback,
-                           recent_dish_ratings=recent_dish_ratings,
-                           dish_rating_stats=dish_rating_stats)
+    payload = get_dashboard(current_user.owner_profile.id)
+    return render_template('owner/dashboard.html', **payload)
 
 @bp.route('/restaurants')
 @login_required
@@ -108,18 +88,13 @@ def restaurants():
     # Build query to get restaurants for owner.
     query = Restaurant.query.filter_by(owner_id=current_user.owner_profile.id)
     
-    # Apply search filter.
+    # Apply search filter (ranked by relevance), otherwise sort by name.
     if search_query:
-        query = query.filter(
-            db.or_(
-                Restaurant.name.ilike(f'%{search_query}%'),
-                Restaurant.location.ilike(f'%{search_query}%'),
-                Restaurant.description.ilike(f'%{search_query}%')
-            )
-        )
+        query = filter_restaurants(query, text_terms=search_query)
+    else:
+        query = query.order_by(Restaurant.name.asc())
     
-    # Get restaurants sorted by name.
-    restaurants = query.order_by(Restaurant.name.asc()).all()
+    restaurants = query.all()
     
     return render_template('owner/restaurants.html', 
                            restaurants=restaurants,
@@ -179,9 +154,8 @@ def restaurant_detail(id):
     feedback_list = Feedback.query.filter_by(restaurant_id=restaurant.id).order_by(Feedback.created_at.desc()).all()
     
     # Get dish ratings for this restaurant.
-    dish_ratings_list = DishRating.query.join(MenuItem).filter(
-        MenuItem.restaurant_id == restaurant.id
-    ).order_by(DishRating.created_at.desc()).all()
+    dish_ratings_list = DishRating.query.filter_by(restaurant_id=restaurant.id)\
+        .order_by(DishRating.created_at.desc()).all()
     
     return render_template('owner/restaurant_detail.html',
                            restaurant=restaurant,
@@ -346,6 +320,7 @@ def new_menu_item(id):
                 item.is_deal_of_day = False
         
         db.session.add(menu_item)
+        restaurant.refresh_dietary_flags()
         db.session.commit()
         
         logger.info(f"Menu item '{menu_item.name}' created by {current_user.username}")
@@ -411,6 +386,7 @@ def edit_menu_item(id):
                 item.is_deal_of_day = False
         
         menu_item.is_deal_of_day = form.is_deal_of_day.data
+        restaurant.refresh_dietary_flags()
         
         db.session.commit()
         
@@ -458,6 +434,7 @@ def delete_menu_item(id):
             pass
     
     db.session.delete(menu_item)
+    restaurant.refresh_dietary_flags()
     db.session.commit()
     
     logger.info(f"Menu item '{menu_item_name}' deleted by {current_user.username}")
@@ -473,28 +450,73 @@ def orders():
     status_filter = request.args.get('status', '')
     restaurant_id = request.args.get('restaurant_id', '')
     
-    # Build query to get orders for owner's restaurants.
-    query = Order.query.join(Restaurant).filter(
-        Restaurant.owner_id == current_user.owner_profile.id
-    )
+    # Get owner's restaurants for filter.
+    restaurants = Restaurant.query.filter_by(owner_id=current_user.owner_profile.id).all()
+    restaurant_ids = [r.id for r in restaurants]
+    if restaurant_id.isdigit() and int(restaurant_id) in restaurant_ids:
+        restaurant_ids = [int(restaurant_id)]
+    elif restaurant_id:
+        restaurant_ids = []
+    
+    query = Order.query.options(joinedload(Order.restaurant), joinedload(Order.customer))
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
     
-    if restaurant_id:
-        query = query.filter(Order.restaurant_id == restaurant_id)
+    # Get one page of orders, newest first. Each restaurant is paged through
+    # (restaurant_id, created_at, id), or (restaurant_id, status, created_at)
+    # when filtered, and the pages merged, so no query sorts the history.
+    per_page = clamp_page_size(request.args.get('per_page', type=int),
+                               ORDER_BOARD_PAGE_SIZE, MAX_ORDER_BOARD_PAGE_SIZE)
+    orders, next_cursor = keyset_paginate_each(
+        query,
+        Order.restaurant_id,
+        restaurant_ids,
+        [(Order.created_at, True), (Order.id, True)],
+        cursor=request.args.get('cursor'),
+        limit=per_page
+    )
     
-    # Get orders sorted by date (newest first).
-    orders = query.order_by(Order.created_at.desc()).all()
+    # Load feedback for the whole page in one query.
+    feedback_by_order = {}
+    if orders:
+        for feedback in Feedback.query.filter(Feedback.order_id.in_([o.id for o in orders])):
+            feedback_by_order.setdefault(feedback.order_id, feedback)
+    
+    # Count live orders per status in one grouped query.
+    status_counts = dict.fromkeys(LIVE_ORDER_STATUSES, 0)
+    status_counts.update(
+        db.session.query(Order.status, func.count(Order.id))
+        .filter(Order.restaurant_id.in_(restaurant_ids), Order.status.in_(LIVE_ORDER_STATUSES))
+        .group_by(Order.status)
+        .all()
+    )
     
-    # Get owner's restaurants for filter.
-    restaurants = Restaurant.query.filter_by(owner_id=current_user.owner_profile.id).all()
+    next_url = None
+    if next_cursor:
+        args = request.args.to_dict(flat=False)
+        args['cursor'] = next_cursor
+        next_url = url_for('owner.orders', **args)
     
     return render_template('owner/orders.html', 
                            orders=orders,
+                           feedback_by_order=feedback_by_order,
+                           status_counts=status_counts,
                            status_filter=status_filter,
                            restaurant_id=restaurant_id,
-                           restaurants=restaurants)
+                           restaurants=restaurants,
+                           next_url=next_url)
+
+@bp.route('/orders/events')
+@login_required
+@owner_required
+def order_events():
+    """Server-Sent Events stream of new orders and status changes across the owner's restaurants."""
+    restaurant_ids = [
+        r.id for r in Restaurant.query.with_entities(Restaurant.id)
+        .filter_by(owner_id=current_user.owner_profile.id)
+    ]
+    return event_stream_response([restaurant_channel(r_id) for r_id in restaurant_ids])
 
 @bp.route('/order/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -511,8 +533,12 @@ def order_detail(id):
     form = OrderUpdateForm()
     
     if form.validate_on_submit():
-        order.update_status(form.status.data)
-        db.session.commit()
+        previous_status = order.status
+        run_write(set_order_status, order.id, form.status.data)
+        db.session.refresh(order)
+        invalidate_dashboard(restaurant.owner_id)
+        if order.status != previous_status:
+            publish_order_event('order_status', order, previous_status)
         
         logger.info(f"Order #{order.id} status updated to {form.status.data} by {current_user.username}")
         flash(f"ORDER STATUS UPDATED SUCCESSFULLY.", "success")
@@ -533,6 +559,7 @@ def order_detail(id):
 @bp.route('/reports')
 @login_required
 @owner_required
+@replica_reads
 def reports():
     """Reports dashboard route."""
     # Get filter parameters.
@@ -547,56 +574,26 @@ def reports():
         if not restaurant or restaurant.owner_id != current_user.owner_profile.id:
             abort(403)
         
-        # Top 5 most ordered menu items.
-        top_items = db.session.query(
-            MenuItem.id, MenuItem.name, func.sum(OrderItem.quantity).label('total')
-        ).join(OrderItem).join(Order)\
-        .filter(MenuItem.restaurant_id == restaurant_id)\
-        .group_by(MenuItem.id, MenuItem.name)\
-        .order_by(desc('total'))\
-        .limit(5).all()
-        
-        # Total orders and revenue for restaurant.
-        orders_count = Order.query.filter_by(restaurant_id=restaurant_id).count()
-        total_revenue = db.session.query(func.sum(Order.total_amount))\
-            .filter(Order.restaurant_id == restaurant_id)\
-            .scalar() or 0
+        # Top items, totals and 30-day trends come from the daily rollup.
+        top_items = best_sellers(restaurant.id, limit=5)
+        orders_count, total_revenue = sales_totals(restaurant.id)
         
         # Average rating: use the restaurant's average_rating property.
-        restaurant = Restaurant.query.get(restaurant_id)
         avg_rating = restaurant.average_rating
         
-        # Orders by day (last 30 days).
-        from datetime import datetime, timedelta
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+        # Time orders spend in each status, from the stored histograms.
+        status_latency = kitchen_latency(restaurant.id)
         
-        daily_orders = db.session.query(
-            func.date(Order.created_at).label('date'),
-            func.count(Order.id).label('count')
-        ).filter(
-            Order.restaurant_id == restaurant_id,
-            Order.created_at >= start_date
-        ).group_by(func.date(Order.created_at))\
-        .order_by(func.date(Order.created_at)).all()
-        
-        # Revenue trend (last 30 days).
-        daily_revenue = db.session.query(
-            func.date(Order.created_at).label('date'),
-            func.sum(Order.total_amount).label('revenue')
-        ).filter(
-            Order.restaurant_id == restaurant_id,
-            Order.created_at >= start_date
-        ).group_by(func.date(Order.created_at))\
-        .order_by(func.date(Order.created_at)).all()
+        # Hour-of-week demand, basket sizes and co-purchases, cached per day.
+        analytics = order_analytics(restaurant.id)
     else:
         # Initialize variables.
         top_items = []
         orders_count = 0
         total_revenue = 0
         avg_rating = 0
-        daily_orders = []
-        daily_revenue = []
+        status_latency = []
+        analytics = None
     
     return render_template('owner/reports.html',
                            restaurants=restaurants,
@@ -605,19 +602,139 @@ def reports():
                            orders_count=orders_count,
                            total_revenue=total_revenue,
                            avg_rating=avg_rating,
-                           daily_orders=daily_orders,
-                           daily_revenue=daily_revenue)
+                           status_latency=status_latency,
+                           analytics=analytics,
+                           weekday_labels=WEEKDAY_LABELS,
+                           granularities=GRANULARITIES,
+                           default_report_days=DEFAULT_REPORT_DAYS)
+
+def _owned_restaurant_names():
+    """Map the current owner's restaurant ids to names."""
+    return {r.id: r.name for r in Restaurant.query
+            .filter_by(owner_id=current_user.owner_profile.id)
+            .with_entities(Restaurant.id, Restaurant.name)}
+
+def _requested_restaurant_ids(owned):
+    """Get the restaurant_id arguments, or every owned restaurant when none are given.
+
+    Raises ValueError if any of them is not an integer and aborts with 403
+    if any of them belongs to another owner.
+    """
+    restaurant_ids = list(dict.fromkeys(int(value) for value in request.args.getlist('restaurant_id')))
+    restaurant_ids = restaurant_ids or sorted(owned)
+    if any(restaurant_id not in owned for restaurant_id in restaurant_ids):
+        abort(403)
+    return restaurant_ids
+
+def _date_arg(name):
+    """Parse a YYYY-MM-DD query argument; None when absent, ValueError when malformed."""
+    value = request.args.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def _report_error(message):
+    """Build a 400 JSON response for a bad reports data request."""
+    return current_app.response_class(
+        response=json.dumps({'ok': False, 'message': message}),
+        status=400,
+        mimetype='application/json'
+    )
+
+@bp.route('/reports/data')
+@login_required
+@owner_required
+@replica_reads
+def reports_data():
+    """Sales series for the reports charts as JSON.
+
+    Takes start and end dates (YYYY-MM-DD, inclusive, UTC), a granularity
+    of hour, day, week or month, and any number of restaurant_id values
+    (all of the owner's restaurants when none are given).
+    """
+    owned = _owned_restaurant_names()
+    try:
+        restaurant_ids = _requested_restaurant_ids(owned)
+    except ValueError:
+        return _report_error("Restaurant ids must be integers")
+    
+    try:
+        end = _date_arg('end') or datetime.utcnow().date()
+        start = _date_arg('start') or end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    except ValueError:
+        return _report_error("Dates must be given as YYYY-MM-DD")
+    except OverflowError:
+        return _report_error("Dates are out of range")
+    granularity = request.args.get('granularity', 'day')
+    
+    try:
+        buckets, series = sales_report(restaurant_ids, start, end, granularity)
+    except ValueError as e:
+        return _report_error(str(e))
+    
+    return current_app.response_class(
+        response=json.dumps({
+            'ok': True,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'granularity': granularity,
+            'buckets': buckets,
+            'restaurants': [{
+                'id': sales.restaurant_id,
+                'name': owned[sales.restaurant_id],
+                'orders': sales.orders,
+                'revenue': sales.revenue,
+                'items_sold': sales.items_sold,
+                'total_orders': sum(sales.orders),
+                'total_revenue': round(sum(sales.revenue), 2)
+            } for sales in series]
+        }),
+        status=200,
+        mimetype='application/json'
+    )
+
+@bp.route('/orders/export')
+@login_required
+@owner_required
+@replica_reads
+def export_orders_file():
+    """Stream orders and their lines as CSV or NDJSON, gzipped when accepted.
+
+    Takes format (csv or ndjson), optional start and end dates (YYYY-MM-DD,
+    inclusive, UTC), an optional status, and any number of restaurant_id
+    values (all of the owner's restaurants when none are given).
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    try:
+        restaurant_ids = _requested_restaurant_ids(_owned_restaurant_names())
+        start, end = _date_arg('start'), _date_arg('end')
+    except ValueError:
+        abort(400)
+    
+    chunks = stream_with_context(export_orders(restaurant_ids, fmt, start, end, request.args.get('status')))
+    filename = '_'.join(['orders'] + [d.isoformat() for d in (start, end) if d]) + f'.{fmt}'
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Vary': 'Accept-Encoding',
+    }
+    if request.accept_encodings['gzip']:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    
+    logger.info(f"Order export ({fmt}) started by {current_user.username}")
+    return Response(chunks, mimetype=EXPORT_MIMETYPES[fmt], headers=headers)
 
 @bp.route('/feedback')
 @login_required
 @owner_required
 def feedback():
     """Feedback management route."""
-    # Get feedback for owner's restaurants.
-    feedback_list = Feedback.query\
-        .join(Order, Feedback.order_id == Order.id)\
-        .filter(Order.restaurant_id.in_([r.id for r in Restaurant.query.filter_by(owner_id=current_user.owner_profile.id)]))\
-        .order_by(Feedback.created_at.desc()).all()
+    # Get feedback for owner's restaurants, newest first, merging each
+    # restaurant's (restaurant_id, created_at) index walk.
+    feedback_list = list(heapq.merge(*(
+        Feedback.query.filter_by(restaurant_id=restaurant_id).order_by(Feedback.created_at.desc())
+        for restaurant_id in _owned_restaurant_names()
+    ), key=lambda item: item.created_at, reverse=True))
     
     return render_template('owner/feedback.html', feedback_list=feedback_list)
 
@@ -4,8 +4,11 @@ MODELS PACKAGE
 
 from app.models.user import User, ROLE_CUSTOMER, ROLE_OWNER
 from app.models.customer import Customer
-from app.models.restaurant import Restaurant, RestaurantOwner
+from app.models.restaurant import Restaurant, RestaurantCuisine, RestaurantOwner
 from app.models.menu import MenuItem
 from app.models.order import Order, OrderItem, STATUS_PENDING, STATUS_CONFIRMED, STATUS_PREPARING, STATUS_READY, STATUS_COMPLETED, STATUS_CANCELLED
 from app.models.feedback import Feedback
 from app.models.dish_rating import DishRating
+from app.models.cart import Cart, CartItem
+from app.models.order_status import OrderStatusEvent, OrderStatusLatency
+from app.models.daily_stats import MenuItemDailyStats, RestaurantDailyStats, RestaurantHourlyStats
@@ -0,0 +1,39 @@
+"""Cart models for the server-side cart store."""
+
+from datetime import datetime
+
+from app import db
+
+class Cart(db.Model):
+    """A customer's open cart.
+
+    restaurant_id, item_count and total are stored with the cart so the
+    one-restaurant check and the cart badge never touch the lines.
+    """
+    __tablename__ = 'carts'
+    
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), primary_key=True)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False)
+    item_count = db.Column(db.Integer, nullable=False, default=0)  # Distinct menu items.
+    total = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships.
+    items = db.relationship('CartItem', backref='cart', lazy='select', cascade='all, delete-orphan',
+                            order_by='CartItem.menu_item_id')
+    
+    def __repr__(self):
+        return f'<Cart of customer {self.customer_id}>'
+
+class CartItem(db.Model):
+    """One menu item line in a cart, priced when it was added."""
+    __tablename__ = 'cart_items'
+    
+    customer_id = db.Column(db.Integer, db.ForeignKey('carts.customer_id'), primary_key=True)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    price = db.Column(db.Float, nullable=False)  # Price when added to the cart.
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    
+    def __repr__(self):
+        return f'<CartItem {self.menu_item_id} x{self.quantity}>'
@@ -0,0 +1,52 @@
+"""Sales rollup models for owner reports."""
+
+from app import db
+
+class RestaurantDailyStats(db.Model):
+    """One restaurant's non-cancelled orders, revenue and items sold on one UTC day.
+
+    See app.services.sales_rollup for the code that keeps it in sync.
+    """
+    __tablename__ = 'restaurant_daily_stats'
+    
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    items_sold = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<RestaurantDailyStats {self.restaurant_id} {self.day}>'
+
+class MenuItemDailyStats(db.Model):
+    """Quantity of one menu item sold on one UTC day."""
+    __tablename__ = 'menu_item_daily_stats'
+    __table_args__ = (
+        # Serves per-restaurant top items over a date range.
+        db.Index('ix_menu_item_daily_stats_restaurant_day', 'restaurant_id', 'day'),
+    )
+    
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<MenuItemDailyStats {self.menu_item_id} {self.day} x{self.quantity}>'
+
+class RestaurantHourlyStats(db.Model):
+    """One restaurant's non-cancelled orders, revenue and items sold in one UTC hour.
+
+    Backs hourly report buckets; days, weeks and months read
+    RestaurantDailyStats instead.
+    """
+    __tablename__ = 'restaurant_hourly_stats'
+    
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)  # Truncated to the hour.
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    items_sold = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<RestaurantHourlyStats {self.restaurant_id} {self.hour}>'
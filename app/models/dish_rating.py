@@ -21,7 +21,13 @@ class DishRating(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Unique constraint: one rating per customer per menu item per order.
-    __table_args__ = (db.UniqueConstraint('order_id', 'menu_item_id', name='unique_order_dish_rating'),)
+    __table_args__ = (
+        db.UniqueConstraint('order_id', 'menu_item_id', name='unique_order_dish_rating'),
+        # Serves the owner's recent dish ratings across restaurants.
+        db.Index('ix_dish_ratings_restaurant_created', 'restaurant_id', 'created_at'),
+        # Averages a dish's ratings without touching the table.
+        db.Index('ix_dish_ratings_menu_item_rating', 'menu_item_id', 'rating'),
+    )
     
     # Relationships.
     order = db.relationship('Order', backref='dish_ratings')
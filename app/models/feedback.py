@@ -10,6 +10,10 @@ class Feedback(db.Model):
     Only allowed after order is completed.
     """
     __tablename__ = 'feedback'
+    __table_args__ = (
+        # Serves a restaurant's feedback list, newest first, and its unresolved count.
+        db.Index('ix_feedback_restaurant_created', 'restaurant_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, unique=True)
@@ -1,11 +1,20 @@
 """Menu item model."""
 
 from datetime import datetime
+
+from sqlalchemy import case
+from sqlalchemy.ext.hybrid import hybrid_property
+
 from app import db
+from app.models.rating_histogram import RatingHistogramMixin
 
-class MenuItem(db.Model):
+class MenuItem(RatingHistogramMixin, db.Model):
     """Menu item model for storing food items."""
     __tablename__ = 'menu_items'
+    __table_args__ = (
+        # Serves a restaurant's menu, optionally filtered by category.
+        db.Index('ix_menu_items_restaurant_category', 'restaurant_id', 'category'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False)
@@ -19,8 +28,12 @@ class MenuItem(db.Model):
     image_path = db.Column(db.String(200))
     is_special = db.Column(db.Boolean, default=False)
     is_deal_of_day = db.Column(db.Boolean, default=False)
-    times_ordered_today = db.Column(db.Integer, default=0)
-    last_order_date = db.Column(db.Date, default=datetime.utcnow().date())
+    # Raw (count, day) pair; the count only applies while last_order_date is today.
+    _times_ordered_today = db.Column('times_ordered_today', db.Integer, default=0)
+    last_order_date = db.Column(db.Date, default=lambda: datetime.utcnow().date())
+    # Dish rating aggregates, maintained on write (see app.services.ratings).
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -30,56 +43,53 @@ class MenuItem(db.Model):
     def __repr__(self):
         return f'<MenuItem {self.name}>'
     
+    @hybrid_property
+    def times_ordered_today(self):
+        """Get today's order count, including increments not yet flushed."""
+        from app.services.order_counters import pending_order_count
+        stored = self._times_ordered_today or 0
+        if self.last_order_date != datetime.utcnow().date():
+            stored = 0  # A stale day stamp reads as zero.
+        return stored + pending_order_count(self.id)
+    
+    @times_ordered_today.expression
+    def times_ordered_today(cls):
+        """SQL expression for today's flushed order count."""
+        return case(
+            (cls.last_order_date == datetime.utcnow().date(), cls._times_ordered_today),
+            else_=0
+        )
+    
     @property
     def is_mostly_ordered(self):
         """Check if item is mostly ordered (>10 times today)."""
-        # Ensure we're checking today's count.
-        self._ensure_daily_reset()
         return self.times_ordered_today > 10
     
-    def _ensure_daily_reset(self):
-        """Ensure daily reset if it's a new day (automatic at midnight)."""
-        today = datetime.utcnow().date()
-        if self.last_order_date != today:
-            # It is a new day – automatically reset the counter.
-            self.times_ordered_today = 0
-            self.last_order_date = today
-    
     def increment_daily_order_count(self, quantity=1):
-        """Increment daily order count with automatic daily reset at midnight."""
+        """Increment daily order count, starting a new count on a new day."""
         today = datetime.utcnow().date()
         
-        # Automatic reset if it's a new day (after 12 AM).
+        # Roll over the stored pair if it belongs to a previous day.
         if self.last_order_date != today:
-            self.times_ordered_today = 0
+            self._times_ordered_today = 0
             self.last_order_date = today
         
         # Increment the count.
-        self.times_ordered_today += quantity
-    
+        self._times_ordered_today = (self._times_ordered_today or 0) + quantity
     
     def reset_daily_order_count(self):
         """Reset the daily order count."""
-        self.times_ordered_today = 0
+        self._times_ordered_today = 0
         self.last_order_date = datetime.utcnow().date()
     
     @property
     def average_rating(self):
-        """Calculate average rating for this menu item."""
-        from sqlalchemy import func
-        from app import db
-        from app.models.dish_rating import DishRating
-        avg_value = db.session.query(func.avg(DishRating.rating)).filter(
-            DishRating.menu_item_id == self.id
-        ).scalar()
-        return round(avg_value, 1) if avg_value else 0
+        """Get average dish rating from the stored aggregates."""
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
     
     @property
     def total_ratings(self):
         """Get total number of ratings for this menu item."""
-        from app.models.dish_rating import DishRating
-        from app import db
-        return db.session.query(DishRating).filter(
-            DishRating.menu_item_id == self.id
-        ).count()
-    
+        return self.rating_count or 0
@@ -12,15 +12,53 @@ STATUS_READY = 'ready'
 STATUS_COMPLETED = 'completed'
 STATUS_CANCELLED = 'cancelled'
 
+STATUS_LABELS = {
+    STATUS_PENDING: 'Pending',
+    STATUS_CONFIRMED: 'Confirmed',
+    STATUS_PREPARING: 'Preparing',
+    STATUS_READY: 'Ready for Pickup',
+    STATUS_COMPLETED: 'Completed',
+    STATUS_CANCELLED: 'Cancelled'
+}
+
+ITEMS_SUMMARY_LENGTH = 255
+
+def format_items_summary(lines):
+    """Render (quantity, name) pairs as '2× Margherita, 1× Tiramisu'.
+
+    Lines that do not fit in the stored column are folded into '+N more'.
+    """
+    parts = [f'{quantity}× {name}' for quantity, name in lines]
+    summary = ', '.join(parts)
+    if len(summary) <= ITEMS_SUMMARY_LENGTH:
+        return summary
+    for keep in range(len(parts) - 1, 0, -1):
+        summary = f"{', '.join(parts[:keep])} +{len(parts) - keep} more"
+        if len(summary) <= ITEMS_SUMMARY_LENGTH:
+            return summary
+    return parts[0][:ITEMS_SUMMARY_LENGTH - 1] + '…'
+
 class Order(db.Model):
     """Order model for storing customer orders."""
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Serves a customer's order history, paged by (created_at, id).
+        db.Index('ix_orders_customer_created', 'customer_id', 'created_at'),
+        # Serves the owner order board and its per-status counters.
+        db.Index('ix_orders_restaurant_status_created', 'restaurant_id', 'status', 'created_at'),
+        # Reads one restaurant's orders in (created_at, id) order without sorting:
+        # the unfiltered board, the dashboard and exports.
+        db.Index('ix_orders_restaurant_created', 'restaurant_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False)
     status = db.Column(db.String(20), default=STATUS_PENDING, index=True)
     total_amount = db.Column(db.Float, nullable=False)
+    # Written at checkout so order lists never read order_items.
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    items_summary = db.Column(db.String(ITEMS_SUMMARY_LENGTH))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -31,23 +69,25 @@ class Order(db.Model):
     def __repr__(self):
         return f'<Order #{self.id}>'
     
-    @property
-    def item_count(self):
-        """Get total number of items in order."""
-        return sum(item.quantity for item in self.items)
+    def refresh_item_summary(self):
+        """Recompute the stored item count and line summary from order_items.
+
+        Checkout writes both directly; call this after adding OrderItem rows
+        any other way.
+        """
+        from app.models.menu import MenuItem
+        
+        lines = db.session.query(OrderItem.quantity, MenuItem.name)\
+            .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)\
+            .filter(OrderItem.order_id == self.id)\
+            .order_by(OrderItem.id).all()
+        self.item_count = sum(quantity for quantity, _ in lines)
+        self.items_summary = format_items_summary(lines)
     
     @property
     def status_display(self):
         """Get human-readable status."""
-        status_map = {
-            STATUS_PENDING: 'Pending',
-            STATUS_CONFIRMED: 'Confirmed',
-            STATUS_PREPARING: 'Preparing',
-            STATUS_READY: 'Ready for Pickup',
-            STATUS_COMPLETED: 'Completed',
-            STATUS_CANCELLED: 'Cancelled'
-        }
-        return status_map.get(self.status, self.status)
+        return STATUS_LABELS.get(self.status, self.status)
     
     def update_status(self, new_status):
         """Update order status."""
@@ -60,6 +100,10 @@ class Order(db.Model):
 class OrderItem(db.Model):
     """Order item model for storing individual items in an order."""
     __tablename__ = 'order_items'
+    __table_args__ = (
+        # Loads an order's lines; menu_item_id makes it covering for basket queries.
+        db.Index('ix_order_items_order_menu_item', 'order_id', 'menu_item_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -0,0 +1,40 @@
+"""Order status history and kitchen latency histogram models."""
+
+from datetime import datetime
+
+from app import db
+
+class OrderStatusEvent(db.Model):
+    """One status transition of an order; rows are only ever appended."""
+    __tablename__ = 'order_status_events'
+    __table_args__ = (
+        # Finds the latest transition of an order when it moves on.
+        db.Index('ix_order_status_events_order_created', 'order_id', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False, index=True)
+    from_status = db.Column(db.String(20))  # None for the order being placed.
+    to_status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<OrderStatusEvent #{self.order_id} {self.from_status} -> {self.to_status}>'
+
+class OrderStatusLatency(db.Model):
+    """Histogram bucket of how long a restaurant's orders stay in one status.
+
+    Bucket b counts stays of roughly LATENCY_BUCKET_BASE ** b seconds; see
+    app.services.order_timing for the code that keeps them up to date.
+    """
+    __tablename__ = 'order_status_latency'
+    
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<OrderStatusLatency {self.restaurant_id} {self.status} [{self.bucket}] x{self.count}>'
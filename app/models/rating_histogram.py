@@ -0,0 +1,36 @@
+"""Star-distribution histogram columns shared by rated models."""
+
+from app import db
+
+class RatingHistogramMixin:
+    """Five per-star rating counters, maintained on write.
+
+    See app.services.ratings for the code that keeps them in sync.
+    """
+    stars_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    @classmethod
+    def stars_column(cls, rating):
+        """Get the counter column for a 1-5 star rating."""
+        return getattr(cls, f'stars_{rating}')
+    
+    @property
+    def rating_distribution(self):
+        """Get (stars, count, percent) tuples from 5 stars down to 1."""
+        counts = [(stars, getattr(self, f'stars_{stars}') or 0) for stars in range(5, 0, -1)]
+        total = sum(count for _, count in counts)
+        return [
+            (stars, count, round(100 * count / total) if total else 0)
+            for stars, count in counts
+        ]
+    
+    @property
+    def liked_percent(self):
+        """Get the percentage of 4 and 5 star ratings."""
+        liked = (self.stars_4 or 0) + (self.stars_5 or 0)
+        total = liked + sum(getattr(self, f'stars_{stars}') or 0 for stars in range(1, 4))
+        return round(100 * liked / total) if total else 0
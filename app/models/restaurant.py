@@ -4,6 +4,7 @@ import json
 from datetime import datetime
 
 from app import db
+from app.models.rating_histogram import RatingHistogramMixin
 
 class RestaurantOwner(db.Model):
     """Restaurant owner model for storing owner information."""
@@ -22,7 +23,7 @@ class RestaurantOwner(db.Model):
     def __repr__(self):
         return f'<RestaurantOwner {self.name}>'
 
-class Restaurant(db.Model):
+class Restaurant(RatingHistogramMixin, db.Model):
     """Restaurant model for storing restaurant information."""
     __tablename__ = 'restaurants'
     
@@ -34,6 +35,14 @@ class Restaurant(db.Model):
     # Store multiple cuisines as JSON-encoded text
     cuisines = db.Column(db.Text)
     image_path = db.Column(db.String(200))
+    # Order feedback aggregates, maintained on write (see app.services.ratings).
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Dietary capability flags, recomputed whenever a menu item changes.
+    has_vegetarian = db.Column(db.Boolean, nullable=False, default=False, server_default='0', index=True)
+    has_vegan = db.Column(db.Boolean, nullable=False, default=False, server_default='0', index=True)
+    has_guilt_free = db.Column(db.Boolean, nullable=False, default=False, server_default='0', index=True)
+    has_non_vegetarian = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -41,25 +50,22 @@ class Restaurant(db.Model):
     menu_items = db.relationship('MenuItem', backref='restaurant', lazy='dynamic', cascade='all, delete-orphan')
     orders = db.relationship('Order', backref='restaurant', lazy='dynamic', cascade='all, delete-orphan')
     feedbacks = db.relationship('Feedback', backref='restaurant', lazy='dynamic')
+    cuisine_links = db.relationship('RestaurantCuisine', backref='restaurant', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Restaurant {self.name}>'
     
     @property
     def average_rating(self):
-        """Calculate average rating using order feedback only."""
-        from sqlalchemy import func
-        from app import db
-        from app.models.feedback import Feedback
-        avg_value = db.session.query(func.avg(Feedback.rating)).filter(Feedback.restaurant_id == self.id).scalar()
-        return avg_value or 0
+        """Get average order feedback rating from the stored aggregates."""
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
     
     @property
     def total_reviews(self):
-        """Get total number of order feedback items (deprecate legacy reviews)."""
-        from app.models.feedback import Feedback
-        from app import db
-        return db.session.query(Feedback).filter(Feedback.restaurant_id == self.id).count()
+        """Get total number of order feedback items."""
+        return self.rating_count or 0
     
     def get_menu_by_category(self):
         """Group menu items by category."""
@@ -93,6 +99,23 @@ class Restaurant(db.Model):
                 if c_stripped and c_stripped not in cuisines_clean:
                     cuisines_clean.append(c_stripped)
         self.cuisines = json.dumps(cuisines_clean) if cuisines_clean else None
+        
+        # Keep the normalized cuisine index in sync.
+        existing = {link.cuisine: link for link in self.cuisine_links}
+        for cuisine, link in existing.items():
+            if cuisine not in cuisines_clean:
+                self.cuisine_links.remove(link)
+        for cuisine in cuisines_clean:
+            if cuisine not in existing:
+                self.cuisine_links.append(RestaurantCuisine(cuisine=cuisine))
+    
+    @classmethod
+    def serves_any_cuisine(cls, cuisines_list):
+        """SQL condition matching restaurants that serve any of the cuisines."""
+        return cls.id.in_(
+            db.select(RestaurantCuisine.restaurant_id)
+            .where(RestaurantCuisine.cuisine.in_(cuisines_list))
+        )
 
     @property
     def cuisines_display(self):
@@ -102,23 +125,53 @@ class Restaurant(db.Model):
     
     def get_dietary_options(self):
         """Get available dietary options for this restaurant based on menu items."""
-        dietary_options = {
-            'has_vegetarian': False,
-            'has_vegan': False,
-            'has_guilt_free': False,
-            'has_non_vegetarian': False
+        return {
+            'has_vegetarian': bool(self.has_vegetarian),
+            'has_vegan': bool(self.has_vegan),
+            'has_guilt_free': bool(self.has_guilt_free),
+            'has_non_vegetarian': bool(self.has_non_vegetarian)
         }
+    
+    def refresh_dietary_flags(self):
+        """Recompute stored dietary flags from the menu in one aggregate query."""
+        from sqlalchemy import case, func
+        from app.models.menu import MenuItem
         
-        for item in self.menu_items:
-            if item.is_vegetarian:
-                dietary_options['has_vegetarian'] = True
-            else:
-                dietary_options['has_non_vegetarian'] = True
-            
-            if item.is_vegan:
-                dietary_options['has_vegan'] = True
-            
-            if item.is_guilt_free:
-                dietary_options['has_guilt_free'] = True
+        def any_item(condition):
+            return func.coalesce(func.max(case((condition, 1), else_=0)), 0)
         
-        return dietary_options
\ No newline at end of file
+        row = db.session.query(
+            any_item(MenuItem.is_vegetarian == True),
+            any_item(MenuItem.is_vegan == True),
+            any_item(MenuItem.is_guilt_free == True),
+            any_item(MenuItem.is_vegetarian == False)
+        ).filter(MenuItem.restaurant_id == self.id).one()
+        
+        self.has_vegetarian, self.has_vegan, self.has_guilt_free, self.has_non_vegetarian = \
+            (bool(value) for value in row)
+    
+    @classmethod
+    def matches_dietary_restrictions(cls, restrictions):
+        """SQL condition matching restaurants with a dish for any restriction.
+
+        Returns None when no restriction maps to a flag.
+        """
+        flags = {
+            'vegetarian': cls.has_vegetarian,
+            'vegan': cls.has_vegan,
+            'guilt_free': cls.has_guilt_free,
+        }
+        conditions = [flags[r] == True for r in restrictions if r in flags]
+        return db.or_(*conditions) if conditions else None
+
+class RestaurantCuisine(db.Model):
+    """Normalized restaurant-to-cuisine index, mirroring Restaurant.cuisines."""
+    __tablename__ = 'restaurant_cuisines'
+    
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), primary_key=True)
+    cuisine = db.Column(db.String(50), primary_key=True)
+    
+    __table_args__ = (db.Index('ix_restaurant_cuisines_cuisine', 'cuisine', 'restaurant_id'),)
+    
+    def __repr__(self):
+        return f'<RestaurantCuisine {self.restaurant_id} {self.cuisine}>'
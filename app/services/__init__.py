@@ -0,0 +1,3 @@
+"""
+SERVICES PACKAGE
+"""
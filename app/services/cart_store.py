@@ -0,0 +1,226 @@
+"""Server-side cart store keyed by customer.
+
+Carts used to live in the signed session cookie, so every request carried
+them and the one-restaurant check loaded each menu item already in the
+cart. The store keeps the cart on the server with its restaurant_id, item
+count and total stored alongside the lines: the restaurant check is a
+single comparison and the cart badge never re-prices anything.
+
+Two backends are available, chosen with CART_BACKEND:
+
+- 'sql' (default) keeps carts in the carts and cart_items tables, so they
+  survive restarts and are shared by every worker process. Changes are
+  flushed into the request's transaction; the route commits them.
+- 'memory' keeps carts in a dict in this process; handy for tests and
+  single-process deployments.
+"""
+
+import threading
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context
+from flask_login import current_user
+from sqlalchemy import delete, insert
+
+from app import db
+from app.models.cart import Cart, CartItem
+from app.services.checkout import CartLine
+
+StoredCart = namedtuple('StoredCart', ['restaurant_id', 'items', 'item_count', 'total'])
+CartTotals = namedtuple('CartTotals', ['item_count', 'total'])
+
+EMPTY_STORED_CART = StoredCart(None, (), 0, 0)
+EMPTY_TOTALS = CartTotals(0, 0)
+
+# Customers share CART_LOCK_STRIPES locks by customer_id, so the lock table
+# never grows with the number of customers seen.
+CART_LOCK_STRIPES = 64
+
+class CartRestaurantMismatch(ValueError):
+    """Raised when adding a dish from another restaurant to a non-empty cart."""
+    
+    def __init__(self, restaurant_id):
+        super().__init__(f"Cart already holds items from restaurant {restaurant_id}")
+        self.restaurant_id = restaurant_id
+
+def build_cart(restaurant_id, items):
+    """Build a StoredCart from lines, computing its stored count and total."""
+    items = tuple(sorted((line for line in items if line.quantity > 0), key=lambda line: line.id))
+    if not items:
+        return EMPTY_STORED_CART
+    return StoredCart(restaurant_id, items, len(items), sum(line.subtotal for line in items))
+
+def _line(item_id, name, price, quantity):
+    return CartLine(item_id, name, price, quantity, price * quantity)
+
+class MemoryCartBackend:
+    """Carts held in a dict in this process."""
+    
+    def __init__(self):
+        self._carts = {}
+        self._lock = threading.Lock()
+    
+    def load(self, customer_id):
+        with self._lock:
+            return self._carts.get(customer_id, EMPTY_STORED_CART)
+    
+    def totals(self, customer_id):
+        cart = self.load(customer_id)
+        return CartTotals(cart.item_count, cart.total)
+    
+    def save(self, customer_id, cart):
+        with self._lock:
+            if cart.items:
+                self._carts[customer_id] = cart
+            else:
+                self._carts.pop(customer_id, None)
+    
+    def delete(self, customer_id):
+        with self._lock:
+            self._carts.pop(customer_id, None)
+
+class SQLCartBackend:
+    """Carts held in the carts and cart_items tables."""
+    
+    def load(self, customer_id):
+        cart = db.session.get(Cart, customer_id)
+        if cart is None:
+            return EMPTY_STORED_CART
+        return StoredCart(
+            cart.restaurant_id,
+            tuple(_line(item.menu_item_id, item.name, item.price, item.quantity) for item in cart.items),
+            cart.item_count,
+            cart.total
+        )
+    
+    def totals(self, customer_id):
+        row = db.session.query(Cart.item_count, Cart.total)\
+            .filter(Cart.customer_id == customer_id).first()
+        return CartTotals(*row) if row else EMPTY_TOTALS
+    
+    def save(self, customer_id, cart):
+        if not cart.items:
+            self.delete(customer_id)
+            return
+        
+        # Rewrite the lines wholesale; a cart is a handful of rows.
+        db.session.execute(delete(CartItem).where(CartItem.customer_id == customer_id))
+        stored = db.session.get(Cart, customer_id)
+        if stored is None:
+            stored = Cart(customer_id=customer_id)
+            db.session.add(stored)
+        stored.restaurant_id = cart.restaurant_id
+        stored.item_count = cart.item_count
+        stored.total = cart.total
+        db.session.flush()
+        db.session.execute(insert(CartItem), [
+            {'customer_id': customer_id, 'menu_item_id': line.id, 'name': line.name,
+             'price': line.price, 'quantity': line.quantity}
+            for line in cart.items
+        ])
+    
+    def delete(self, customer_id):
+        db.session.execute(delete(CartItem).where(CartItem.customer_id == customer_id))
+        db.session.execute(delete(Cart).where(Cart.customer_id == customer_id))
+
+CART_BACKENDS = {
+    'memory': MemoryCartBackend,
+    'sql': SQLCartBackend,
+}
+
+class CartStore:
+    """Cart operations on top of a storage backend.
+
+    Updates are read-modify-write under a per-process lock for the
+    customer, so two quick clicks in one worker never lose a line. The
+    caller commits the session afterwards.
+    """
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self._locks = [threading.Lock() for _ in range(CART_LOCK_STRIPES)]
+    
+    def _customer_lock(self, customer_id):
+        return self._locks[customer_id % CART_LOCK_STRIPES]
+    
+    def _save(self, customer_id, cart):
+        self.backend.save(customer_id, cart)
+        if has_app_context():
+            g.pop('_cart_totals', None)
+    
+    def get(self, customer_id):
+        """Get a customer's cart with its lines."""
+        return self.backend.load(customer_id)
+    
+    def totals(self, customer_id):
+        """Get a customer's stored item count and total, without the lines."""
+        return self.backend.totals(customer_id)
+    
+    def add_item(self, customer_id, menu_item, quantity=1):
+        """Add quantity of a menu item and return the updated cart.
+
+        Raises CartRestaurantMismatch if the cart holds another restaurant's dishes.
+        """
+        with self._customer_lock(customer_id):
+            cart = self.backend.load(customer_id)
+            if cart.items and cart.restaurant_id != menu_item.restaurant_id:
+                raise CartRestaurantMismatch(cart.restaurant_id)
+            
+            lines = {line.id: line for line in cart.items}
+            quantity += lines[menu_item.id].quantity if menu_item.id in lines else 0
+            lines[menu_item.id] = _line(menu_item.id, menu_item.name, menu_item.price, quantity)
+            cart = build_cart(menu_item.restaurant_id, lines.values())
+            self._save(customer_id, cart)
+            return cart
+    
+    def set_quantity(self, customer_id, menu_item_id, quantity):
+        """Set the quantity of a line already in the cart; zero removes it."""
+        with self._customer_lock(customer_id):
+            cart = self.backend.load(customer_id)
+            lines = []
+            for line in cart.items:
+                if line.id == menu_item_id:
+                    line = _line(line.id, line.name, line.price, quantity)
+                lines.append(line)
+            cart = build_cart(cart.restaurant_id, lines)
+            self._save(customer_id, cart)
+            return cart
+    
+    def replace(self, customer_id, summary):
+        """Replace the cart with freshly priced checkout lines."""
+        cart = build_cart(summary.restaurant_id, summary.items)
+        with self._customer_lock(customer_id):
+            self._save(customer_id, cart)
+        return cart
+    
+    def clear(self, customer_id):
+        """Empty a customer's cart."""
+        with self._customer_lock(customer_id):
+            self._save(customer_id, EMPTY_STORED_CART)
+
+def init_app(app):
+    """Attach the cart store to the application."""
+    app.config.setdefault('CART_BACKEND', 'sql')
+    backend = CART_BACKENDS[app.config['CART_BACKEND']]()
+    app.extensions['cart_store'] = CartStore(backend)
+    
+    @app.context_processor
+    def inject_cart_totals():
+        return {'cart_totals': current_cart_totals}
+
+def get_cart_store():
+    """Get the cart store for the current app."""
+    return current_app.extensions['cart_store']
+
+def current_cart_totals():
+    """Get the logged in customer's cart totals, once per request.
+
+    Exposed to templates for the cart badge; anyone other than a customer
+    gets an empty cart.
+    """
+    if not has_app_context() or not current_user.is_authenticated or not current_user.is_customer():
+        return EMPTY_TOTALS
+    if '_cart_totals' not in g:
+        profile = current_user.customer_profile
+        g._cart_totals = get_cart_store().totals(profile.id) if profile else EMPTY_TOTALS
+    return g._cart_totals
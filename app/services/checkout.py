@@ -0,0 +1,102 @@
+"""Set-based cart pricing and checkout."""
+
+import logging
+from collections import namedtuple
+
+from sqlalchemy import insert
+
+from app import db
+from app.models.menu import MenuItem
+from app.models.order import STATUS_PENDING, Order, OrderItem, format_items_summary
+from app.models.restaurant import Restaurant
+from app.services.order_counters import record_order
+from app.services.order_timing import record_status_change
+from app.services.sales_rollup import record_sale
+from app.services.write_queue import run_write
+
+logger = logging.getLogger(__name__)
+
+CartLine = namedtuple('CartLine', ['id', 'name', 'price', 'quantity', 'subtotal'])
+
+class CartSummary(namedtuple('CartSummary', [
+    'items', 'total', 'restaurant_id', 'restaurant_name', 'owner_id'
+])):
+    """Priced cart lines plus the restaurant they come from."""
+    __slots__ = ()
+    
+    def as_dicts(self):
+        """Cart lines as dicts, as the cart template expects."""
+        return [line._asdict() for line in self.items]
+
+EMPTY_CART = CartSummary([], 0, None, None, None)
+
+def price_cart(cart):
+    """Price a {menu_item_id: quantity} cart with a single SELECT.
+
+    Lines whose menu item no longer exists are dropped.
+    """
+    quantities = {int(item_id): int(quantity) for item_id, quantity in cart.items()}
+    quantities = {item_id: quantity for item_id, quantity in quantities.items() if quantity > 0}
+    if not quantities:
+        return EMPTY_CART
+    
+    rows = db.session.query(
+        MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.restaurant_id,
+        Restaurant.name, Restaurant.owner_id
+    ).join(Restaurant, Restaurant.id == MenuItem.restaurant_id)\
+        .filter(MenuItem.id.in_(quantities))\
+        .order_by(MenuItem.id)\
+        .all()
+    if not rows:
+        return EMPTY_CART
+    
+    items = [
+        CartLine(item_id, name, price, quantities[item_id], price * quantities[item_id])
+        for item_id, name, price, _, _, _ in rows
+    ]
+    _, _, _, restaurant_id, restaurant_name, owner_id = rows[0]
+    return CartSummary(items, sum(line.subtotal for line in items),
+                       restaurant_id, restaurant_name, owner_id)
+
+def place_order(customer_id, summary):
+    """Turn a priced cart into an order in one short transaction.
+
+    One INSERT ... RETURNING creates the order, one executemany INSERT
+    writes all its lines, the customer's cart is emptied, then the
+    transaction commits; through the group-commit writer when it is
+    enabled. The order and the emptied cart commit together, so a failure
+    never leaves a placed order in a cart that could be submitted again.
+    Daily dish counters go to the write-behind buffer, which applies them
+    as one batched UPDATE.
+    """
+    order_id = run_write(insert_order, customer_id, summary)
+    
+    for line in summary.items:
+        record_order(line.id, line.quantity)
+    return db.session.get(Order, order_id)
+
+def insert_order(customer_id, summary):
+    """Write unit inserting an order and its lines and emptying the cart; returns the order id."""
+    # Imported here: the cart store builds on this module's CartLine.
+    from app.services.cart_store import get_cart_store
+    
+    order_id, created_at = db.session.execute(
+        insert(Order).returning(Order.id, Order.created_at),
+        [{
+            'customer_id': customer_id,
+            'restaurant_id': summary.restaurant_id,
+            'status': STATUS_PENDING,
+            'total_amount': summary.total,
+            'item_count': sum(line.quantity for line in summary.items),
+            'items_summary': format_items_summary((line.quantity, line.name) for line in summary.items),
+        }]
+    ).one()
+    db.session.execute(insert(OrderItem), [
+        {'order_id': order_id, 'menu_item_id': line.id, 'quantity': line.quantity, 'price': line.price}
+        for line in summary.items
+    ])
+    record_status_change(order_id, summary.restaurant_id, None, STATUS_PENDING, at=created_at)
+    record_sale(summary.restaurant_id, created_at, summary.total,
+                [(line.id, line.quantity) for line in summary.items])
+    get_cart_store().clear(customer_id)
+    return order_id
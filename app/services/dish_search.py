@@ -0,0 +1,314 @@
+"""In-memory inverted index for city-wide dish search with facet filtering.
+
+Every menu item gets a dense position, assigned in (price, id) order so a
+price range is a contiguous run of positions. Words from dish names and
+descriptions map to postings: sorted position arrays for rare words,
+bitsets (Python ints) for common ones. Facets (dietary flags, category,
+cuisine) are precomputed bitsets, so filters intersect with a few
+big-integer ANDs instead of SQL LIKE scans.
+
+The index is built per process from one query. A commit that changed menu
+items or restaurants marks it stale, as does age past
+DISH_SEARCH_INDEX_MAX_AGE seconds (to pick up other workers' writes). The
+next search then starts a rebuild on a background thread and is answered
+from the old index; the new one is swapped in when it is ready. Only the
+very first search waits for a build.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.menu import MenuItem
+from app.models.restaurant import Restaurant
+
+logger = logging.getLogger(__name__)
+
+DIETARY_FACETS = ('vegetarian', 'vegan', 'guilt_free')
+
+# Prefix lookups whose bitsets are memoized per index.
+WORD_CACHE_SIZE = 1024
+
+_NONZERO_BYTE = re.compile(b'[^\x00]')
+
+def tokenize(text):
+    """Split text into lowercase search words."""
+    return re.findall(r'\w+', (text or '').lower(), re.UNICODE)
+
+def _bitset(positions, size):
+    """Build a bitset int from an iterable of positions."""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+def _positions(bits, size, limit=None):
+    """Yield set positions of a bitset in ascending order."""
+    data = bits.to_bytes((size + 7) // 8, 'little')
+    found = 0
+    for match in _NONZERO_BYTE.finditer(data):
+        byte_index = match.start()
+        value = data[byte_index]
+        for bit in range(8):
+            if value >> bit & 1:
+                yield (byte_index << 3) + bit
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+class DishIndex:
+    """Immutable inverted index over a snapshot of all menu items."""
+    
+    def __init__(self, rows):
+        # rows: (id, name, description, price, category, is_vegetarian,
+        #        is_vegan, is_guilt_free, cuisines_json), sorted by (price, id).
+        self.size = len(rows)
+        self.ids = array('q', (row[0] for row in rows))
+        self.prices = [row[3] for row in rows]
+        self.built_at = time.monotonic()
+        
+        postings = {}
+        name_postings = {}
+        categories = {}
+        cuisines = {}
+        flags = {facet: [] for facet in DIETARY_FACETS}
+        for position, row in enumerate(rows):
+            _, name, description, _, category, is_veg, is_vegan, is_guilt_free, cuisines_json = row
+            name_words = set(tokenize(name))
+            for word in name_words:
+                name_postings.setdefault(word, []).append(position)
+            for word in name_words.union(tokenize(description)):
+                postings.setdefault(word, []).append(position)
+            if category:
+                categories.setdefault(category, []).append(position)
+            for cuisine in _parse_cuisines(cuisines_json):
+                cuisines.setdefault(cuisine, []).append(position)
+            for facet, value in zip(DIETARY_FACETS, (is_veg, is_vegan, is_guilt_free)):
+                if value:
+                    flags[facet].append(position)
+        
+        self.postings = {word: self._compact(p) for word, p in postings.items()}
+        self.name_postings = {word: self._compact(p) for word, p in name_postings.items()}
+        self._word_cache = {}
+        self.vocabulary = sorted(self.postings)
+        self.categories = {key: _bitset(p, self.size) for key, p in categories.items()}
+        self.cuisines = {key: _bitset(p, self.size) for key, p in cuisines.items()}
+        self.flags = {key: _bitset(p, self.size) for key, p in flags.items()}
+        self.all_bits = (1 << self.size) - 1
+    
+    def search(self, text=None, min_price=None, max_price=None, dietary=(),
+               categories=(), cuisines=(), offset=0, limit=20):
+        """Search dishes; returns a dict with ids, total and facet counts.
+
+        Each word matches as a prefix; all words must match. Within a
+        facet, selected values are OR-ed; across facets they are AND-ed.
+        Text results list name matches first, then cheapest first.
+        """
+        matched = self.all_bits & self._price_mask(min_price, max_price)
+        for facet in dietary:
+            matched &= self.flags.get(facet, 0)
+        if categories:
+            matched &= self._union(self.categories, categories)
+        if cuisines:
+            matched &= self._union(self.cuisines, cuisines)
+        
+        words = tokenize(text)
+        name_matched = None
+        for word in words:
+            matched &= self._word_bits(self.postings, word)
+            if matched:
+                word_in_name = self._word_bits(self.name_postings, word)
+                name_matched = word_in_name if name_matched is None else name_matched & word_in_name
+        
+        if words and name_matched:
+            # Rank dishes whose name matches every word ahead of the rest.
+            first = matched & name_matched
+            positions = list(_positions(first, self.size, offset + limit))
+            if len(positions) < offset + limit:
+                positions += _positions(matched & ~first, self.size,
+                                        offset + limit - len(positions))
+        else:
+            positions = list(_positions(matched, self.size, offset + limit))
+        
+        return {
+            'ids': [self.ids[p] for p in positions[offset:offset + limit]],
+            'total': matched.bit_count(),
+            'facets': {
+                'dietary': self._counts(self.flags, matched),
+                'categories': self._counts(self.categories, matched),
+                'cuisines': self._counts(self.cuisines, matched),
+            },
+        }
+    
+    def _price_mask(self, min_price, max_price):
+        """Bitset of positions whose price falls in [min_price, max_price]."""
+        low = bisect_left(self.prices, min_price) if min_price is not None else 0
+        high = bisect_right(self.prices, max_price) if max_price is not None else self.size
+        if high <= low:
+            return 0
+        return ((1 << high) - 1) ^ ((1 << low) - 1)
+    
+    def _compact(self, positions):
+        """Store a posting as a bitset when that is smaller than an id array."""
+        if len(positions) * 32 > self.size:
+            return _bitset(positions, self.size)
+        return array('I', positions)
+    
+    def _word_bits(self, postings, word):
+        """Bitset of positions containing any indexed word starting with word."""
+        key = (postings is self.name_postings, word)
+        bits = self._word_cache.get(key)
+        if bits is not None:
+            return bits
+        
+        start = bisect_left(self.vocabulary, word)
+        end = bisect_left(self.vocabulary, word + '\uffff', start)
+        bits = 0
+        sparse = []
+        for term in self.vocabulary[start:end]:
+            posting = postings.get(term)
+            if isinstance(posting, int):
+                bits |= posting
+            elif posting is not None:
+                sparse.append(posting)
+        if sparse:
+            bits |= _bitset((p for posting in sparse for p in posting), self.size)
+        
+        if len(self._word_cache) >= WORD_CACHE_SIZE:
+            self._word_cache.clear()
+        self._word_cache[key] = bits
+        return bits
+    
+    @staticmethod
+    def _union(bitsets, keys):
+        bits = 0
+        for key in keys:
+            bits |= bitsets.get(key, 0)
+        return bits
+    
+    @staticmethod
+    def _counts(bitsets, matched):
+        return {key: (bits & matched).bit_count() for key, bits in sorted(bitsets.items())}
+
+def _parse_cuisines(cuisines_json):
+    """Parse a restaurant's JSON cuisines column."""
+    try:
+        data = json.loads(cuisines_json) if cuisines_json else []
+    except ValueError:
+        return []
+    return [c for c in data if isinstance(c, str) and c.strip()] if isinstance(data, list) else []
+
+def build_index():
+    """Build a DishIndex from the current database in one query."""
+    rows = db.session.query(
+        MenuItem.id, MenuItem.name, MenuItem.description, MenuItem.price,
+        MenuItem.category, MenuItem.is_vegetarian, MenuItem.is_vegan,
+        MenuItem.is_guilt_free, Restaurant.cuisines
+    ).join(Restaurant, MenuItem.restaurant_id == Restaurant.id)\
+        .order_by(MenuItem.price, MenuItem.id).all()
+    return DishIndex(rows)
+
+class DishSearchIndex:
+    """Per-app holder that rebuilds the DishIndex in the background when it goes stale."""
+    
+    def __init__(self, app, max_age):
+        self.app = app
+        self.max_age = max_age
+        self._index = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def get(self):
+        """Get the current index, starting a background rebuild if it is stale.
+
+        Only the first call, with no index yet, builds in the calling thread.
+        """
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._rebuild()
+            return self._index
+        if self._stale or time.monotonic() - index.built_at >= self.max_age:
+            self._start_rebuild()
+        return index
+    
+    def invalidate(self):
+        """Mark the index stale so the next search starts a rebuild."""
+        self._stale = True
+    
+    def wait(self, timeout=None):
+        """Wait for a background rebuild in progress to finish."""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _start_rebuild(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='dish-search-rebuild', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        try:
+            with self.app.app_context():
+                self._rebuild()
+        except Exception as e:
+            self._stale = True
+            logger.warning(f"Dish search index rebuild failed: {e}")
+    
+    def _rebuild(self):
+        # Cleared before reading, so a commit landing during the build marks
+        # the new index stale again.
+        self._stale = False
+        started = time.monotonic()
+        index = build_index()
+        self._index = index
+        logger.info(f"Dish search index built: {index.size} dishes "
+                    f"in {(time.monotonic() - started) * 1000:.1f}ms")
+
+def init_app(app):
+    """Attach the dish search index holder to the application."""
+    app.config.setdefault('DISH_SEARCH_INDEX_MAX_AGE', 300)
+    app.extensions['dish_search'] = DishSearchIndex(app, app.config['DISH_SEARCH_INDEX_MAX_AGE'])
+
+def search_dishes(**kwargs):
+    """Search all dishes in the current app's index; see DishIndex.search."""
+    return current_app.extensions['dish_search'].get().search(**kwargs)
+
+def invalidate_index():
+    """Mark the current app's dish index stale."""
+    if has_app_context():
+        holder = current_app.extensions.get('dish_search')
+        if holder is not None:
+            holder.invalidate()
+
+_INDEXED_MODELS = (MenuItem, Restaurant)
+
+@event.listens_for(Session, 'after_flush')
+def _note_indexed_changes(session, flush_context):
+    """Remember that this transaction wrote menu items or restaurants."""
+    if any(isinstance(obj, _INDEXED_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['dish_search_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    """Mark the index stale once those writes are committed and visible to a rebuild."""
+    if session.info.pop('dish_search_changed', False):
+        invalidate_index()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_changes(session):
+    session.info.pop('dish_search_changed', None)
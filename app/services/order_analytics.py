@@ -0,0 +1,247 @@
+"""Demand and basket analytics for the owner reports page.
+
+Covers hour-of-week demand, basket-size percentiles and item co-purchase
+rates over the last ANALYTICS_DAYS days. Order and line columns are pulled
+in bulk with two queries and reduced per UTC day. With NumPy installed the
+reductions are vectorized: bincount for hours and basket sizes, and an
+order-by-item incidence matrix product for pair counts. Without it the same
+results come from plain Python counters.
+
+Per-day results are cached per (restaurant, day) for ANALYTICS_CACHE_TTL
+seconds, so a report only recomputes today and days it has not seen yet.
+Today is never cached; a cancellation on an earlier day shows up once that
+day's entry expires.
+"""
+
+import logging
+import math
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from itertools import combinations
+
+from flask import current_app
+from sqlalchemy import Integer, cast, func, select
+
+from app import db
+from app.models.menu import MenuItem
+from app.models.order import STATUS_CANCELLED, Order, OrderItem
+from app.utils.cache import TTLCache
+
+try:
+    import numpy as np
+except ImportError:  # Optional: analytics fall back to pure Python.
+    np = None
+
+logger = logging.getLogger(__name__)
+
+BASKET_PERCENTILES = (50, 90, 99)
+TOP_PAIRS = 5
+WEEKDAY_LABELS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+# One restaurant's orders on one day: order count, orders per hour (24),
+# {items per order: orders}, {menu_item_id: orders containing it} and
+# {(lower id, higher id): orders containing both}.
+DayStats = namedtuple('DayStats', ['orders', 'hours', 'basket_sizes', 'items', 'pairs'])
+
+CoPurchase = namedtuple('CoPurchase', ['first', 'second', 'orders', 'rate', 'attach_rate'])
+
+OrderAnalytics = namedtuple('OrderAnalytics', [
+    'days', 'orders', 'heatmap', 'peak', 'basket_percentiles', 'mean_basket', 'pairs'
+])
+
+def init_app(app):
+    """Attach the per-restaurant, per-day analytics cache to the application."""
+    app.config.setdefault('ANALYTICS_DAYS', 28)
+    app.config.setdefault('ANALYTICS_CACHE_TTL', 3600)
+    app.extensions['order_analytics_cache'] = TTLCache(app.config['ANALYTICS_CACHE_TTL'])
+
+def _load_columns(restaurant_id, first_day, last_day):
+    """Pull (order id, day, hour, item count) per order and (order id, menu item id) per distinct line."""
+    window = (
+        Order.restaurant_id == restaurant_id,
+        Order.status != STATUS_CANCELLED,
+        Order.created_at >= datetime.combine(first_day, time.min),
+        Order.created_at < datetime.combine(last_day + timedelta(days=1), time.min),
+    )
+    orders = db.session.execute(select(
+        Order.id,
+        func.date(Order.created_at),
+        cast(func.strftime('%H', Order.created_at), Integer),
+        Order.item_count
+    ).where(*window)).all()
+    lines = db.session.execute(
+        select(OrderItem.order_id, OrderItem.menu_item_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*window)
+        .distinct()
+    ).all()
+    return orders, lines
+
+def _day_stats_python(days, orders, lines):
+    """Reduce order and line rows to {day: DayStats} with plain Python counters."""
+    day_keys = {day.isoformat(): day for day in days}
+    orders_by_day = Counter()
+    hours = {day: [0] * 24 for day in days}
+    sizes = {day: Counter() for day in days}
+    order_day = {}
+    for order_id, day_key, hour, item_count in orders:
+        day = day_keys[day_key]
+        order_day[order_id] = day
+        orders_by_day[day] += 1
+        hours[day][hour] += 1
+        sizes[day][item_count] += 1
+    
+    baskets = defaultdict(list)
+    for order_id, menu_item_id in lines:
+        baskets[order_id].append(menu_item_id)
+    items = {day: Counter() for day in days}
+    pairs = {day: Counter() for day in days}
+    for order_id, basket in baskets.items():
+        day = order_day[order_id]
+        items[day].update(basket)
+        pairs[day].update(combinations(sorted(basket), 2))
+    
+    return {
+        day: DayStats(orders_by_day[day], hours[day], dict(sizes[day]), dict(items[day]), dict(pairs[day]))
+        for day in days
+    }
+
+def _day_stats_numpy(days, orders, lines):
+    """Reduce order and line rows to {day: DayStats} with vectorized NumPy operations."""
+    day_index = {day.isoformat(): n for n, day in enumerate(days)}
+    stats = {day: DayStats(0, [0] * 24, {}, {}, {}) for day in days}
+    if not orders:
+        return stats
+    
+    order_ids = np.fromiter((row[0] for row in orders), dtype=np.int64, count=len(orders))
+    order_day = np.fromiter((day_index[row[1]] for row in orders), dtype=np.int64, count=len(orders))
+    hours = np.fromiter((row[2] for row in orders), dtype=np.int64, count=len(orders))
+    sizes = np.fromiter((row[3] for row in orders), dtype=np.int64, count=len(orders))
+    
+    # One bincount over (day, hour) and one over (day, basket size) cover every day.
+    order_counts = np.bincount(order_day, minlength=len(days))
+    hour_counts = np.bincount(order_day * 24 + hours, minlength=len(days) * 24).reshape(len(days), 24)
+    width = int(sizes.max()) + 1
+    size_counts = np.bincount(order_day * width + sizes, minlength=len(days) * width).reshape(len(days), width)
+    
+    # Map each line to its order's row, then its day.
+    if lines:
+        line_orders = np.fromiter((row[0] for row in lines), dtype=np.int64, count=len(lines))
+        line_items = np.fromiter((row[1] for row in lines), dtype=np.int64, count=len(lines))
+        sorter = np.argsort(order_ids)
+        line_rows = sorter[np.searchsorted(order_ids, line_orders, sorter=sorter)]
+        line_day = order_day[line_rows]
+    
+    for n, day in enumerate(days):
+        items, pairs = {}, {}
+        if lines:
+            selected = line_day == n
+            if selected.any():
+                # Orders x items incidence matrix; its Gram matrix counts item
+                # pairs off the diagonal and single items on it. float64 keeps
+                # the product on BLAS and is exact for any realistic count.
+                rows, row_index = np.unique(line_rows[selected], return_inverse=True)
+                item_ids, item_index = np.unique(line_items[selected], return_inverse=True)
+                incidence = np.zeros((len(rows), len(item_ids)))
+                incidence[row_index, item_index] = 1
+                together = (incidence.T @ incidence).astype(np.int64)
+                items = dict(zip(item_ids.tolist(), np.diag(together).tolist()))
+                first, second = np.triu_indices(len(item_ids), 1)
+                counts = together[first, second]
+                found = counts > 0
+                pairs = dict(zip(
+                    zip(item_ids[first[found]].tolist(), item_ids[second[found]].tolist()),
+                    counts[found].tolist()
+                ))
+        
+        basket_sizes = {size: count for size, count in enumerate(size_counts[n].tolist()) if count}
+        stats[day] = DayStats(int(order_counts[n]), hour_counts[n].tolist(), basket_sizes, items, pairs)
+    return stats
+
+def compute_day_stats(restaurant_id, days):
+    """Compute DayStats for a list of days with two bulk queries."""
+    if not days:
+        return {}
+    orders, lines = _load_columns(restaurant_id, min(days), max(days))
+    # The range may span cached days; keep only the ones asked for.
+    if len(days) < (max(days) - min(days)).days + 1:
+        keys = {day.isoformat() for day in days}
+        orders = [row for row in orders if row[1] in keys]
+    # The two reads do not share a snapshot, so drop lines of orders placed
+    # or cancelled between them, as well as those of skipped days.
+    kept = {row[0] for row in orders}
+    lines = [row for row in lines if row[0] in kept]
+    reduce = _day_stats_numpy if np is not None else _day_stats_python
+    return reduce(days, orders, lines)
+
+def cached_day_stats(restaurant_id, days, today):
+    """Get DayStats for days, computing only days missing from the cache."""
+    cache = current_app.extensions['order_analytics_cache']
+    stats = {}
+    for day in days:
+        cached = cache.get((restaurant_id, day)) if day < today else None
+        if cached is not None:
+            stats[day] = cached
+    
+    missing = [day for day in days if day not in stats]
+    for day, day_stats in compute_day_stats(restaurant_id, missing).items():
+        stats[day] = day_stats
+        if day < today:
+            cache.set((restaurant_id, day), day_stats)
+    return stats
+
+def basket_percentile(sizes, q):
+    """Nearest-rank q-th percentile from {basket size: orders}; None when empty."""
+    total = sum(sizes.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(q / 100 * total))
+    seen = 0
+    for size in sorted(sizes):
+        seen += sizes[size]
+        if seen >= rank:
+            return size
+
+def order_analytics(restaurant_id, today=None):
+    """Get hour-of-week demand, basket percentiles and top co-purchases for a restaurant."""
+    today = today or datetime.utcnow().date()
+    days = [today - timedelta(days=n) for n in range(current_app.config['ANALYTICS_DAYS'] - 1, -1, -1)]
+    per_day = cached_day_stats(restaurant_id, days, today)
+    
+    # Merge the per-day results; this is O(days), not O(orders).
+    heatmap = [[0] * 24 for _ in WEEKDAY_LABELS]
+    orders = 0
+    sizes, items, pairs = Counter(), Counter(), Counter()
+    for day, stats in per_day.items():
+        row = heatmap[day.weekday()]
+        for hour, count in enumerate(stats.hours):
+            row[hour] += count
+        orders += stats.orders
+        sizes.update(stats.basket_sizes)
+        items.update(stats.items)
+        pairs.update(stats.pairs)
+    
+    top_pairs = sorted(pairs.items(), key=lambda pair: (-pair[1], pair[0]))[:TOP_PAIRS]
+    names = dict(db.session.query(MenuItem.id, MenuItem.name)
+                 .filter(MenuItem.id.in_({i for pair, _ in top_pairs for i in pair})).all()) if top_pairs else {}
+    co_purchases = []
+    for (low, high), count in top_pairs:
+        # Lead with the more popular item: "of orders with it, x% also had the other".
+        first, second = (low, high) if (items[low], -low) >= (items[high], -high) else (high, low)
+        co_purchases.append(CoPurchase(
+            names.get(first, f'#{first}'),
+            names.get(second, f'#{second}'),
+            count,
+            count / orders,
+            count / items[first]
+        ))
+    
+    return OrderAnalytics(
+        len(days),
+        orders,
+        heatmap,
+        max(max(row) for row in heatmap),
+        {q: basket_percentile(sizes, q) for q in BASKET_PERCENTILES},
+        sum(size * count for size, count in sizes.items()) / orders if orders else None,
+        co_purchases
+    )
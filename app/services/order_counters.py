@@ -0,0 +1,138 @@
+"""Write-behind aggregator for daily dish order counters."""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, case, or_, update
+
+from app import db
+from app.utils.periodic import PeriodicThread
+
+logger = logging.getLogger(__name__)
+
+class OrderCounterBuffer(PeriodicThread):
+    """Per-app buffer of pending daily order count increments.
+
+    Increments are kept in memory and written to menu_items in one batched
+    UPDATE by a background thread, every flush interval or as soon as
+    enough events have accumulated, so checkouts never wait for it.
+    """
+    
+    thread_name = 'order-counter-flush'
+    
+    def __init__(self, app):
+        super().__init__(app.config['ORDER_COUNTER_FLUSH_INTERVAL'])
+        self.app = app
+        self.flush_events = app.config['ORDER_COUNTER_FLUSH_EVENTS']
+        self._pending = defaultdict(int)  # (menu_item_id, day) -> quantity.
+        self._inflight = {}  # The batch being written, until its commit lands.
+        self._events = 0
+        self._counts_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+    
+    def add(self, menu_item_id, quantity=1):
+        """Record an order of quantity units of a menu item."""
+        today = datetime.utcnow().date()
+        with self._counts_lock:
+            self._pending[(menu_item_id, today)] += quantity
+            self._events += 1
+            should_flush = self._events >= self.flush_events
+        
+        self.start()
+        if not should_flush:
+            return
+        if self._thread is None or self._stop.is_set():
+            # No flush thread (a zero interval, or stopped): write inline.
+            self.flush()
+        else:
+            self.wake()
+    
+    def pending(self, menu_item_id):
+        """Get today's not yet flushed quantity for a menu item."""
+        key = (menu_item_id, datetime.utcnow().date())
+        with self._counts_lock:
+            return self._pending.get(key, 0) + self._inflight.get(key, 0)
+    
+    def flush(self):
+        """Write all pending increments in a single batched UPDATE."""
+        with self._flush_lock:
+            with self._counts_lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = defaultdict(int)
+                self._inflight = batch
+                self._events = 0
+            
+            params = [
+                {'b_id': item_id, 'b_day': day, 'b_quantity': quantity}
+                for (item_id, day), quantity in batch.items()
+            ]
+            try:
+                # A fresh app context gives the flush its own session.
+                with self.app.app_context():
+                    db.session.execute(_increment_statement(), params)
+                    db.session.commit()
+            except Exception as e:
+                logger.error(f"Order counter flush failed, will retry: {e}")
+                with self._counts_lock:
+                    self._inflight = {}
+                    for key, quantity in batch.items():
+                        self._pending[key] += quantity
+                        self._events += 1
+                return 0
+            with self._counts_lock:
+                self._inflight = {}
+            return len(params)
+    
+    def run_once(self):
+        """Flush once; called by the flush thread."""
+        self.flush()
+    
+    def stop(self, timeout=5):
+        """Stop the flush thread and write out anything still pending."""
+        super().stop(timeout)
+        self.flush()
+
+def _increment_statement():
+    """Build the batched increment UPDATE for menu_items."""
+    from app.models.menu import MenuItem
+    
+    table = MenuItem.__table__
+    return update(table).where(
+        table.c.id == bindparam('b_id'),
+        # Never let a late flush of yesterday's counts clobber today's.
+        or_(table.c.last_order_date.is_(None),
+            table.c.last_order_date <= bindparam('b_day'))
+    ).values(
+        times_ordered_today=case(
+            (table.c.last_order_date == bindparam('b_day'),
+             table.c.times_ordered_today + bindparam('b_quantity')),
+            else_=bindparam('b_quantity')
+        ),
+        last_order_date=bindparam('b_day')
+    )
+
+def init_app(app):
+    """Attach an order counter buffer to the application."""
+    app.config.setdefault('ORDER_COUNTER_FLUSH_INTERVAL', 5)
+    app.config.setdefault('ORDER_COUNTER_FLUSH_EVENTS', 50)
+    app.extensions['order_counter'] = OrderCounterBuffer(app)
+
+def get_order_counter():
+    """Get the order counter buffer for the current app, if any."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('order_counter')
+
+def record_order(menu_item_id, quantity=1):
+    """Buffer a daily order count increment for a menu item."""
+    get_order_counter().add(menu_item_id, quantity)
+
+def pending_order_count(menu_item_id):
+    """Get today's buffered, not yet flushed order count for a menu item."""
+    counter = get_order_counter()
+    return counter.pending(menu_item_id) if counter else 0
@@ -0,0 +1,393 @@
+"""Live order events for Server-Sent Events streams.
+
+Events are published to channels ('restaurant:<id>' and 'order:<id>') and
+kept in a bounded in-memory backlog, so a reconnecting EventSource resumes
+after its Last-Event-ID. When ORDER_EVENTS_SPOOL names a file, publishers
+append events to it and every worker process tails it, so all workers
+stream the same events under the same ids.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+from flask import Response, current_app, has_app_context, request
+
+from app.utils.periodic import PeriodicThread
+
+try:
+    import fcntl
+except ImportError:  # Windows: spool fan-out is unavailable.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+OrderEvent = namedtuple('OrderEvent', ['id', 'type', 'channels', 'data'])
+
+# Fixed-width spool header holding the id offset of the current file.
+SPOOL_HEADER = b'#base=%020d\n'
+SPOOL_HEADER_LEN = len(SPOOL_HEADER % 0)
+
+class OrderEventBroker:
+    """Bounded backlog of recent events that stream readers wait on."""
+    
+    def __init__(self, backlog):
+        self._events = deque(maxlen=backlog)
+        self._evicted_id = 0  # Highest id no longer in the backlog.
+        self._last_id = 0
+        self._cond = threading.Condition()
+    
+    @property
+    def last_id(self):
+        """Id of the newest delivered event."""
+        with self._cond:
+            return self._last_id
+    
+    def reset(self, last_id):
+        """Start numbering after last_id, as if everything before was seen."""
+        with self._cond:
+            self._events.clear()
+            self._evicted_id = self._last_id = last_id
+    
+    def deliver(self, event):
+        """Add an event to the backlog and wake waiting readers."""
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self._evicted_id = self._events[0].id
+            self._events.append(event)
+            self._last_id = event.id
+            self._cond.notify_all()
+    
+    def wait(self, after_id, channels, timeout):
+        """Wait up to timeout seconds for events after after_id on channels.
+
+        Returns (events, complete); complete is False when events after
+        after_id have already left the backlog or were never seen here.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if after_id < self._evicted_id or after_id > self._last_id:
+                    return [], False
+                events = self._collect(after_id, channels)
+                if events:
+                    return events, True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], True
+                self._cond.wait(remaining)
+    
+    def _collect(self, after_id, channels):
+        events = []
+        for event in reversed(self._events):
+            if event.id <= after_id:
+                break
+            if channels.intersection(event.channels):
+                events.append(event)
+        events.reverse()
+        return events
+
+class LocalTransport:
+    """Delivers events to this process only."""
+    
+    def __init__(self, broker):
+        self.broker = broker
+        self._lock = threading.Lock()
+        # Millisecond-based ids keep growing across restarts.
+        broker.reset(int(time.time() * 1000))
+    
+    def publish(self, event_type, channels, data):
+        with self._lock:
+            event = OrderEvent(self.broker.last_id + 1, event_type, tuple(channels), data)
+            self.broker.deliver(event)
+        return event.id
+    
+    def stop(self):
+        pass
+
+class SpoolTransport(PeriodicThread):
+    """Shares events between worker processes through an append-only file.
+
+    An event's id is the spool's base plus the file offset where its line
+    ends, so every process derives the same, increasing ids. Once the file
+    outgrows max_bytes it is moved to '<spool>.1' and a new file starts
+    with its base past the old end. Writers hold an exclusive flock and
+    tailers a shared one; the tail thread polls every poll_interval seconds.
+    """
+    
+    thread_name = 'order-events-tail'
+    
+    def __init__(self, broker, path, poll_interval, max_bytes):
+        super().__init__(poll_interval)
+        self.broker = broker
+        self.path = path
+        self.max_bytes = max_bytes
+        self._partial = b''
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._locked_spool() as spool:
+            base = _read_base(spool)
+            end = spool.seek(0, os.SEEK_END)
+        # New processes stream from now on; the backlog fills as events arrive.
+        self._base, self._position = base, end
+        broker.reset(base + end)
+        self.start()
+    
+    def publish(self, event_type, channels, data):
+        line = json.dumps({'type': event_type, 'channels': list(channels), 'data': data},
+                          separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._locked_spool() as spool:
+            base = _read_base(spool)
+            end = spool.seek(0, os.SEEK_END)
+            if end > SPOOL_HEADER_LEN and end + len(line) > self.max_bytes:
+                self._rotate(base + end)
+                return self.publish(event_type, channels, data)
+            spool.write(line)
+            spool.flush()
+        return base + end + len(line)
+    
+    @contextmanager
+    def _locked_spool(self):
+        """Open the current spool under an exclusive lock, creating it if needed."""
+        while True:
+            if not os.path.exists(self.path):
+                self._install(0)
+            try:
+                spool = open(self.path, 'rb+')
+            except FileNotFoundError:
+                continue
+            with spool:
+                fcntl.flock(spool, fcntl.LOCK_EX)
+                try:
+                    # The file may have been rotated while we waited for the lock.
+                    if os.fstat(spool.fileno()).st_ino != os.stat(self.path).st_ino:
+                        continue
+                    yield spool
+                    return
+                finally:
+                    fcntl.flock(spool, fcntl.LOCK_UN)
+    
+    def _install(self, base):
+        """Atomically put a fresh spool holding only its header at path."""
+        temp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as temp:
+            temp.write(SPOOL_HEADER % base)
+        if base == 0:
+            try:
+                # Never replace a spool another process created meanwhile.
+                os.link(temp_path, self.path)
+            except FileExistsError:
+                pass
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, self.path)
+    
+    def _rotate(self, base):
+        """Keep the full spool as '<spool>.1' and start a new one at base."""
+        previous = f'{self.path}.1'
+        if os.path.exists(previous):
+            os.remove(previous)
+        os.link(self.path, previous)
+        self._install(base)
+    
+    def run_once(self):
+        self.poll()
+    
+    def poll(self):
+        """Deliver every complete event line appended since the last poll."""
+        with open(self.path, 'rb') as spool:
+            fcntl.flock(spool, fcntl.LOCK_SH)
+            try:
+                base = _read_base(spool)
+                if base != self._base:
+                    # Rotated: finish the previous file, then start the new one.
+                    drained = self._drain(f'{self.path}.1')
+                    self._base, self._position, self._partial = base, SPOOL_HEADER_LEN, b''
+                    if not drained:
+                        # A whole file went by unread; readers must resync.
+                        logger.warning("Order event spool rotated past this worker; resetting streams")
+                        self.broker.reset(base + SPOOL_HEADER_LEN)
+                self._drain_open(spool)
+            finally:
+                fcntl.flock(spool, fcntl.LOCK_UN)
+    
+    def _drain(self, path):
+        """Read the rest of a rotated spool; False if it is not the one we were on."""
+        try:
+            with open(path, 'rb') as spool:
+                if _read_base(spool) != self._base:
+                    return False
+                self._drain_open(spool)
+                return True
+        except FileNotFoundError:
+            return False
+    
+    def _drain_open(self, spool):
+        spool.seek(self._position)
+        chunk = spool.read()
+        if not chunk:
+            return
+        
+        offset = self._position - len(self._partial)
+        data = self._partial + chunk
+        self._position += len(chunk)
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        for line in lines:
+            offset += len(line) + 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping malformed order event at offset {offset}")
+                continue
+            self.broker.deliver(OrderEvent(
+                self._base + offset, record['type'], tuple(record['channels']), record['data']
+            ))
+
+def _read_base(spool):
+    """Read the id base from a spool's header."""
+    spool.seek(0)
+    header = spool.read(SPOOL_HEADER_LEN)
+    if len(header) < SPOOL_HEADER_LEN or not header.startswith(b'#base='):
+        raise ValueError(f"Invalid order event spool header: {header!r}")
+    return int(header[6:-1])
+
+def init_app(app):
+    """Attach the order event broker and its transport to the application."""
+    app.config.setdefault('ORDER_EVENTS_BACKLOG', 1000)
+    app.config.setdefault('ORDER_EVENTS_HEARTBEAT', 15)
+    app.config.setdefault('ORDER_EVENTS_STREAM_TIMEOUT', 300)
+    app.config.setdefault('ORDER_EVENTS_SPOOL', None)
+    app.config.setdefault('ORDER_EVENTS_SPOOL_POLL_INTERVAL', 0.25)
+    app.config.setdefault('ORDER_EVENTS_SPOOL_MAX_BYTES', 8 * 1024 * 1024)
+    
+    broker = OrderEventBroker(app.config['ORDER_EVENTS_BACKLOG'])
+    spool = app.config['ORDER_EVENTS_SPOOL']
+    if spool and fcntl is None:
+        logger.warning("ORDER_EVENTS_SPOOL needs fcntl; order events stay in-process")
+        spool = None
+    if spool:
+        transport = SpoolTransport(broker, spool,
+                                   app.config['ORDER_EVENTS_SPOOL_POLL_INTERVAL'],
+                                   app.config['ORDER_EVENTS_SPOOL_MAX_BYTES'])
+    else:
+        transport = LocalTransport(broker)
+    app.extensions['order_events'] = transport
+
+def get_order_events():
+    """Get the order event transport for the current app, if any."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('order_events')
+
+def restaurant_channel(restaurant_id):
+    """Channel carrying every order event for a restaurant."""
+    return f'restaurant:{restaurant_id}'
+
+def order_channel(order_id):
+    """Channel carrying one order's events."""
+    return f'order:{order_id}'
+
+def publish_order_event(event_type, order, previous_status=None):
+    """Publish an order event to its restaurant's and its own channel."""
+    transport = get_order_events()
+    if transport is None:
+        return None
+    data = {
+        'order_id': order.id,
+        'restaurant_id': order.restaurant_id,
+        'status': order.status,
+        'status_display': order.status_display,
+        'previous_status': previous_status,
+        'total_amount': order.total_amount,
+    }
+    try:
+        return transport.publish(
+            event_type, [restaurant_channel(order.restaurant_id), order_channel(order.id)], data
+        )
+    except OSError as e:
+        # Live updates are best effort; the order itself is already saved.
+        logger.error(f"Failed to publish {event_type} for order #{order.id}: {e}")
+        return None
+
+def format_event(event_id=None, event_type=None, data=None, comment=None, retry=None):
+    """Format one text/event-stream message."""
+    lines = []
+    if comment is not None:
+        lines.append(f': {comment}')
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event_type is not None:
+        lines.append(f'event: {event_type}')
+    if data is not None:
+        lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def parse_last_event_id(value):
+    """Parse a Last-Event-ID header or query value, or None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def stream_events(channels, last_event_id=None):
+    """Build a generator of SSE messages for channels.
+
+    Replays backlog events after last_event_id, then waits for new ones,
+    sending a heartbeat comment when idle. The stream ends after
+    ORDER_EVENTS_STREAM_TIMEOUT seconds and the browser reconnects with its
+    Last-Event-ID. A 'reset' event tells the client it missed events and
+    should reload.
+    """
+    broker = current_app.extensions['order_events'].broker
+    heartbeat = current_app.config['ORDER_EVENTS_HEARTBEAT']
+    stream_timeout = current_app.config['ORDER_EVENTS_STREAM_TIMEOUT']
+    channels = set(channels)
+    
+    def generate():
+        deadline = time.monotonic() + stream_timeout
+        cursor = last_event_id
+        yield format_event(retry=3000, comment='connected')
+        if cursor is None:
+            cursor = broker.last_id
+            yield format_event(event_id=cursor, comment='start')
+    
+        while time.monotonic() < deadline:
+            wait = min(heartbeat, max(deadline - time.monotonic(), 0))
+            events, complete = broker.wait(cursor, channels, wait)
+            if not complete:
+                cursor = broker.last_id
+                yield format_event(event_id=cursor, event_type='reset', data={})
+                continue
+            if not events:
+                yield format_event(comment='heartbeat')
+                continue
+            for event in events:
+                yield format_event(event.id, event.type, event.data)
+            cursor = events[-1].id
+    
+    return generate()
+
+def event_stream_response(channels):
+    """Build a text/event-stream response for channels.
+
+    Resumes after the Last-Event-ID header sent by a reconnecting
+    EventSource, or a last_event_id query parameter on first connect.
+    """
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    )
+    return Response(
+        stream_events(channels, last_event_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # Disable proxy buffering (nginx).
+        }
+    )
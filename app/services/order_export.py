@@ -0,0 +1,135 @@
+"""Streaming order export for owners' accounting tools.
+
+Each restaurant's orders and their lines are read with one joined query
+through a server-side cursor (yield_per), walking the restaurant's
+(restaurant_id, created_at, id) index so nothing is sorted, and the
+per-restaurant streams are merged oldest first. Memory stays flat however
+long the history is. They are written out as CSV, one row per order line with the
+order's fields repeated, or as NDJSON, one object per order with its lines
+nested. gzip_chunks() compresses the stream on the fly for clients that
+accept it.
+"""
+
+import csv
+import heapq
+import io
+import json
+import zlib
+from datetime import datetime, time
+from itertools import groupby
+
+from sqlalchemy import select
+
+from app import db
+from app.models.menu import MenuItem
+from app.models.order import Order, OrderItem
+from app.models.restaurant import Restaurant
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# Rows fetched per round trip, and characters buffered before a chunk is sent.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+CSV_COLUMNS = [
+    'order_id', 'created_at', 'restaurant_id', 'restaurant', 'customer_id', 'status',
+    'total_amount', 'item_count', 'menu_item_id', 'item_name', 'quantity', 'price',
+]
+
+def _restaurant_rows(restaurant_id, start=None, end=None, status=None):
+    """Stream one restaurant's (order, line) rows oldest first; orders without lines get one row of Nones."""
+    statement = select(
+        Order.id.label('order_id'),
+        Order.created_at,
+        Order.restaurant_id,
+        Restaurant.name.label('restaurant'),
+        Order.customer_id,
+        Order.status,
+        Order.total_amount,
+        Order.item_count,
+        OrderItem.menu_item_id,
+        MenuItem.name.label('item_name'),
+        OrderItem.quantity,
+        OrderItem.price
+    ).join(Restaurant, Restaurant.id == Order.restaurant_id)\
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)\
+        .outerjoin(MenuItem, MenuItem.id == OrderItem.menu_item_id)\
+        .where(Order.restaurant_id == restaurant_id)
+    if start is not None:
+        statement = statement.where(Order.created_at >= datetime.combine(start, time.min))
+    if end is not None:
+        statement = statement.where(Order.created_at <= datetime.combine(end, time.max))
+    if status:
+        statement = statement.where(Order.status == status)
+    statement = statement.order_by(Order.created_at, Order.id, OrderItem.id)
+    return db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+def _export_rows(restaurant_ids, start=None, end=None, status=None):
+    """Merge the restaurants' row streams into one, oldest order first."""
+    streams = [_restaurant_rows(restaurant_id, start, end, status) for restaurant_id in restaurant_ids]
+    return heapq.merge(*streams, key=lambda row: (row.created_at, row.order_id))
+
+def _csv_lines(rows, buffer):
+    """Write a header, then one CSV row per line into buffer, yielding after each."""
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row.order_id, row.created_at.isoformat(), row.restaurant_id, row.restaurant,
+            row.customer_id, row.status, row.total_amount, row.item_count,
+            row.menu_item_id, row.item_name, row.quantity, row.price,
+        ])
+        yield
+
+def _ndjson_lines(rows, buffer):
+    """Write one JSON object per order into buffer, yielding after each."""
+    for _, lines in groupby(rows, key=lambda row: row.order_id):
+        lines = list(lines)
+        order = lines[0]
+        buffer.write(json.dumps({
+            'id': order.order_id,
+            'created_at': order.created_at.isoformat(),
+            'restaurant_id': order.restaurant_id,
+            'restaurant': order.restaurant,
+            'customer_id': order.customer_id,
+            'status': order.status,
+            'total_amount': order.total_amount,
+            'item_count': order.item_count,
+            'items': [{
+                'menu_item_id': line.menu_item_id,
+                'name': line.item_name,
+                'quantity': line.quantity,
+                'price': line.price
+            } for line in lines if line.menu_item_id is not None]
+        }))
+        buffer.write('\n')
+        yield
+
+def export_orders(restaurant_ids, fmt='csv', start=None, end=None, status=None):
+    """Generate an export of orders placed on the dates start..end inclusive as text chunks.
+
+    Either bound may be None for an open-ended range. Raises ValueError
+    for an unknown format.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    
+    buffer = io.StringIO()
+    writer = _csv_lines if fmt == 'csv' else _ndjson_lines
+    for _ in writer(_export_rows(restaurant_ids, start, end, status), buffer):
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container.
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
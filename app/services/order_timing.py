@@ -0,0 +1,188 @@
+"""Order status history and per-restaurant kitchen latency.
+
+Every status transition appends a row to order_status_events. When an
+order leaves a live status, the time it spent there is folded into a
+log-bucketed histogram per (restaurant, status) in order_status_latency,
+so median and p90 time-in-state come from a few dozen bucket counters
+instead of a scan of the event history. Buckets grow by a factor of
+LATENCY_BUCKET_BASE, so reported quantiles are within about 10% of the
+exact value.
+"""
+
+import logging
+import math
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models.order import (
+    STATUS_CONFIRMED,
+    STATUS_LABELS,
+    STATUS_PENDING,
+    STATUS_PREPARING,
+    STATUS_READY,
+    Order,
+)
+from app.models.order_status import OrderStatusEvent, OrderStatusLatency
+from app.services.sales_rollup import apply_status_change
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKET_BASE = 1.2
+
+# Statuses whose time-in-state is tracked; the rest are terminal.
+TIMED_STATUSES = (STATUS_PENDING, STATUS_CONFIRMED, STATUS_PREPARING, STATUS_READY)
+
+StatusLatency = namedtuple('StatusLatency', ['status', 'label', 'count', 'median', 'p90', 'mean'])
+
+def latency_bucket(seconds):
+    """Get the histogram bucket for a stay of seconds."""
+    if seconds < LATENCY_BUCKET_BASE:
+        return 0
+    return int(math.log(seconds, LATENCY_BUCKET_BASE))
+
+def bucket_value(bucket):
+    """Get the representative duration of a bucket, its geometric midpoint."""
+    return LATENCY_BUCKET_BASE ** (bucket + 0.5)
+
+def histogram_quantile(counts, q):
+    """Estimate the q quantile from {bucket: count}; None when empty."""
+    total = sum(counts.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(q * total))
+    seen = 0
+    for bucket in sorted(counts):
+        seen += counts[bucket]
+        if seen >= rank:
+            return bucket_value(bucket)
+
+def record_status_change(order_id, restaurant_id, from_status, to_status, at=None, entered_at=None):
+    """Append a status event and fold the finished stay into the histogram.
+
+    Runs in the caller's session so it commits with the status change.
+    entered_at is when the order entered from_status, if known.
+    """
+    at = at or datetime.utcnow()
+    db.session.execute(insert(OrderStatusEvent).values(
+        order_id=order_id,
+        restaurant_id=restaurant_id,
+        from_status=from_status,
+        to_status=to_status,
+        created_at=at
+    ))
+    if from_status in TIMED_STATUSES and entered_at is not None:
+        _add_stay(restaurant_id, from_status, max(0.0, (at - entered_at).total_seconds()))
+
+def _add_stay(restaurant_id, status, seconds):
+    """Increment one histogram bucket with a single UPSERT."""
+    statement = sqlite_insert(OrderStatusLatency).values(
+        restaurant_id=restaurant_id,
+        status=status,
+        bucket=latency_bucket(seconds),
+        count=1,
+        total_seconds=seconds
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['restaurant_id', 'status', 'bucket'],
+        set_={
+            'count': OrderStatusLatency.count + 1,
+            'total_seconds': OrderStatusLatency.total_seconds + statement.excluded.total_seconds,
+        }
+    ))
+
+def set_order_status(order_id, status):
+    """Write unit moving an order to a new status and recording the transition.
+
+    Returns whether the status was valid.
+    """
+    order = db.session.get(Order, order_id)
+    previous_status = order.status
+    if not order.update_status(status):
+        return False
+    if status == previous_status:
+        return True
+    
+    # The latest event says when the order entered its current status.
+    # Orders placed before history was kept only have their creation time.
+    latest = db.session.query(OrderStatusEvent.to_status, OrderStatusEvent.created_at)\
+        .filter(OrderStatusEvent.order_id == order_id)\
+        .order_by(OrderStatusEvent.created_at.desc(), OrderStatusEvent.id.desc())\
+        .first()
+    if latest is not None:
+        entered_at = latest.created_at if latest.to_status == previous_status else None
+    else:
+        entered_at = order.created_at if previous_status == STATUS_PENDING else None
+    
+    record_status_change(order.id, order.restaurant_id, previous_status, status, entered_at=entered_at)
+    apply_status_change(order, previous_status)
+    return True
+
+def kitchen_latency(restaurant_id):
+    """Get time-in-state statistics for a restaurant, one per timed status."""
+    rows = db.session.query(
+        OrderStatusLatency.status,
+        OrderStatusLatency.bucket,
+        OrderStatusLatency.count,
+        OrderStatusLatency.total_seconds
+    ).filter(OrderStatusLatency.restaurant_id == restaurant_id).all()
+    
+    histograms = defaultdict(dict)
+    totals = defaultdict(float)
+    for status, bucket, count, total_seconds in rows:
+        histograms[status][bucket] = count
+        totals[status] += total_seconds
+    
+    latencies = []
+    for status in TIMED_STATUSES:
+        counts = histograms.get(status, {})
+        count = sum(counts.values())
+        latencies.append(StatusLatency(
+            status,
+            STATUS_LABELS[status],
+            count,
+            histogram_quantile(counts, 0.5),
+            histogram_quantile(counts, 0.9),
+            totals[status] / count if count else None
+        ))
+    return latencies
+
+def rebuild_status_latency():
+    """Recompute every latency histogram from the status event history."""
+    db.session.execute(delete(OrderStatusLatency))
+    
+    current_order_id, entered = None, None
+    events = db.session.query(
+        OrderStatusEvent.order_id,
+        OrderStatusEvent.restaurant_id,
+        OrderStatusEvent.to_status,
+        OrderStatusEvent.created_at
+    ).order_by(OrderStatusEvent.order_id, OrderStatusEvent.created_at, OrderStatusEvent.id)\
+        .yield_per(1000)
+    for order_id, restaurant_id, to_status, created_at in events:
+        if order_id == current_order_id and entered[0] in TIMED_STATUSES:
+            _add_stay(restaurant_id, entered[0], max(0.0, (created_at - entered[1]).total_seconds()))
+        current_order_id, entered = order_id, (to_status, created_at)
+    
+    db.session.commit()
+    logger.info("Order status latency histograms rebuilt")
+
+def format_duration(seconds):
+    """Render seconds as a short duration such as '4m 12s' or '1h 05m'."""
+    if seconds is None:
+        return '-'
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f'{seconds}s'
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f'{minutes}m {seconds:02d}s'
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}h {minutes:02d}m'
+
+def init_app(app):
+    """Register the duration template filter used by kitchen latency reports."""
+    app.add_template_filter(format_duration, 'duration')
@@ -0,0 +1,130 @@
+"""Owner dashboard payload, built in a few queries per restaurant and cached briefly."""
+
+from flask import current_app, has_app_context
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.dish_rating import DishRating
+from app.models.feedback import Feedback
+from app.models.menu import MenuItem
+from app.models.order import Order
+from app.models.restaurant import Restaurant
+from app.utils.cache import TTLCache
+from app.utils.pagination import keyset_paginate_each
+
+RECENT_LIMIT = 10
+
+def init_app(app):
+    """Attach the per-owner dashboard cache to the application."""
+    app.config.setdefault('OWNER_DASHBOARD_CACHE_TTL', 5)
+    app.extensions['owner_dashboard_cache'] = TTLCache(app.config['OWNER_DASHBOARD_CACHE_TTL'])
+
+def get_dashboard(owner_id):
+    """Get the dashboard payload for an owner, from cache when fresh.
+
+    The payload holds plain dicts rather than ORM objects, so every request
+    reads the same cached values without touching a session.
+    """
+    cache = current_app.extensions['owner_dashboard_cache']
+    payload = cache.get(owner_id)
+    if payload is None:
+        payload = build_dashboard(owner_id)
+        cache.set(owner_id, payload)
+    return payload
+
+def invalidate_dashboard(owner_id):
+    """Drop an owner's cached dashboard, e.g. after a new order or rating."""
+    if owner_id is None or not has_app_context():
+        return
+    cache = current_app.extensions.get('owner_dashboard_cache')
+    if cache is not None:
+        cache.invalidate(owner_id)
+
+def build_dashboard(owner_id):
+    """Build the dashboard payload for an owner."""
+    restaurants = Restaurant.query.filter_by(owner_id=owner_id)\
+        .order_by(Restaurant.id).all()
+    restaurant_ids = [r.id for r in restaurants]
+    
+    # Get recent orders across all restaurants, reading each restaurant's
+    # newest through its index and merging.
+    recent_orders, _ = keyset_paginate_each(
+        Order.query.options(joinedload(Order.restaurant)),
+        Order.restaurant_id,
+        restaurant_ids,
+        [(Order.created_at, True), (Order.id, True)],
+        limit=RECENT_LIMIT
+    )
+    
+    # Count feedback still awaiting a response.
+    pending_feedback_count = db.session.query(func.count(Feedback.id))\
+        .filter(Feedback.restaurant_id.in_(restaurant_ids),
+                Feedback.is_resolved == False)\
+        .scalar()
+    
+    # Get recent dish ratings.
+    recent_dish_ratings, _ = keyset_paginate_each(
+        DishRating.query.options(joinedload(DishRating.menu_item).joinedload(MenuItem.restaurant),
+                                 joinedload(DishRating.order).joinedload(Order.customer)),
+        DishRating.restaurant_id,
+        restaurant_ids,
+        [(DishRating.created_at, True), (DishRating.id, True)],
+        limit=RECENT_LIMIT
+    )
+    
+    # Get dish rating statistics for all restaurants in one grouped query
+    # over the per-dish stored aggregates.
+    dish_rating_stats = {
+        restaurant_id: {'total_ratings': 0, 'average_rating': 0}
+        for restaurant_id in restaurant_ids
+    }
+    grouped = db.session.query(
+        MenuItem.restaurant_id,
+        func.sum(MenuItem.rating_count),
+        func.sum(MenuItem.rating_sum)
+    ).filter(MenuItem.restaurant_id.in_(restaurant_ids))\
+        .group_by(MenuItem.restaurant_id).all()
+    for restaurant_id, total_ratings, rating_sum in grouped:
+        if total_ratings:
+            dish_rating_stats[restaurant_id] = {
+                'total_ratings': total_ratings,
+                'average_rating': round(rating_sum / total_ratings, 1)
+            }
+    
+    return {
+        'restaurants': [_restaurant_row(r) for r in restaurants],
+        'recent_orders': [_order_row(o) for o in recent_orders],
+        'pending_feedback_count': pending_feedback_count,
+        'recent_dish_ratings': [_dish_rating_row(r) for r in recent_dish_ratings],
+        'dish_rating_stats': dish_rating_stats,
+    }
+
+def _restaurant_row(restaurant):
+    return {
+        'id': restaurant.id,
+        'name': restaurant.name,
+        'location': restaurant.location,
+        'image_path': restaurant.image_path,
+        'cuisines_display': restaurant.cuisines_display,
+    }
+
+def _order_row(order):
+    return {
+        'id': order.id,
+        'restaurant': {'name': order.restaurant.name},
+        'created_at': order.created_at,
+        'total_amount': order.total_amount,
+        'status': order.status,
+    }
+
+def _dish_rating_row(rating):
+    return {
+        'rating': rating.rating,
+        'created_at': rating.created_at,
+        'menu_item': {
+            'name': rating.menu_item.name,
+            'restaurant': {'name': rating.menu_item.restaurant.name},
+        },
+        'order': {'customer': {'name': rating.order.customer.name}},
+    }
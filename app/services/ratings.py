@@ -0,0 +1,113 @@
+"""Maintenance of denormalized rating aggregates on restaurants and dishes."""
+
+import logging
+
+from sqlalchemy import case, func, select, update
+
+from app import db
+from app.models.dish_rating import DishRating
+from app.models.feedback import Feedback
+from app.models.menu import MenuItem
+from app.models.restaurant import Restaurant
+
+logger = logging.getLogger(__name__)
+
+def record_feedback(feedback):
+    """Fold a new order feedback rating into its restaurant's aggregates.
+
+    Runs in the caller's session so it commits with the feedback row.
+    """
+    db.session.execute(
+        update(Restaurant)
+        .where(Restaurant.id == feedback.restaurant_id)
+        .values(_increment_values(Restaurant, feedback.rating))
+        .execution_options(synchronize_session=False)
+    )
+
+def record_dish_rating(dish_rating):
+    """Fold a new dish rating into its menu item's aggregates.
+
+    Runs in the caller's session so it commits with the rating row.
+    """
+    db.session.execute(
+        update(MenuItem)
+        .where(MenuItem.id == dish_rating.menu_item_id)
+        .values(_increment_values(MenuItem, dish_rating.rating))
+        .execution_options(synchronize_session=False)
+    )
+
+def add_feedback(order_id, customer_id, restaurant_id, rating, message):
+    """Write unit saving order feedback and folding it into the aggregates.
+
+    Returns the new feedback id; the caller's write path commits.
+    """
+    feedback = Feedback(
+        order_id=order_id,
+        customer_id=customer_id,
+        restaurant_id=restaurant_id,
+        rating=rating,
+        message=message
+    )
+    db.session.add(feedback)
+    record_feedback(feedback)
+    db.session.flush()
+    return feedback.id
+
+def add_dish_ratings(order_id, customer_id, restaurant_id, ratings):
+    """Write unit saving {menu_item_id: rating} dish ratings for an order.
+
+    Returns how many ratings were saved; the caller's write path commits.
+    """
+    for menu_item_id, rating in ratings.items():
+        dish_rating = DishRating(
+            order_id=order_id,
+            customer_id=customer_id,
+            restaurant_id=restaurant_id,
+            menu_item_id=menu_item_id,
+            rating=rating
+        )
+        db.session.add(dish_rating)
+        record_dish_rating(dish_rating)
+    return len(ratings)
+
+def rebuild_rating_aggregates():
+    """Recompute all stored rating aggregates from the ratings tables."""
+    db.session.execute(
+        update(Restaurant)
+        .values(_rebuild_values(Restaurant, Feedback, Feedback.restaurant_id))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(MenuItem)
+        .values(_rebuild_values(MenuItem, DishRating, DishRating.menu_item_id))
+        .execution_options(synchronize_session=False)
+    )
+    
+    db.session.commit()
+    logger.info("Rating aggregates rebuilt")
+
+def _increment_values(model, rating):
+    """Build SET values folding one rating into a model's aggregates."""
+    values = {
+        model.rating_sum: model.rating_sum + rating,
+        model.rating_count: model.rating_count + 1,
+    }
+    if 1 <= rating <= 5:
+        star_column = model.stars_column(rating)
+        values[star_column] = star_column + 1
+    return values
+
+def _rebuild_values(model, rating_model, foreign_key):
+    """Build SET values recomputing a model's aggregates with subqueries."""
+    def aggregate(expression):
+        return select(expression).where(foreign_key == model.id).scalar_subquery()
+    
+    values = {
+        model.rating_sum: aggregate(func.coalesce(func.sum(rating_model.rating), 0)),
+        model.rating_count: aggregate(func.count(rating_model.id)),
+    }
+    for stars in range(1, 6):
+        values[model.stars_column(stars)] = aggregate(
+            func.coalesce(func.sum(case((rating_model.rating == stars, 1), else_=0)), 0)
+        )
+    return values
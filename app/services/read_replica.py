@@ -0,0 +1,165 @@
+"""Read replica routing for read-only requests.
+
+With a 'replica' entry in SQLALCHEMY_BINDS, SELECT statements made by GET
+requests to views marked with @replica_reads are sent to the replica
+engine; everything else, including any write those requests make, goes to
+the primary. Once a session has written, its later reads stay on the
+primary too.
+
+Read-your-writes: a request that writes (any non-GET request, or a GET
+whose session wrote) pins that user to the primary for
+REPLICA_STICKY_SECONDS through a timestamp in their session cookie.
+
+For SQLite the replica is kept in sync by a background thread copying the
+primary with the online backup API every REPLICA_SYNC_INTERVAL seconds.
+Each run is a full copy, so this suits a single machine and modest
+databases. Reads fall back to the primary while the last copy is older
+than REPLICA_MAX_LAG seconds. Keep REPLICA_STICKY_SECONDS at least
+REPLICA_MAX_LAG so a user never reads a copy taken before their write.
+Set REPLICA_SYNC_INTERVAL to 0 when something else maintains the replica,
+or in all but one worker process.
+
+Kept free of app-level imports so app/__init__.py can pass RoutingSession
+to SQLAlchemy().
+"""
+
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask import session as user_session
+from flask_sqlalchemy.session import Session
+
+from app.utils.periodic import PeriodicThread
+
+REPLICA_BIND_KEY = 'replica'
+
+READ_METHODS = ('GET', 'HEAD')
+
+class RoutingSession(Session):
+    """Session sending plain SELECTs to the read replica when the request allows it."""
+    
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._wrote = False
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                self._wrote = True
+                if has_request_context():
+                    g._replica_wrote = True
+            elif getattr(clause, 'is_select', False) and not self._wrote:
+                replica = current_app.extensions.get('read_replica')
+                if replica is not None and replica.serves_request():
+                    return replica.engine
+        # Writes, text() statements and bare get_bind() calls use the primary.
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _is_write(clause):
+    """Check whether a statement is DML, DDL or a SELECT ... FOR UPDATE."""
+    return (
+        getattr(clause, 'is_dml', False)
+        or getattr(clause, 'is_ddl', False)
+        or getattr(clause, '_for_update_arg', None) is not None
+    )
+
+class ReplicaSync(PeriodicThread):
+    """Background thread copying a SQLite primary into its replica."""
+    
+    thread_name = 'replica-sync'
+    run_first = True
+    
+    def __init__(self, primary, replica, interval):
+        super().__init__(interval)
+        self.primary = primary
+        self.replica = replica
+        self.synced_at = None  # Wall-clock time the last completed copy started.
+        self.syncs = 0
+    
+    def sync(self):
+        """Copy the primary into the replica; return the copy's duration in seconds.
+
+        Readers of a WAL-mode replica keep their snapshot while it runs.
+        """
+        started = time.time()
+        source = self.primary.raw_connection()
+        try:
+            target = self.replica.raw_connection()
+            try:
+                source.driver_connection.backup(target.driver_connection)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        self.synced_at = started
+        self.syncs += 1
+        return time.time() - started
+    
+    def lag(self):
+        """Seconds since the replica's data was copied; None before the first copy."""
+        return None if self.synced_at is None else time.time() - self.synced_at
+    
+    def run_once(self):
+        """Copy the replica once; called by the sync thread."""
+        self.sync()
+
+class ReadReplica:
+    """Per-app replica engine and the rules for when requests may read from it."""
+    
+    def __init__(self, app, engine, sync=None):
+        self.engine = engine
+        self.sync = sync
+        self.max_lag = app.config['REPLICA_MAX_LAG']
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+    
+    def is_fresh(self):
+        """Check the replica is recent enough to serve reads."""
+        if self.sync is None:
+            return True
+        lag = self.sync.lag()
+        return lag is not None and lag <= self.max_lag
+    
+    def serves_request(self):
+        """Decide, once per request, whether its reads may use the replica."""
+        if not has_request_context():
+            return False
+        if '_replica_reads' not in g:
+            view = current_app.view_functions.get(request.endpoint)
+            g._replica_reads = (
+                request.method in READ_METHODS
+                and getattr(view, 'replica_reads', False)
+                and user_session.get('_primary_until', 0) <= time.time()
+                and self.is_fresh()
+            )
+        return g._replica_reads
+    
+    def stick_to_primary(self, response):
+        """Pin the user to the primary for a while after a request that wrote."""
+        if request.method not in READ_METHODS or g.get('_replica_wrote'):
+            user_session['_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+def init_app(app):
+    """Route read-only requests to the replica bind when one is configured."""
+    app.config.setdefault('REPLICA_SYNC_INTERVAL', 5)
+    app.config.setdefault('REPLICA_MAX_LAG', 3 * app.config['REPLICA_SYNC_INTERVAL'])
+    app.config.setdefault('REPLICA_STICKY_SECONDS', app.config['REPLICA_MAX_LAG'])
+    
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        engines = db.engines
+    if REPLICA_BIND_KEY not in engines:
+        return
+    # The replica mirrors the primary's tables; keep create_all() and
+    # drop_all(), for this app and any other, off it.
+    if not db.metadatas[REPLICA_BIND_KEY].tables:
+        del db.metadatas[REPLICA_BIND_KEY]
+    
+    primary, engine = engines[None], engines[REPLICA_BIND_KEY]
+    sync = None
+    if app.config['REPLICA_SYNC_INTERVAL'] and primary.dialect.name == engine.dialect.name == 'sqlite':
+        sync = ReplicaSync(primary, engine, app.config['REPLICA_SYNC_INTERVAL'])
+        sync.start()
+    replica = ReadReplica(app, engine, sync)
+    app.extensions['read_replica'] = replica
+    app.after_request(replica.stick_to_primary)
@@ -0,0 +1,158 @@
+"""SQLite FTS5 full-text search over restaurants.
+
+The restaurants_fts virtual table is an external-content index over
+restaurants(name, description, location, cuisines), kept in sync by
+triggers. Databases whose SQLite was built without FTS5 (or non-SQLite
+databases) fall back to ILIKE filters.
+"""
+
+import logging
+import re
+
+from sqlalchemy import Float, Integer, event, or_, text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models.restaurant import Restaurant
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'restaurants_fts'
+
+# Column weights for bm25(): name, description, location, cuisines.
+BM25_WEIGHTS = (10.0, 1.0, 5.0, 3.0)
+
+CREATE_STATEMENTS = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, location, cuisines,
+        content='restaurants', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS restaurants_fts_ai AFTER INSERT ON restaurants BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, location, cuisines)
+        VALUES (new.id, new.name, new.description, new.location, new.cuisines);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS restaurants_fts_ad AFTER DELETE ON restaurants BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, location, cuisines)
+        VALUES ('delete', old.id, old.name, old.description, old.location, old.cuisines);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS restaurants_fts_au
+        AFTER UPDATE OF name, description, location, cuisines ON restaurants BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, location, cuisines)
+        VALUES ('delete', old.id, old.name, old.description, old.location, old.cuisines);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, location, cuisines)
+        VALUES (new.id, new.name, new.description, new.location, new.cuisines);
+    END""",
+)
+
+DROP_STATEMENTS = (
+    "DROP TRIGGER IF EXISTS restaurants_fts_ai",
+    "DROP TRIGGER IF EXISTS restaurants_fts_ad",
+    "DROP TRIGGER IF EXISTS restaurants_fts_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+def create_search_index(connection):
+    """Create the FTS5 table and sync triggers, then index existing rows.
+
+    Returns False when the database cannot host an FTS5 index.
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    try:
+        for statement in CREATE_STATEMENTS:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    except OperationalError as e:
+        logger.warning(f"FTS5 unavailable, restaurant search will use LIKE: {e}")
+        return False
+    return True
+
+def drop_search_index(connection):
+    """Drop the FTS5 table and its triggers."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in DROP_STATEMENTS:
+        connection.exec_driver_sql(statement)
+
+@event.listens_for(Restaurant.__table__, 'after_create')
+def _after_restaurants_create(target, connection, **kw):
+    create_search_index(connection)
+
+@event.listens_for(Restaurant.__table__, 'before_drop')
+def _before_restaurants_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+def search_index_available():
+    """Check whether the FTS5 index exists in the current database."""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first() is not None
+
+def build_match_expression(terms, columns=None):
+    """Build a safe FTS5 MATCH expression: every word as a quoted prefix term.
+
+    Returns None when the text has no searchable words.
+    """
+    words = re.findall(r'\w+', terms or '', re.UNICODE)
+    if not words:
+        return None
+    expression = ' AND '.join(f'"{word}"*' for word in words)
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    return expression
+
+def filter_restaurants(query, text_terms=None, location=None,
+                       text_columns=('name', 'description', 'location', 'cuisines')):
+    """Restrict a Restaurant query to matches, ranked best first.
+
+    text_terms is matched against text_columns and location against the
+    location column. Uses the FTS5 index with bm25 ranking when it exists,
+    otherwise falls back to ILIKE filters in the original order.
+    """
+    query, rank = rank_restaurants(query, text_terms, location, text_columns)
+    if rank is None:
+        return query
+    return query.order_by(rank, Restaurant.id)
+
+def rank_restaurants(query, text_terms=None, location=None,
+                     text_columns=('name', 'description', 'location', 'cuisines')):
+    """Restrict a Restaurant query to matches without ordering it.
+
+    Returns (query, rank) where rank is the bm25 column (lower is better),
+    or None when there is nothing to match or the index is unavailable.
+    """
+    clauses = [
+        build_match_expression(text_terms, text_columns),
+        build_match_expression(location, ('location',)),
+    ]
+    clauses = [clause for clause in clauses if clause]
+    if not clauses:
+        return query, None
+    
+    if not search_index_available():
+        return _filter_with_like(query, text_terms, location, text_columns), None
+    
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    matches = text(
+        f"SELECT rowid AS restaurant_id, bm25({FTS_TABLE}, {weights}) AS rank "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    ).bindparams(match=' AND '.join(clauses))\
+        .columns(restaurant_id=Integer, rank=Float)\
+        .subquery('restaurant_matches')
+    
+    query = query.join(matches, Restaurant.id == matches.c.restaurant_id)
+    return query, matches.c.rank
+
+def _filter_with_like(query, text_terms, location, text_columns):
+    """Fallback substring search for databases without FTS5."""
+    if text_terms:
+        query = query.filter(or_(*[
+            getattr(Restaurant, column).ilike(f'%{text_terms}%') for column in text_columns
+        ]))
+    if location:
+        query = query.filter(Restaurant.location.ilike(f'%{location}%'))
+    return query
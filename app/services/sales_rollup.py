@@ -0,0 +1,221 @@
+"""Sales rollup behind the owner reports page.
+
+restaurant_daily_stats keeps one row per restaurant and UTC day with its
+order count, revenue and items sold, and restaurant_hourly_stats the same
+per UTC hour; menu_item_daily_stats keeps the quantity of each dish sold
+per day. Checkout adds each order with a few UPSERTs and cancelling an
+order takes it back out, so reports read O(buckets) rollup rows instead of
+grouping raw orders on every view. Cancelled orders are not counted.
+
+sales_report() answers any date range for any set of restaurants at hour,
+day, week or month granularity with one grouped query over the rollup.
+"""
+
+import logging
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import delete, desc, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models.daily_stats import MenuItemDailyStats, RestaurantDailyStats, RestaurantHourlyStats
+from app.models.menu import MenuItem
+from app.models.order import STATUS_CANCELLED, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# Upper bound on buckets per report, so an hourly report over years is refused.
+MAX_REPORT_BUCKETS = 2000
+
+# The most days one bucket covers, to bound a range before listing its buckets.
+BUCKET_MAX_DAYS = {'hour': 1 / 24, 'day': 1, 'week': 7, 'month': 31}
+
+SalesSeries = namedtuple('SalesSeries', ['restaurant_id', 'orders', 'revenue', 'items_sold'])
+
+def record_sale(restaurant_id, at, total, lines, sign=1):
+    """Add one order placed at a UTC datetime, with its (menu_item_id, quantity) lines, to the rollup.
+
+    sign=-1 takes the order back out, e.g. on cancellation. Runs in the
+    caller's session so it commits with the order change.
+    """
+    lines = list(lines)
+    items_sold = sign * sum(quantity for _, quantity in lines)
+    for model, key, value in (
+        (RestaurantDailyStats, 'day', at.date()),
+        (RestaurantHourlyStats, 'hour', at.replace(minute=0, second=0, microsecond=0)),
+    ):
+        stats = sqlite_insert(model).values(
+            restaurant_id=restaurant_id,
+            orders=sign,
+            revenue=sign * total,
+            items_sold=items_sold,
+            **{key: value}
+        )
+        db.session.execute(stats.on_conflict_do_update(
+            index_elements=['restaurant_id', key],
+            set_={
+                'orders': model.orders + stats.excluded.orders,
+                'revenue': model.revenue + stats.excluded.revenue,
+                'items_sold': model.items_sold + stats.excluded.items_sold,
+            }
+        ))
+    if not lines:
+        return
+    
+    items = sqlite_insert(MenuItemDailyStats)
+    db.session.execute(items.on_conflict_do_update(
+        index_elements=['menu_item_id', 'day'],
+        set_={'quantity': MenuItemDailyStats.quantity + items.excluded.quantity}
+    ), [
+        {'menu_item_id': menu_item_id, 'day': at.date(), 'restaurant_id': restaurant_id,
+         'quantity': sign * quantity}
+        for menu_item_id, quantity in lines
+    ])
+
+def apply_status_change(order, previous_status):
+    """Take an order out of the rollup when cancelled, or back in when revived."""
+    if (order.status == STATUS_CANCELLED) == (previous_status == STATUS_CANCELLED):
+        return
+    sign = -1 if order.status == STATUS_CANCELLED else 1
+    lines = db.session.query(OrderItem.menu_item_id, func.sum(OrderItem.quantity))\
+        .filter(OrderItem.order_id == order.id)\
+        .group_by(OrderItem.menu_item_id).all()
+    record_sale(order.restaurant_id, order.created_at, order.total_amount, lines, sign)
+
+def rebuild_daily_stats():
+    """Recompute the whole rollup from orders with INSERT ... SELECTs."""
+    db.session.execute(delete(MenuItemDailyStats))
+    db.session.execute(delete(RestaurantDailyStats))
+    db.session.execute(delete(RestaurantHourlyStats))
+    
+    day = func.date(Order.created_at)
+    db.session.execute(insert(RestaurantDailyStats).from_select(
+        ['restaurant_id', 'day', 'orders', 'revenue', 'items_sold'],
+        select(Order.restaurant_id, day, func.count(Order.id),
+               func.sum(Order.total_amount), func.sum(Order.item_count))
+        .where(Order.status != STATUS_CANCELLED)
+        .group_by(Order.restaurant_id, day)
+    ))
+    # Same text form SQLAlchemy stores DateTime values in, so UPSERTs match.
+    hour = func.strftime('%Y-%m-%d %H:00:00.000000', Order.created_at)
+    db.session.execute(insert(RestaurantHourlyStats).from_select(
+        ['restaurant_id', 'hour', 'orders', 'revenue', 'items_sold'],
+        select(Order.restaurant_id, hour, func.count(Order.id),
+               func.sum(Order.total_amount), func.sum(Order.item_count))
+        .where(Order.status != STATUS_CANCELLED)
+        .group_by(Order.restaurant_id, hour)
+    ))
+    db.session.execute(insert(MenuItemDailyStats).from_select(
+        ['menu_item_id', 'day', 'restaurant_id', 'quantity'],
+        select(OrderItem.menu_item_id, day, Order.restaurant_id, func.sum(OrderItem.quantity))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status != STATUS_CANCELLED)
+        .group_by(OrderItem.menu_item_id, day, Order.restaurant_id)
+    ))
+    
+    db.session.commit()
+    logger.info("Daily sales rollup rebuilt")
+
+def sales_totals(restaurant_id):
+    """Get a restaurant's all-time (orders, revenue) from the rollup."""
+    orders, revenue = db.session.query(
+        func.coalesce(func.sum(RestaurantDailyStats.orders), 0),
+        func.coalesce(func.sum(RestaurantDailyStats.revenue), 0)
+    ).filter(RestaurantDailyStats.restaurant_id == restaurant_id).one()
+    return orders, revenue
+
+def best_sellers(restaurant_id, limit=5):
+    """Get a restaurant's most ordered dishes as (id, name, total) rows."""
+    total = func.sum(MenuItemDailyStats.quantity).label('total')
+    return db.session.query(MenuItem.id, MenuItem.name, total)\
+        .join(MenuItemDailyStats, MenuItemDailyStats.menu_item_id == MenuItem.id)\
+        .filter(MenuItemDailyStats.restaurant_id == restaurant_id)\
+        .group_by(MenuItem.id, MenuItem.name)\
+        .having(total > 0)\
+        .order_by(desc('total'), MenuItem.id)\
+        .limit(limit).all()
+
+def report_buckets(start, end, granularity):
+    """List the bucket keys covering the dates start..end inclusive.
+
+    Keys are '2026-10-17T15:00' for hours, '2026-10-17' for days, the
+    Monday's date for weeks and '2026-10' for months.
+    """
+    if granularity == 'hour':
+        hours = ((end - start).days + 1) * 24
+        first = datetime.combine(start, time.min)
+        return [(first + timedelta(hours=n)).strftime('%Y-%m-%dT%H:00') for n in range(hours)]
+    if granularity == 'day':
+        return [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+    if granularity == 'week':
+        monday = start - timedelta(days=start.weekday())
+        return [(monday + timedelta(weeks=n)).isoformat() for n in range((end - monday).days // 7 + 1)]
+    
+    keys = []
+    month = date(start.year, start.month, 1)
+    while month <= end:
+        keys.append(month.strftime('%Y-%m'))
+        if month.year == date.max.year and month.month == 12:
+            break
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return keys
+
+def sales_report(restaurant_ids, start, end, granularity='day'):
+    """Get per-restaurant sales for the dates start..end bucketed by granularity.
+
+    Returns (bucket keys, [SalesSeries]) with one series per restaurant in
+    restaurant_ids order, each holding lists aligned with the keys and
+    zeros for empty buckets. Raises ValueError for a bad granularity or
+    range.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'")
+    if end < start:
+        raise ValueError("Report range ends before it starts")
+    too_many = f"Report range has more than {MAX_REPORT_BUCKETS} {granularity} buckets"
+    if (end - start).days + 1 > MAX_REPORT_BUCKETS * BUCKET_MAX_DAYS[granularity]:
+        raise ValueError(too_many)
+    buckets = report_buckets(start, end, granularity)
+    if len(buckets) > MAX_REPORT_BUCKETS:
+        raise ValueError(too_many)
+    
+    # Inclusive upper bounds, so end may be date.max.
+    if granularity == 'hour':
+        model, column = RestaurantHourlyStats, RestaurantHourlyStats.hour
+        lower, upper = datetime.combine(start, time.min), datetime.combine(end, time.max)
+        bucket = func.strftime('%Y-%m-%dT%H:00', column)
+    else:
+        model, column = RestaurantDailyStats, RestaurantDailyStats.day
+        lower, upper = start, end
+        bucket = {
+            'day': func.strftime('%Y-%m-%d', column),
+            'week': func.date(column, '-6 days', 'weekday 1'),
+            'month': func.strftime('%Y-%m', column),
+        }[granularity]
+    
+    rows = db.session.query(
+        model.restaurant_id,
+        bucket.label('bucket'),
+        func.sum(model.orders),
+        func.sum(model.revenue),
+        func.sum(model.items_sold)
+    ).filter(
+        model.restaurant_id.in_(restaurant_ids),
+        column >= lower,
+        column <= upper
+    ).group_by(model.restaurant_id, 'bucket').all()
+    
+    positions = {key: n for n, key in enumerate(buckets)}
+    series = {
+        restaurant_id: SalesSeries(restaurant_id, [0] * len(buckets), [0.0] * len(buckets), [0] * len(buckets))
+        for restaurant_id in restaurant_ids
+    }
+    for restaurant_id, key, orders, revenue, items_sold in rows:
+        position = positions[key]
+        series[restaurant_id].orders[position] = orders
+        series[restaurant_id].revenue[position] = round(revenue, 2)
+        series[restaurant_id].items_sold[position] = items_sold
+    return buckets, [series[restaurant_id] for restaurant_id in restaurant_ids]
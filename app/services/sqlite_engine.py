@@ -0,0 +1,130 @@
+"""SQLite engine profile: per-connection pragmas and WAL checkpointing.
+
+SQLite keeps most of its tuning per connection, so the pragmas of the
+configured SQLITE_PROFILE, merged with any SQLITE_PRAGMAS overrides, are
+applied to every new pool connection. The 'wal' profile (the default)
+lets readers and the single writer run concurrently, waits for locks
+instead of failing with "database is locked", and gives each connection a
+larger page cache, memory-mapped reads and in-memory temp tables. The
+'default' profile leaves SQLite's own settings untouched.
+
+In WAL mode commits append to the -wal file and SQLite copies pages back
+into the database (a checkpoint) on the committing connection once the
+WAL reaches wal_autocheckpoint pages, but never shrinks the file. Once a
+connection reports WAL mode, a background thread runs a PASSIVE
+checkpoint every SQLITE_CHECKPOINT_INTERVAL seconds and a TRUNCATE
+checkpoint when the WAL has grown past SQLITE_CHECKPOINT_TRUNCATE_PAGES.
+
+Pool sizing is not handled here: SQLALCHEMY_ENGINE_OPTIONS goes straight
+to create_engine, e.g. {'pool_size': 10, 'max_overflow': 10}.
+"""
+
+import logging
+
+from sqlalchemy import event
+
+from app import db
+from app.utils.periodic import PeriodicThread
+
+logger = logging.getLogger(__name__)
+
+# Applied in order, so busy_timeout already covers the journal_mode switch.
+SQLITE_PROFILES = {
+    'default': {},
+    'wal': {
+        'busy_timeout': 5000,  # ms.
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # Durable at checkpoints; WAL commits skip the fsync.
+        'cache_size': -16000,  # KiB per connection.
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+def profile_pragmas(profile, overrides=None):
+    """Get the pragmas for a profile with overrides applied; None drops a pragma.
+
+    Raises ValueError for an unknown profile.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{profile}'")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    pragmas.update(overrides or {})
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+class WalCheckpointer(PeriodicThread):
+    """Background thread checkpointing a WAL-mode database on a timer."""
+    
+    thread_name = 'sqlite-wal-checkpoint'
+    
+    def __init__(self, engine, interval, truncate_pages):
+        super().__init__(interval)
+        self.engine = engine
+        self.truncate_pages = truncate_pages
+        self.checkpoints = 0
+        self.truncations = 0
+    
+    def checkpoint(self, mode='PASSIVE'):
+        """Run one checkpoint; return (busy, WAL pages, checkpointed pages)."""
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Unknown checkpoint mode '{mode}'")
+        with self.engine.connect() as connection:
+            busy, pages, done = connection.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').one()
+        self.checkpoints += 1
+        return busy, pages, done
+    
+    def run_once(self):
+        """Checkpoint passively, then truncate the WAL if it has grown too large."""
+        busy, pages, done = self.checkpoint('PASSIVE')
+        if pages >= self.truncate_pages:
+            busy, pages, done = self.checkpoint('TRUNCATE')
+            if busy:
+                logger.warning(f"WAL truncate checkpoint blocked by readers; {pages - done} pages left")
+            else:
+                self.truncations += 1
+                logger.info("WAL truncated after checkpoint")
+        return busy, pages, done
+    
+def _pragma_listener(pragmas, checkpointer):
+    """Build a pool connect listener applying pragmas to each new connection."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+                # journal_mode reports the mode in effect: 'memory' for in-memory databases.
+                if name == 'journal_mode' and checkpointer is not None:
+                    if str(cursor.fetchone()[0]).lower() == 'wal':
+                        checkpointer.start()
+        finally:
+            cursor.close()
+    return on_connect
+
+def init_app(app):
+    """Apply the configured SQLite profile to the application's engine."""
+    app.config.setdefault('SQLITE_PROFILE', 'wal')
+    app.config.setdefault('SQLITE_PRAGMAS', {})
+    app.config.setdefault('SQLITE_CHECKPOINT_INTERVAL', 30)
+    app.config.setdefault('SQLITE_CHECKPOINT_TRUNCATE_PAGES', 4000)
+    
+    with app.app_context():
+        engines = db.engines
+    pragmas = profile_pragmas(app.config['SQLITE_PROFILE'], app.config['SQLITE_PRAGMAS'])
+    
+    # Every SQLite bind (e.g. a read replica) gets the pragmas; only the
+    # primary is checkpointed in the background.
+    for bind_key, engine in engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        checkpointer = None
+        if bind_key is None and app.config['SQLITE_CHECKPOINT_INTERVAL']:
+            checkpointer = WalCheckpointer(
+                engine,
+                app.config['SQLITE_CHECKPOINT_INTERVAL'],
+                app.config['SQLITE_CHECKPOINT_TRUNCATE_PAGES']
+            )
+            app.extensions['sqlite_checkpointer'] = checkpointer
+        if pragmas:
+            event.listen(engine, 'connect', _pragma_listener(pragmas, checkpointer))
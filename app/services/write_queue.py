@@ -0,0 +1,199 @@
+"""Optional group-commit write pipeline for SQLite.
+
+SQLite allows one writer at a time, so concurrent request handlers that
+each commit their own transaction queue up on the database lock and, under
+load, fail with "database is locked". With WRITE_QUEUE_ENABLED set, write
+units are instead handed to a single writer thread that gathers whatever
+arrives within WRITE_QUEUE_MAX_DELAY seconds (up to WRITE_QUEUE_MAX_BATCH
+units) and runs them all in one transaction: one lock acquisition and one
+fsync for the whole batch.
+
+A write unit is a callable that makes its changes through db.session and
+returns a plain value such as a new row id; it must not commit. Callers get
+a concurrent.futures.Future resolving to that value or to the unit's error.
+If a batch fails, it is rolled back and its units are retried one per
+transaction, so one bad unit never fails its neighbours.
+
+With the queue disabled (the default) units run inline in the request's
+session and commit immediately, so callers use the same API either way.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import current_app, has_app_context
+
+from app import db
+from app.utils.shutdown import stop_at_exit
+
+logger = logging.getLogger(__name__)
+
+_WriteRequest = namedtuple('_WriteRequest', ['future', 'unit', 'args', 'kwargs'])
+
+_STOP = object()
+
+class GroupCommitWriter:
+    """Single writer thread committing queued write units in batches."""
+    
+    def __init__(self, app, max_batch=64, max_delay=0.002):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        stop_at_exit(self)
+    
+    def submit(self, unit, *args, **kwargs):
+        """Queue a write unit; return a Future for its result."""
+        if self._stopped:
+            raise RuntimeError("Write queue is stopped")
+        future = Future()
+        self._queue.put(_WriteRequest(future, unit, args, kwargs))
+        self._ensure_thread()
+        return future
+    
+    def stop(self, timeout=5):
+        """Commit everything already queued, then stop the writer thread."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+        self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='group-commit-writer', daemon=True
+                )
+                self._thread.start()
+    
+    def _run(self):
+        with self.app.app_context():
+            running = True
+            while running:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch = [first]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    try:
+                        request = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if request is _STOP:
+                        running = False
+                        break
+                    batch.append(request)
+                
+                batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+                try:
+                    if batch:
+                        self._commit_batch(batch)
+                except Exception as e:
+                    logger.error(f"Group commit writer failed: {e}")
+                    for request in batch:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+                finally:
+                    db.session.close()
+    
+    def _commit_batch(self, batch):
+        """Run a batch in one transaction, isolating failures on error."""
+        results = []
+        try:
+            for request in batch:
+                results.append(request.unit(*request.args, **request.kwargs))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            logger.warning(f"Group commit of {len(batch)} writes failed, retrying one by one: {e}")
+            for request in batch:
+                self._commit_batch([request])
+            return
+        
+        self.batches += 1
+        self.writes += len(batch)
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+def init_app(app):
+    """Attach the group-commit writer to the application when enabled."""
+    app.config.setdefault('WRITE_QUEUE_ENABLED', False)
+    app.config.setdefault('WRITE_QUEUE_MAX_BATCH', 64)
+    app.config.setdefault('WRITE_QUEUE_MAX_DELAY', 0.002)
+    app.config.setdefault('WRITE_QUEUE_TIMEOUT', 30)
+    if app.config['WRITE_QUEUE_ENABLED']:
+        app.extensions['write_queue'] = GroupCommitWriter(
+            app, app.config['WRITE_QUEUE_MAX_BATCH'], app.config['WRITE_QUEUE_MAX_DELAY']
+        )
+
+def get_write_queue():
+    """Get the group-commit writer for the current app, if enabled."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('write_queue')
+
+def submit_write(unit, *args, **kwargs):
+    """Submit a write unit; return a Future for its result.
+
+    With the write queue, the current session's transaction is committed
+    before queueing, so stage changes in write units rather than in the
+    session. Without it the unit runs and commits right away in the current
+    session, and the returned Future is already resolved.
+    """
+    writer = get_write_queue()
+    if writer is not None:
+        # End the caller's transaction first, so a waiting request does not
+        # keep a pooled connection the writer thread may need.
+        db.session.commit()
+        return writer.submit(unit, *args, **kwargs)
+    
+    future = Future()
+    try:
+        result = unit(*args, **kwargs)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        future.set_exception(e)
+    else:
+        future.set_result(result)
+    return future
+
+def run_write(unit, *args, **kwargs):
+    """Submit a write unit and wait for its result, re-raising its error.
+
+    If the writer has not started the unit within WRITE_QUEUE_TIMEOUT
+    seconds it is cancelled and TimeoutError is raised; a unit already in a
+    batch may still commit, so its outcome is awaited instead. When the
+    write went through the writer thread, objects in the current session
+    are expired so later reads see it.
+    """
+    future = submit_write(unit, *args, **kwargs)
+    try:
+        result = future.result(timeout=current_app.config['WRITE_QUEUE_TIMEOUT'])
+    except FutureTimeoutError:
+        if future.cancel():
+            raise
+        result = future.result()
+    if get_write_queue() is not None:
+        db.session.expire_all()
+    return result
@@ -107,6 +107,65 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // INFINITE SCROLL: APPEND THE NEXT PAGE'S HTML WHEN THE PAGER COMES INTO VIEW
+    document.querySelectorAll('[data-infinite-scroll]').forEach(function(pager) {
+        var loading = false;
+        var observer = null;
+        
+        function loadMore() {
+            var url = pager.getAttribute('data-next-url');
+            if (loading || !url) return;
+            loading = true;
+            
+            fetch(url, {
+                method: 'GET',
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest',
+                    'Accept': 'application/json'
+                },
+                credentials: 'same-origin'
+            }).then(function(res){
+                return res.json();
+            }).then(function(data){
+                Object.keys(data.html || {}).forEach(function(targetId) {
+                    var target = document.getElementById(targetId);
+                    if (target) {
+                        target.insertAdjacentHTML('beforeend', data.html[targetId]);
+                    }
+                });
+                if (data.next_url) {
+                    pager.setAttribute('data-next-url', data.next_url);
+                    var link = pager.querySelector('a');
+                    if (link) link.setAttribute('href', data.next_url);
+                } else {
+                    if (observer) observer.disconnect();
+                    pager.remove();
+                }
+                loading = false;
+            }).catch(function(err){
+                // KEEP THE LINK SO THE USER CAN STILL PAGE MANUALLY.
+                loading = false;
+            });
+        }
+        
+        var link = pager.querySelector('a');
+        if (link) {
+            link.addEventListener('click', function(event) {
+                event.preventDefault();
+                loadMore();
+            });
+        }
+        
+        if ('IntersectionObserver' in window) {
+            observer = new IntersectionObserver(function(entries) {
+                if (entries.some(function(entry) { return entry.isIntersecting; })) {
+                    loadMore();
+                }
+            }, { rootMargin: '400px' });
+            observer.observe(pager);
+        }
+    });
+    
     // ADD TO CART BUTTON HANDLER (AJAX)
     function updateCartBadge(count) {
         var badge = document.getElementById('cart-badge');
@@ -174,4 +233,46 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
     });
+    
+    // LIVE ORDER UPDATES (SERVER-SENT EVENTS)
+    function adjustStatusCount(status, delta) {
+        var counter = document.querySelector('[data-status-count="' + status + '"]');
+        if (counter) {
+            counter.textContent = Math.max(0, (parseInt(counter.textContent) || 0) + delta);
+        }
+    }
+    
+    document.querySelectorAll('[data-event-stream]').forEach(function(container) {
+        if (!window.EventSource) return;
+        
+        // THE BROWSER RECONNECTS ON ITS OWN, SENDING LAST-EVENT-ID TO RESUME.
+        var source = new EventSource(container.getAttribute('data-event-stream'));
+        var reloadOnEvent = container.hasAttribute('data-reload-on-event');
+        
+        function handleOrderEvent(event) {
+            var data = JSON.parse(event.data);
+            if (reloadOnEvent) {
+                source.close();
+                window.location.reload();
+                return;
+            }
+            if (data.previous_status) {
+                adjustStatusCount(data.previous_status, -1);
+            }
+            adjustStatusCount(data.status, 1);
+            
+            var message = event.type === 'order_created'
+                ? 'NEW ORDER #' + data.order_id + ' RECEIVED.'
+                : 'ORDER #' + data.order_id + ' IS NOW ' + data.status_display.toUpperCase() + '.';
+            showInlineAlert(container, message + ' <a href="/owner/order/' + data.order_id + '" class="alert-link">VIEW ORDER</a>', 'info');
+        }
+        
+        source.addEventListener('order_created', handleOrderEvent);
+        source.addEventListener('order_status', handleOrderEvent);
+        source.addEventListener('reset', function() {
+            // EVENTS WERE MISSED WHILE DISCONNECTED; RELOAD TO RESYNC.
+            source.close();
+            window.location.reload();
+        });
+    });
 });
@@ -0,0 +1,41 @@
+"""Small in-process caches."""
+
+import threading
+import time
+
+class TTLCache:
+    """Thread-safe dict cache whose entries expire after ttl seconds."""
+    
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Get a live entry, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+    
+    def set(self, key, value):
+        """Store an entry for ttl seconds."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+    
+    def invalidate(self, key):
+        """Drop an entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._data.clear()
@@ -21,3 +21,8 @@ def owner_required(f):
             abort(403)  # Forbidden.
         return f(*args, **kwargs)
     return decorated_function
+
+def replica_reads(f):
+    """Let a read-only route's queries go to the read replica (see app.services.read_replica)."""
+    f.replica_reads = True
+    return f
@@ -0,0 +1,119 @@
+"""Keyset (cursor) pagination helpers.
+
+A page is read by seeking past the sort key of the last row already seen
+instead of using OFFSET, so every page costs the same no matter how deep
+the reader scrolls. Cursors are opaque URL-safe tokens holding that key.
+"""
+
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+def clamp_page_size(value, default, maximum):
+    """Clamp a requested page size to 1..maximum, using default when unset."""
+    if value is None:
+        return default
+    return max(1, min(value, maximum))
+
+def _encode_value(value):
+    """JSON hook tagging datetimes so they decode back to datetimes."""
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def _decode_value(obj):
+    """JSON hook reversing _encode_value."""
+    if set(obj) == {'$dt'}:
+        return datetime.fromisoformat(obj['$dt'])
+    return obj
+
+def _valid_value(value):
+    """Check a decoded value is one the database can bind: a string, a datetime or a 64-bit number."""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, (str, datetime))
+
+def encode_cursor(values):
+    """Encode a sort key as an opaque URL-safe cursor."""
+    raw = json.dumps(list(values), separators=(',', ':'), default=_encode_value).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size):
+    """Decode a cursor into its sort key values.
+
+    Returns None for a missing or malformed cursor, so tampered links fall
+    back to the first page instead of erroring.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'), object_hook=_decode_value)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    if not all(_valid_value(value) for value in values):
+        return None
+    return values
+
+def _seek_condition(sort_keys, values):
+    """Build the 'comes after this key' condition for mixed sort directions."""
+    alternatives = []
+    for position, (column, descending) in enumerate(sort_keys):
+        value = values[position]
+        step = column < value if descending else column > value
+        ties = [sort_keys[i][0] == values[i] for i in range(position)]
+        alternatives.append(and_(*ties, step))
+    return or_(*alternatives)
+
+def _page_rows(query, sort_keys, values, limit):
+    """Fetch up to limit rows of query past values, each row being (item, *sort key)."""
+    if values is not None:
+        query = query.filter(_seek_condition(sort_keys, values))
+    
+    labels = [column.label(f'_sort_key_{i}') for i, (column, _) in enumerate(sort_keys)]
+    ordering = [column.desc() if descending else column.asc() for column, descending in sort_keys]
+    return query.order_by(None).add_columns(*labels).order_by(*ordering).limit(limit).all()
+
+def _page(rows, limit):
+    """Split limit + 1 sorted rows into (items, next_cursor)."""
+    items = [row[0] for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(rows[limit - 1][1:])
+    return items, next_cursor
+
+def keyset_paginate(query, sort_keys, cursor=None, limit=20):
+    """Fetch one page of query ordered by sort_keys.
+
+    sort_keys is a list of (column, descending) pairs ending in a unique
+    column so the order is total. Returns (items, next_cursor), with
+    next_cursor None on the last page.
+    """
+    values = decode_cursor(cursor, len(sort_keys))
+    return _page(_page_rows(query, sort_keys, values, limit + 1), limit)
+
+def keyset_paginate_each(query, column, keys, sort_keys, cursor=None, limit=20):
+    """Fetch one page of query filtered to column IN keys, like keyset_paginate.
+
+    Each key is paged by its own query and the pages are merged, so an
+    index on (column, *sort columns) returns rows already in order where
+    one query over the whole IN list would sort every matching row.
+    """
+    values = decode_cursor(cursor, len(sort_keys))
+    rows = []
+    for key in keys:
+        rows.extend(_page_rows(query.filter(column == key), sort_keys, values, limit + 1))
+    # Stable sorts from the last sort key to the first handle mixed directions.
+    for position in reversed(range(len(sort_keys))):
+        rows.sort(key=lambda row: row[position + 1], reverse=sort_keys[position][1])
+    return _page(rows[:limit + 1], limit)
@@ -0,0 +1,75 @@
+"""Base class for background workers that run a job on a timer.
+
+A PeriodicThread subclass implements run_once(); start() launches a daemon
+thread calling it every interval seconds until stop(), wake() runs it
+early, and the worker is stopped at interpreter exit. Errors from run_once() are logged and the
+thread carries on.
+"""
+
+import logging
+import threading
+
+from app.utils.shutdown import stop_at_exit
+
+logger = logging.getLogger(__name__)
+
+class PeriodicThread:
+    """Daemon thread calling run_once() every interval seconds.
+
+    With run_first set the job also runs as soon as the thread starts;
+    otherwise the first run comes one interval later. An interval of 0
+    never starts the thread.
+    """
+    
+    thread_name = 'periodic'
+    run_first = False
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        stop_at_exit(self)
+    
+    def run_once(self):
+        """Run the job once; subclasses implement this."""
+        raise NotImplementedError
+    
+    def start(self):
+        """Start the thread; later calls do nothing."""
+        if self._thread is not None or not self.interval:
+            return
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+    
+    def wake(self):
+        """Run the job as soon as the thread is free, instead of at the next interval."""
+        self._wake.set()
+    
+    def stop(self, timeout=5):
+        """Stop the thread, waiting up to timeout seconds for a run in progress."""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _run(self):
+        if self.run_first:
+            self._run_logged()
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self._run_logged()
+    
+    def _run_logged(self):
+        try:
+            self.run_once()
+        except Exception as e:
+            logger.warning(f"{self.thread_name} failed: {e}")
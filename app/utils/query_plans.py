@@ -0,0 +1,62 @@
+"""SQLite query plan helpers for spotting queries that miss an index.
+
+capture_queries() records the SELECTs an engine runs, explain_query_plan()
+replays one under EXPLAIN QUERY PLAN, full_scans() picks out the tables
+a plan reads row by row instead of through an index and temp_sorts() the
+tables a plan sorts in full instead of reading in index order.
+"""
+
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# Plan lines like "SCAN orders" or "SCAN orders_1" (an alias); index scans
+# such as "SCAN orders USING INDEX ix_..." walk an index in order and are fine.
+_SCAN = re.compile(r'^SCAN (\w+)$')
+# Sorting every matching row before the first is returned. "FOR RIGHT PART
+# OF ORDER BY" only sorts the rows sharing the leading sort key, and a
+# grouped query sorts its groups rather than table rows; both are fine.
+_TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+AS\s+"?(\w+)"?)?', re.IGNORECASE)
+
+@contextmanager
+def capture_queries(engine):
+    """Collect (statement, parameters) for every SELECT run on engine."""
+    queries = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            queries.append((statement, parameters))
+    
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def explain_query_plan(connection, statement, parameters=()):
+    """Get the EXPLAIN QUERY PLAN detail lines for a statement."""
+    cursor = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+    return [row[-1] for row in cursor]
+
+def full_scans(plan, tables, statement=''):
+    """List the tables in tables that a plan scans without an index.
+
+    Pass the statement so aliased tables (orders AS orders_1) are resolved.
+    """
+    aliases = {alias: table for table, alias in _TABLE_REF.findall(statement) if alias}
+    scanned = []
+    for detail in plan:
+        match = _SCAN.match(detail.strip())
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in tables:
+                scanned.append(table)
+    return scanned
+
+def temp_sorts(plan, tables, statement):
+    """List the tables in tables read by a statement whose plan sorts its whole result."""
+    if 'GROUP BY' in statement.upper() or not any(detail.strip() == _TEMP_SORT for detail in plan):
+        return []
+    return sorted({table for table, _ in _TABLE_REF.findall(statement) if table in tables})
@@ -0,0 +1,26 @@
+"""One process-exit hook for background workers.
+
+Workers register here instead of calling atexit.register themselves, so a
+process that creates many apps (the test suite, benchmarks) neither keeps
+every worker alive until exit nor piles up one exit hook per app.
+"""
+
+import atexit
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_workers = weakref.WeakSet()
+
+def stop_at_exit(worker):
+    """Call worker.stop() at interpreter exit, unless it has been garbage collected first."""
+    _workers.add(worker)
+
+@atexit.register
+def _stop_workers():
+    for worker in list(_workers):
+        try:
+            worker.stop()
+        except Exception as e:
+            logger.error(f"Stopping {worker!r} at exit failed: {e}")
@@ -0,0 +1,158 @@
+"""Benchmark checkout latency under concurrent load.
+
+Places orders for 1 to 50-line carts from several threads against a file
+SQLite database and reports p50/p99 latency per cart size, for the
+set-based checkout (app.services.checkout) and for the previous per-line
+flow it replaced.
+
+Usage: python benchmarks/bench_checkout.py [--threads 8] [--orders 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import (  # noqa: E402
+    Customer,
+    MenuItem,
+    Order,
+    OrderItem,
+    Restaurant,
+    RestaurantOwner,
+    User,
+)
+from app.models import ROLE_CUSTOMER, ROLE_OWNER, STATUS_PENDING  # noqa: E402
+from app.services.checkout import place_order, price_cart  # noqa: E402
+from app.services.order_counters import record_order  # noqa: E402
+
+CART_SIZES = (1, 5, 10, 25, 50)
+
+def seed(customers):
+    """Create one restaurant with 50 dishes and some customers."""
+    owner_user = User(username='bench_owner', email='owner@bench.local', role=ROLE_OWNER)
+    owner_user.set_password('bench')
+    db.session.add(owner_user)
+    db.session.flush()
+    owner = RestaurantOwner(user_id=owner_user.id, name='Bench Owner')
+    db.session.add(owner)
+    db.session.flush()
+    restaurant = Restaurant(owner_id=owner.id, name='Bench Kitchen',
+                            description='Benchmark restaurant', location='Bench Street')
+    db.session.add(restaurant)
+    db.session.flush()
+    db.session.add_all([
+        MenuItem(restaurant_id=restaurant.id, name=f'Dish {i}', price=100 + i, category='main_course')
+        for i in range(max(CART_SIZES))
+    ])
+    customer_ids = []
+    for i in range(customers):
+        user = User(username=f'bench_customer_{i}', email=f'c{i}@bench.local', role=ROLE_CUSTOMER)
+        user.password_hash = owner_user.password_hash
+        db.session.add(user)
+        db.session.flush()
+        customer = Customer(user_id=user.id, name=f'Customer {i}')
+        db.session.add(customer)
+        db.session.flush()
+        customer_ids.append(customer.id)
+    db.session.commit()
+    return customer_ids, [item.id for item in MenuItem.query.order_by(MenuItem.id)]
+
+def legacy_checkout(customer_id, cart):
+    """The per-line checkout flow this benchmark compares against."""
+    item_ids = [int(item_id) for item_id in cart]
+    menu_items = MenuItem.query.filter(MenuItem.id.in_(item_ids)).all()
+    lines, total, restaurant_id = [], 0, None
+    for item in menu_items:
+        quantity = int(cart[str(item.id)])
+        total += item.price * quantity
+        lines.append((item.id, quantity))
+        if restaurant_id is None:
+            restaurant_id = item.restaurant_id
+            db.session.get(Restaurant, restaurant_id)
+    order = Order(customer_id=customer_id, restaurant_id=restaurant_id,
+                  status=STATUS_PENDING, total_amount=total)
+    db.session.add(order)
+    db.session.flush()
+    for item_id, quantity in lines:
+        menu_item = db.session.get(MenuItem, item_id)
+        db.session.add(OrderItem(order_id=order.id, menu_item_id=item_id,
+                                 quantity=quantity, price=menu_item.price))
+    db.session.commit()
+    for item_id, quantity in lines:
+        record_order(item_id, quantity)
+    return order
+
+def set_based_checkout(customer_id, cart):
+    return place_order(customer_id, price_cart(cart))
+
+def run(app, checkout, customer_ids, item_ids, cart_size, threads, orders):
+    """Place orders from threads; return per-checkout latencies in ms."""
+    cart = {str(item_id): 1 + i % 3 for i, item_id in enumerate(item_ids[:cart_size])}
+    latencies, errors = [], []
+    lock = threading.Lock()
+    per_thread = max(1, orders // threads)
+    
+    def worker(index):
+        with app.app_context():
+            samples = []
+            for n in range(per_thread):
+                customer_id = customer_ids[(index + n) % len(customer_ids)]
+                start = time.perf_counter()
+                try:
+                    checkout(customer_id, cart)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(e)
+                    continue
+                samples.append((time.perf_counter() - start) * 1000)
+            db.session.remove()
+            with lock:
+                latencies.extend(samples)
+    
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=200, help='orders per cart size and flow')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        })
+        with app.app_context():
+            db.create_all()
+            customer_ids, item_ids = seed(customers=args.threads * 4)
+        
+        print(f"{'flow':<10} {'lines':>5} {'orders':>6} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+        for name, checkout in (('per-line', legacy_checkout), ('set-based', set_based_checkout)):
+            for cart_size in CART_SIZES:
+                latencies, errors = run(app, checkout, customer_ids, item_ids,
+                                        cart_size, args.threads, args.orders)
+                print(f"{name:<10} {cart_size:>5} {len(latencies):>6} "
+                      f"{statistics.median(latencies):>8.2f} {percentile(latencies, 99):>8.2f} "
+                      f"{len(errors):>6}")
+        app.extensions['order_counter'].stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark order ingestion with and without the group-commit writer.
+
+Several threads place 5-line orders and move orders through their
+statuses against a file SQLite database, first committing directly from
+each thread and then through the group-commit writer
+(app.services.write_queue). Reports throughput, p50/p99 latency and how
+many writes failed, e.g. with "database is locked".
+
+Usage: python benchmarks/bench_group_commit.py [--threads 16] [--writes 2000] [--busy-timeout 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import STATUS_CONFIRMED  # noqa: E402
+from app.services.checkout import place_order, price_cart  # noqa: E402
+from app.services.order_timing import set_order_status  # noqa: E402
+from app.services.write_queue import run_write  # noqa: E402
+from bench_checkout import percentile, seed  # noqa: E402
+
+CART_SIZE = 5
+
+def run(app, customer_ids, item_ids, threads, writes):
+    """Alternate checkouts and status updates from threads.
+
+    Returns (elapsed seconds, per-write latencies in ms, errors).
+    """
+    cart = {str(item_id): 1 + i % 3 for i, item_id in enumerate(item_ids[:CART_SIZE])}
+    latencies, errors = [], []
+    lock = threading.Lock()
+    per_thread = max(1, writes // threads)
+    
+    def worker(index):
+        with app.app_context():
+            samples, order_id = [], None
+            for n in range(per_thread):
+                start = time.perf_counter()
+                try:
+                    if order_id is None:
+                        customer_id = customer_ids[(index + n) % len(customer_ids)]
+                        order_id = place_order(customer_id, price_cart(cart)).id
+                    else:
+                        run_write(set_order_status, order_id, STATUS_CONFIRMED)
+                        order_id = None
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(e)
+                    continue
+                samples.append((time.perf_counter() - start) * 1000)
+            db.session.remove()
+            with lock:
+                latencies.extend(samples)
+    
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=2000, help='writes per mode')
+    parser.add_argument('--busy-timeout', type=float, default=5,
+                        help='seconds SQLite waits for the write lock before failing')
+    args = parser.parse_args()
+    
+    print(f"{'mode':<13} {'writes':>6} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'batches':>7}")
+    for mode, queued in (('direct', False), ('group-commit', True)):
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app({
+                'TESTING': True,
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                'SQLITE_PRAGMAS': {'busy_timeout': int(args.busy_timeout * 1000)},
+                'WRITE_QUEUE_ENABLED': queued,
+            })
+            with app.app_context():
+                db.create_all()
+                customer_ids, item_ids = seed(customers=args.threads * 4)
+            
+            elapsed, latencies, errors = run(app, customer_ids, item_ids, args.threads, args.writes)
+            writer = app.extensions.get('write_queue')
+            batches = writer.batches if writer else len(latencies)
+            print(f"{mode:<13} {len(latencies):>6} {len(latencies) / elapsed:>9.0f} "
+                  f"{statistics.median(latencies):>8.2f} {percentile(latencies, 99):>8.2f} "
+                  f"{len(errors):>6} {batches:>7}")
+            if writer:
+                writer.stop()
+            app.extensions['order_counter'].stop()
+
+if __name__ == '__main__':
+    main()
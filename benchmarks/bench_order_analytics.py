@@ -0,0 +1,113 @@
+"""Benchmark the reports page demand and basket analytics.
+
+Seeds one restaurant with orders spread over the analytics window and
+times order_analytics() cold and warm (per-day cache), with the NumPy
+reductions when NumPy is installed and with the pure-Python fallback,
+against a per-row ORM computation of the same numbers.
+
+Usage: python benchmarks/bench_order_analytics.py [--orders 20000] [--dishes 60]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import combinations
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import MenuItem, Order, OrderItem, Restaurant  # noqa: E402
+from app.models import STATUS_CANCELLED, STATUS_COMPLETED  # noqa: E402
+from app.services import order_analytics  # noqa: E402
+
+def seed(orders, dishes, days):
+    """Bulk insert orders with 1-6 distinct dishes each over the last days."""
+    restaurant = Restaurant(owner_id=1, name='Bench Kitchen', location='Bench Street')
+    db.session.add(restaurant)
+    db.session.flush()
+    db.session.execute(insert(MenuItem), [
+        {'restaurant_id': restaurant.id, 'name': f'Dish {i}', 'price': 100 + i, 'category': 'main_course'}
+        for i in range(dishes)
+    ])
+    item_ids = [item_id for (item_id,) in db.session.query(MenuItem.id)]
+    
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    baskets = [rng.sample(item_ids, rng.randint(1, 6)) for _ in range(orders)]
+    db.session.execute(insert(Order), [{
+        'customer_id': 1,
+        'restaurant_id': restaurant.id,
+        'status': STATUS_COMPLETED,
+        'total_amount': 100.0 * len(basket),
+        'item_count': len(basket),
+        'created_at': now - timedelta(seconds=rng.randrange(days * 86400)),
+    } for basket in baskets])
+    order_ids = [order_id for (order_id,) in db.session.query(Order.id).order_by(Order.id)]
+    db.session.execute(insert(OrderItem), [
+        {'order_id': order_id, 'menu_item_id': item_id, 'quantity': 1, 'price': 100.0}
+        for order_id, basket in zip(order_ids, baskets) for item_id in basket
+    ])
+    db.session.commit()
+    return restaurant.id
+
+def per_row(restaurant_id, days):
+    """Compute the same numbers from ORM objects, one order at a time."""
+    since = datetime.combine(datetime.utcnow().date() - timedelta(days=days - 1), datetime.min.time())
+    heatmap = [[0] * 24 for _ in range(7)]
+    sizes, pairs = Counter(), Counter()
+    orders = Order.query.filter(Order.restaurant_id == restaurant_id, Order.created_at >= since,
+                                Order.status != STATUS_CANCELLED).all()
+    for order in orders:
+        items = order.items.all()  # Order.items is a dynamic relationship: one query per order.
+        heatmap[order.created_at.weekday()][order.created_at.hour] += 1
+        sizes[sum(item.quantity for item in items)] += 1
+        pairs.update(combinations(sorted({item.menu_item_id for item in items}), 2))
+    return len(orders)
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--dishes', type=int, default=60)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        })
+        with app.app_context():
+            db.create_all()
+            days = app.config['ANALYTICS_DAYS']
+            restaurant_id = seed(args.orders, args.dishes, days)
+            cache = app.extensions['order_analytics_cache']
+            
+            print(f"{'method':<22} {'ms':>9} {'orders':>7}")
+            elapsed, count = timed(per_row, restaurant_id, days)
+            print(f"{'per-row ORM':<22} {elapsed:>9.1f} {count:>7}")
+            
+            flows = [('pure Python', None)]
+            if order_analytics.np is not None:
+                flows.append(('NumPy', order_analytics.np))
+            for name, module in flows:
+                with patch.object(order_analytics, 'np', module):
+                    cache.clear()
+                    elapsed, result = timed(order_analytics.order_analytics, restaurant_id)
+                    print(f"{name + ' cold':<22} {elapsed:>9.1f} {result.orders:>7}")
+                    elapsed, result = timed(order_analytics.order_analytics, restaurant_id)
+                    print(f"{name + ' warm cache':<22} {elapsed:>9.1f} {result.orders:>7}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark the SQLite engine profiles under a mixed read/write load.
+
+For each profile (app.services.sqlite_engine) a file SQLite database is
+seeded, then writer threads place orders while reader threads page
+through the owner order board for a fixed time. Reports reads and writes
+per second, p50/p99 latency, failed operations (e.g. "database is
+locked") and the WAL file size left behind.
+
+Usage: python benchmarks/bench_sqlite_profile.py [--readers 8] [--writers 4] [--seconds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Order  # noqa: E402
+from app.services.checkout import place_order, price_cart  # noqa: E402
+from app.services.sqlite_engine import SQLITE_PROFILES  # noqa: E402
+from bench_checkout import percentile, seed  # noqa: E402
+
+CART_SIZE = 5
+
+def read_board(restaurant_id):
+    """One owner order board page: the newest orders and a per-status count."""
+    Order.query.filter(Order.restaurant_id == restaurant_id)\
+        .order_by(Order.created_at.desc()).limit(20).all()
+    db.session.query(Order.status, func.count(Order.id))\
+        .filter(Order.restaurant_id == restaurant_id).group_by(Order.status).all()
+
+def run(app, customer_ids, item_ids, readers, writers, seconds):
+    """Run readers and writers until seconds elapse.
+
+    Returns {'read'|'write': (latencies in ms, errors)}.
+    """
+    cart = {str(item_id): 1 + i % 3 for i, item_id in enumerate(item_ids[:CART_SIZE])}
+    results = {'read': ([], []), 'write': ([], [])}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    
+    def worker(kind, index):
+        with app.app_context():
+            restaurant_id = price_cart(cart).restaurant_id
+            samples, errors = [], []
+            n = 0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        place_order(customer_ids[(index + n) % len(customer_ids)], price_cart(cart))
+                    else:
+                        read_board(restaurant_id)
+                        db.session.rollback()  # End the read transaction like a request would.
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+                else:
+                    samples.append((time.perf_counter() - start) * 1000)
+                n += 1
+            db.session.remove()
+            with lock:
+                results[kind][0].extend(samples)
+                results[kind][1].extend(errors)
+    
+    pool = [threading.Thread(target=worker, args=('write', i)) for i in range(writers)]
+    pool += [threading.Thread(target=worker, args=('read', i)) for i in range(readers)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5, help='run time per profile')
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES), choices=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+    
+    print(f"{'profile':<8} {'op':<5} {'ops/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'wal KiB':>8}")
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.db')
+            app = create_app({
+                'TESTING': True,
+                'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+                'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': args.readers + args.writers},
+                'SQLITE_PROFILE': profile,
+                'SQLITE_CHECKPOINT_INTERVAL': 1,
+            })
+            with app.app_context():
+                db.create_all()
+                customer_ids, item_ids = seed(customers=args.writers * 4)
+            
+            results = run(app, customer_ids, item_ids, args.readers, args.writers, args.seconds)
+            app.extensions['order_counter'].stop()
+            app.extensions['sqlite_checkpointer'].stop()
+            wal = os.path.getsize(path + '-wal') / 1024 if os.path.exists(path + '-wal') else 0
+            for kind, (latencies, errors) in results.items():
+                print(f"{profile:<8} {kind:<5} {len(latencies) / args.seconds:>7.0f} "
+                      f"{statistics.median(latencies) if latencies else 0:>8.2f} "
+                      f"{percentile(latencies, 99) if latencies else 0:>8.2f} {len(errors):>6} {wal:>8.0f}")
+            with app.app_context():
+                db.engine.dispose()
+
+if __name__ == '__main__':
+    main()
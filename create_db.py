@@ -14,6 +14,8 @@ from app.models import (
     User,
 )
 from app.models import ROLE_CUSTOMER, ROLE_OWNER, STATUS_COMPLETED
+from app.services.ratings import record_feedback
+from app.services.sales_rollup import record_sale
 
 # Create app context.
 app = create_app()
@@ -118,6 +120,8 @@ with app.app_context():
         
         for item in menu_items:
             db.session.add(item)
+        db.session.flush()
+        restaurant.refresh_dietary_flags()
     
         # Create a completed order for testing feedback.
         completed_order = Order(
@@ -151,6 +155,10 @@ with app.app_context():
             ]
             for item in order_items:
                 db.session.add(item)
+            completed_order.refresh_item_summary()
+            record_sale(completed_order.restaurant_id, completed_order.created_at,
+                        completed_order.total_amount,
+                        [(item.menu_item_id, item.quantity) for item in order_items])
             
             # Add feedback for the completed order.
             feedback = Feedback(
@@ -163,6 +171,7 @@ with app.app_context():
                 response="Thank you for your kind feedback! We're glad you enjoyed our Biryani. Looking forward to serving you again soon!"
             )
             db.session.add(feedback)
+            record_feedback(feedback)
 
     # Add a second owner (idempotent).
     if User.query.filter_by(username='owner2').first() is None:
@@ -0,0 +1,48 @@
+"""Add rating aggregate columns to restaurants and menu_items
+
+Revision ID: a3e1c5d7f902
+Revises: 7916d7504663
+Create Date: 2026-10-17 09:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e1c5d7f902'
+down_revision = '7916d7504663'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('restaurants', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('menu_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing ratings.
+    op.execute(
+        "UPDATE restaurants SET "
+        "rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM feedback WHERE feedback.restaurant_id = restaurants.id), "
+        "rating_count = (SELECT COUNT(id) FROM feedback WHERE feedback.restaurant_id = restaurants.id)"
+    )
+    op.execute(
+        "UPDATE menu_items SET "
+        "rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM dish_ratings WHERE dish_ratings.menu_item_id = menu_items.id), "
+        "rating_count = (SELECT COUNT(id) FROM dish_ratings WHERE dish_ratings.menu_item_id = menu_items.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('menu_items', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
+
+    with op.batch_alter_table('restaurants', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
@@ -0,0 +1,41 @@
+"""Add restaurant_hourly_stats rollup table
+
+Revision ID: a6d2e8f4c390
+Revises: f3b9d5e1a827
+Create Date: 2026-10-17 17:22:05.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2e8f4c390'
+down_revision = 'f3b9d5e1a827'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('restaurant_hourly_stats',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('items_sold', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('restaurant_id', 'hour')
+    )
+
+    # Backfill from existing orders; 'flask backfill-daily-stats' does the same.
+    op.execute(
+        "INSERT INTO restaurant_hourly_stats (restaurant_id, hour, orders, revenue, items_sold) "
+        "SELECT restaurant_id, strftime('%Y-%m-%d %H:00:00.000000', created_at), count(id), "
+        "sum(total_amount), sum(item_count) "
+        "FROM orders WHERE status != 'cancelled' "
+        "GROUP BY restaurant_id, strftime('%Y-%m-%d %H:00:00.000000', created_at)"
+    )
+
+
+def downgrade():
+    op.drop_table('restaurant_hourly_stats')
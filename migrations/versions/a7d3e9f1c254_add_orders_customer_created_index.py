@@ -0,0 +1,26 @@
+"""Add orders (customer_id, created_at) index
+
+Revision ID: a7d3e9f1c254
+Revises: f2c6d8a4b193
+Create Date: 2026-10-17 14:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9f1c254'
+down_revision = 'f2c6d8a4b193'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_customer_created', ['customer_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_customer_created')
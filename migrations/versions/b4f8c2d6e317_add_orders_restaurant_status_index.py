@@ -0,0 +1,27 @@
+"""Add orders (restaurant_id, status, created_at) index
+
+Revision ID: b4f8c2d6e317
+Revises: a7d3e9f1c254
+Create Date: 2026-10-17 14:41:09.873142
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f8c2d6e317'
+down_revision = 'a7d3e9f1c254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_restaurant_status_created',
+                              ['restaurant_id', 'status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_restaurant_status_created')
@@ -0,0 +1,46 @@
+"""Add indexes for hot feedback, dish rating, menu and order item queries
+
+Revision ID: b7e3f9a5d104
+Revises: a6d2e8f4c390
+Create Date: 2026-10-17 21:12:44.603318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f9a5d104'
+down_revision = 'a6d2e8f4c390'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('feedback', schema=None) as batch_op:
+        batch_op.create_index('ix_feedback_restaurant_created', ['restaurant_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('dish_ratings', schema=None) as batch_op:
+        batch_op.create_index('ix_dish_ratings_restaurant_created', ['restaurant_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_dish_ratings_menu_item_rating', ['menu_item_id', 'rating'], unique=False)
+
+    with op.batch_alter_table('menu_items', schema=None) as batch_op:
+        batch_op.create_index('ix_menu_items_restaurant_category', ['restaurant_id', 'category'], unique=False)
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.create_index('ix_order_items_order_menu_item', ['order_id', 'menu_item_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_items_order_menu_item')
+
+    with op.batch_alter_table('menu_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_menu_items_restaurant_category')
+
+    with op.batch_alter_table('dish_ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_dish_ratings_menu_item_rating')
+        batch_op.drop_index('ix_dish_ratings_restaurant_created')
+
+    with op.batch_alter_table('feedback', schema=None) as batch_op:
+        batch_op.drop_index('ix_feedback_restaurant_created')
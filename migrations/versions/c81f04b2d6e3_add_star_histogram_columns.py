@@ -0,0 +1,42 @@
+"""Add star histogram columns to restaurants and menu_items
+
+Revision ID: c81f04b2d6e3
+Revises: a3e1c5d7f902
+Create Date: 2026-10-17 10:02:17.540931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f04b2d6e3'
+down_revision = 'a3e1c5d7f902'
+branch_labels = None
+depends_on = None
+
+STARS = range(1, 6)
+
+
+def upgrade():
+    for table in ('restaurants', 'menu_items'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for stars in STARS:
+                batch_op.add_column(sa.Column(f'stars_{stars}', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing ratings.
+    for table, ratings_table, foreign_key in (('restaurants', 'feedback', 'restaurant_id'),
+                                              ('menu_items', 'dish_ratings', 'menu_item_id')):
+        assignments = ', '.join(
+            f"stars_{stars} = (SELECT COUNT(id) FROM {ratings_table} "
+            f"WHERE {ratings_table}.{foreign_key} = {table}.id AND {ratings_table}.rating = {stars})"
+            for stars in STARS
+        )
+        op.execute(f"UPDATE {table} SET {assignments}")
+
+
+def downgrade():
+    for table in ('menu_items', 'restaurants'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for stars in reversed(STARS):
+                batch_op.drop_column(f'stars_{stars}')
@@ -0,0 +1,26 @@
+"""Add an orders (restaurant_id, created_at, id) index
+
+Revision ID: c8f4a0b6e215
+Revises: b7e3f9a5d104
+Create Date: 2026-10-17 23:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f4a0b6e215'
+down_revision = 'b7e3f9a5d104'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_restaurant_created', ['restaurant_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_restaurant_created')
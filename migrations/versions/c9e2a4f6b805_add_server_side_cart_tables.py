@@ -0,0 +1,44 @@
+"""Add carts and cart_items tables for the server-side cart store
+
+Revision ID: c9e2a4f6b805
+Revises: b4f8c2d6e317
+Create Date: 2026-10-17 15:06:44.218371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e2a4f6b805'
+down_revision = 'b4f8c2d6e317'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('carts',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_table('cart_items',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['carts.customer_id'], ),
+    sa.ForeignKeyConstraint(['menu_item_id'], ['menu_items.id'], ),
+    sa.PrimaryKeyConstraint('customer_id', 'menu_item_id')
+    )
+
+
+def downgrade():
+    op.drop_table('cart_items')
+    op.drop_table('carts')
@@ -0,0 +1,67 @@
+"""Add stored item_count and items_summary to orders
+
+Revision ID: d1f7b3a9e462
+Revises: c9e2a4f6b805
+Create Date: 2026-10-17 15:32:18.504127
+
+"""
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f7b3a9e462'
+down_revision = 'c9e2a4f6b805'
+branch_labels = None
+depends_on = None
+
+
+SUMMARY_LENGTH = 255
+
+
+def _summary(lines):
+    # Mirrors app.models.order.format_items_summary at the time of writing.
+    parts = [f'{quantity}× {name}' for quantity, name in lines]
+    summary = ', '.join(parts)
+    if len(summary) <= SUMMARY_LENGTH:
+        return summary
+    for keep in range(len(parts) - 1, 0, -1):
+        summary = f"{', '.join(parts[:keep])} +{len(parts) - keep} more"
+        if len(summary) <= SUMMARY_LENGTH:
+            return summary
+    return parts[0][:SUMMARY_LENGTH - 1] + '…'
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('items_summary', sa.String(length=SUMMARY_LENGTH), nullable=True))
+
+    # Backfill from existing order lines.
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT order_items.order_id, order_items.quantity, menu_items.name '
+        'FROM order_items JOIN menu_items ON menu_items.id = order_items.menu_item_id '
+        'ORDER BY order_items.order_id, order_items.id'
+    )).all()
+    params = []
+    for order_id, lines in groupby(rows, key=lambda row: row[0]):
+        lines = [(quantity, name) for _, quantity, name in lines]
+        params.append({
+            'order_id': order_id,
+            'item_count': sum(quantity for quantity, _ in lines),
+            'items_summary': _summary(lines),
+        })
+    if params:
+        bind.execute(sa.text(
+            'UPDATE orders SET item_count = :item_count, items_summary = :items_summary '
+            'WHERE id = :order_id'
+        ), params)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('items_summary')
+        batch_op.drop_column('item_count')
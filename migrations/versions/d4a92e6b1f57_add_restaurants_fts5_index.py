@@ -0,0 +1,57 @@
+"""Add FTS5 full-text index over restaurants
+
+Revision ID: d4a92e6b1f57
+Revises: c81f04b2d6e3
+Create Date: 2026-10-17 11:20:05.871344
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a92e6b1f57'
+down_revision = 'c81f04b2d6e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    try:
+        op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS restaurants_fts USING fts5(
+            name, description, location, cuisines,
+            content='restaurants', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""")
+    except sa.exc.OperationalError:
+        # SQLite built without FTS5: search falls back to LIKE.
+        return
+    op.execute("""CREATE TRIGGER IF NOT EXISTS restaurants_fts_ai AFTER INSERT ON restaurants BEGIN
+        INSERT INTO restaurants_fts(rowid, name, description, location, cuisines)
+        VALUES (new.id, new.name, new.description, new.location, new.cuisines);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS restaurants_fts_ad AFTER DELETE ON restaurants BEGIN
+        INSERT INTO restaurants_fts(restaurants_fts, rowid, name, description, location, cuisines)
+        VALUES ('delete', old.id, old.name, old.description, old.location, old.cuisines);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS restaurants_fts_au
+        AFTER UPDATE OF name, description, location, cuisines ON restaurants BEGIN
+        INSERT INTO restaurants_fts(restaurants_fts, rowid, name, description, location, cuisines)
+        VALUES ('delete', old.id, old.name, old.description, old.location, old.cuisines);
+        INSERT INTO restaurants_fts(rowid, name, description, location, cuisines)
+        VALUES (new.id, new.name, new.description, new.location, new.cuisines);
+    END""")
+    # Index existing rows.
+    op.execute("INSERT INTO restaurants_fts(restaurants_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS restaurants_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS restaurants_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS restaurants_fts_ai")
+    op.execute("DROP TABLE IF EXISTS restaurants_fts")
@@ -0,0 +1,50 @@
+"""Add restaurant_cuisines association table
+
+Revision ID: e5b7a1c9d024
+Revises: d4a92e6b1f57
+Create Date: 2026-10-17 12:05:51.204417
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7a1c9d024'
+down_revision = 'd4a92e6b1f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    restaurant_cuisines = op.create_table('restaurant_cuisines',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('cuisine', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('restaurant_id', 'cuisine')
+    )
+    op.create_index('ix_restaurant_cuisines_cuisine', 'restaurant_cuisines', ['cuisine', 'restaurant_id'], unique=False)
+
+    # Backfill from the JSON cuisines column.
+    rows = []
+    for restaurant_id, cuisines in op.get_bind().execute(sa.text('SELECT id, cuisines FROM restaurants')):
+        try:
+            data = json.loads(cuisines) if cuisines else []
+        except ValueError:
+            continue
+        if not isinstance(data, list):
+            continue
+        seen = set()
+        for cuisine in data:
+            if isinstance(cuisine, str) and cuisine.strip() and cuisine.strip() not in seen:
+                seen.add(cuisine.strip())
+                rows.append({'restaurant_id': restaurant_id, 'cuisine': cuisine.strip()})
+    if rows:
+        op.bulk_insert(restaurant_cuisines, rows)
+
+
+def downgrade():
+    op.drop_index('ix_restaurant_cuisines_cuisine', table_name='restaurant_cuisines')
+    op.drop_table('restaurant_cuisines')
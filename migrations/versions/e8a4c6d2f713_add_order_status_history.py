@@ -0,0 +1,52 @@
+"""Add order_status_events history and order_status_latency histograms
+
+Revision ID: e8a4c6d2f713
+Revises: d1f7b3a9e462
+Create Date: 2026-10-17 16:04:51.339208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a4c6d2f713'
+down_revision = 'd1f7b3a9e462'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_status_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', sa.String(length=20), nullable=True),
+    sa.Column('to_status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('order_status_events', schema=None) as batch_op:
+        batch_op.create_index('ix_order_status_events_order_created', ['order_id', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_status_events_restaurant_id'), ['restaurant_id'], unique=False)
+
+    op.create_table('order_status_latency',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('restaurant_id', 'status', 'bucket')
+    )
+
+
+def downgrade():
+    op.drop_table('order_status_latency')
+    with op.batch_alter_table('order_status_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_status_events_restaurant_id'))
+        batch_op.drop_index('ix_order_status_events_order_created')
+
+    op.drop_table('order_status_events')
@@ -0,0 +1,47 @@
+"""Add precomputed dietary flags to restaurants
+
+Revision ID: f2c6d8a4b193
+Revises: e5b7a1c9d024
+Create Date: 2026-10-17 13:18:02.640915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6d8a4b193'
+down_revision = 'e5b7a1c9d024'
+branch_labels = None
+depends_on = None
+
+
+FLAGS = (
+    ('has_vegetarian', 'is_vegetarian = 1', True),
+    ('has_vegan', 'is_vegan = 1', True),
+    ('has_guilt_free', 'is_guilt_free = 1', True),
+    ('has_non_vegetarian', 'is_vegetarian = 0', False),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('restaurants', schema=None) as batch_op:
+        for column, _, indexed in FLAGS:
+            batch_op.add_column(sa.Column(column, sa.Boolean(), server_default='0', nullable=False))
+            if indexed:
+                batch_op.create_index(batch_op.f(f'ix_restaurants_{column}'), [column], unique=False)
+
+    # Backfill from existing menu items.
+    for column, condition, _ in FLAGS:
+        op.execute(
+            f'UPDATE restaurants SET {column} = EXISTS ('
+            f'SELECT 1 FROM menu_items WHERE menu_items.restaurant_id = restaurants.id AND {condition})'
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('restaurants', schema=None) as batch_op:
+        for column, _, indexed in reversed(FLAGS):
+            if indexed:
+                batch_op.drop_index(batch_op.f(f'ix_restaurants_{column}'))
+            batch_op.drop_column(column)
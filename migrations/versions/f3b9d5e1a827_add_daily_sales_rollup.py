@@ -0,0 +1,61 @@
+"""Add restaurant_daily_stats and menu_item_daily_stats rollup tables
+
+Revision ID: f3b9d5e1a827
+Revises: e8a4c6d2f713
+Create Date: 2026-10-17 16:41:27.915063
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d5e1a827'
+down_revision = 'e8a4c6d2f713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('restaurant_daily_stats',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('items_sold', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('restaurant_id', 'day')
+    )
+    op.create_table('menu_item_daily_stats',
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['menu_item_id'], ['menu_items.id'], ),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id'], ),
+    sa.PrimaryKeyConstraint('menu_item_id', 'day')
+    )
+    with op.batch_alter_table('menu_item_daily_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_menu_item_daily_stats_restaurant_day', ['restaurant_id', 'day'], unique=False)
+
+    # Backfill from existing orders; 'flask backfill-daily-stats' does the same.
+    op.execute(
+        "INSERT INTO restaurant_daily_stats (restaurant_id, day, orders, revenue, items_sold) "
+        "SELECT restaurant_id, date(created_at), count(id), sum(total_amount), sum(item_count) "
+        "FROM orders WHERE status != 'cancelled' GROUP BY restaurant_id, date(created_at)"
+    )
+    op.execute(
+        "INSERT INTO menu_item_daily_stats (menu_item_id, day, restaurant_id, quantity) "
+        "SELECT order_items.menu_item_id, date(orders.created_at), orders.restaurant_id, sum(order_items.quantity) "
+        "FROM order_items JOIN orders ON orders.id = order_items.order_id "
+        "WHERE orders.status != 'cancelled' "
+        "GROUP BY order_items.menu_item_id, date(orders.created_at), orders.restaurant_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('menu_item_daily_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_menu_item_daily_stats_restaurant_day')
+
+    op.drop_table('menu_item_daily_stats')
+    op.drop_table('restaurant_daily_stats')
@@ -1,8 +1,16 @@
 """Tests for database models."""
 
+import csv
+import gzip
+import io
 import json
 import os
+import tempfile
+import threading
+import time
 import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
 
 from app import create_app, db
 from app.models import (
@@ -11,10 +19,43 @@ from app.models import (
     Order,
     OrderItem,
     Restaurant,
+    RestaurantCuisine,
+    RestaurantHourlyStats,
     RestaurantOwner,
     User,
 )
+from app.models import DishRating, Feedback
 from app.models import ROLE_CUSTOMER, ROLE_OWNER
+from app.services.checkout import place_order, price_cart
+from app.services.cart_store import CartRestaurantMismatch, CartStore, MemoryCartBackend, SQLCartBackend
+from app.services import order_counters as order_counters_module
+from app.services.order_counters import get_order_counter, record_order
+from app.services.dish_search import DishIndex
+from app.services import order_analytics as order_analytics_module
+from app.services.order_analytics import compute_day_stats, order_analytics
+from app.services.order_events import OrderEventBroker, SpoolTransport
+from app.services.order_export import CSV_COLUMNS, export_orders, gzip_chunks
+from app.services.order_timing import (
+    kitchen_latency,
+    rebuild_status_latency,
+    record_status_change,
+    set_order_status,
+)
+from app.services.restaurant_search import filter_restaurants, search_index_available
+from app.services.sqlite_engine import profile_pragmas
+from app.services.sales_rollup import (
+    best_sellers,
+    rebuild_daily_stats,
+    record_sale,
+    sales_report,
+    sales_totals,
+)
+from app.services.write_queue import GroupCommitWriter, run_write
+from app.services.ratings import (
+    rebuild_rating_aggregates,
+    record_dish_rating,
+    record_feedback,
+)
 
 class TestModels(unittest.TestCase):
     """Test cases for database models."""
@@ -29,7 +70,7 @@ class TestModels(unittest.TestCase):
         self.app_context = self.app.app_context()
         self.app_context.push()
         db.create_all()
-        
+    
     def tearDown(self):
         """Clean up test environment."""
         db.session.remove()
@@ -141,6 +182,17 @@ class TestModels(unittest.TestCase):
         self.assertEqual(saved_restaurant.name, 'Test Restaurant')
         self.assertEqual(saved_restaurant.get_cuisines(), ['Italian'])
         
+        # Cuisine index stays in sync and filters in SQL.
+        saved_restaurant.set_cuisines(['Chinese', 'Italian', 'Chinese'])
+        db.session.commit()
+        self.assertEqual(sorted(link.cuisine for link in saved_restaurant.cuisine_links),
+                         ['Chinese', 'Italian'])
+        self.assertEqual(Restaurant.query.filter(Restaurant.serves_any_cuisine(['Chinese'])).count(), 1)
+        saved_restaurant.set_cuisines(['Punjabi'])
+        db.session.commit()
+        self.assertEqual(RestaurantCuisine.query.count(), 1)
+        self.assertEqual(Restaurant.query.filter(Restaurant.serves_any_cuisine(['Chinese', 'Italian'])).count(), 0)
+        
         menu_items = saved_restaurant.menu_items.all()
         self.assertEqual(len(menu_items), 2)
         
@@ -213,6 +265,7 @@ class TestModels(unittest.TestCase):
             price=10.99
         )
         db.session.add(order_item)
+        order.refresh_item_summary()
         db.session.commit()
         
         # Retrieve and check.
@@ -220,8 +273,9 @@ class TestModels(unittest.TestCase):
         self.assertEqual(saved_order.status, 'pending')
         self.assertEqual(saved_order.total_amount, 21.98)
         
-        # Check item count.
+        # Check the stored item count and line summary.
         self.assertEqual(saved_order.item_count, 2)
+        self.assertEqual(saved_order.items_summary, f'2× {menu_item.name}')
         
         # Test status update.
         self.assertTrue(saved_order.update_status('confirmed'))
@@ -233,6 +287,649 @@ class TestModels(unittest.TestCase):
         # Test invalid status.
         self.assertFalse(saved_order.update_status('invalid_status'))
     
+    def _create_restaurant(self):
+        """Create an owner and restaurant for menu tests."""
+        user = User(username='owner', email='owner@example.com', role=ROLE_OWNER)
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.flush()
+        
+        owner = RestaurantOwner(user_id=user.id, name='Test Owner')
+        db.session.add(owner)
+        db.session.flush()
+        
+        restaurant = Restaurant(
+            owner_id=owner.id,
+            name='Test Restaurant',
+            description='Test Description',
+            location='Test Location'
+        )
+        restaurant.set_cuisines(['Italian'])
+        db.session.add(restaurant)
+        db.session.flush()
+        return restaurant
+    
+    def test_daily_order_count_is_lazy(self):
+        """Test daily order count expires on read without a write."""
+        restaurant = self._create_restaurant()
+        menu_item = MenuItem(
+            restaurant_id=restaurant.id,
+            name='Pizza',
+            price=10.99,
+            category='main_course'
+        )
+        db.session.add(menu_item)
+        db.session.commit()
+        
+        menu_item.increment_daily_order_count(11)
+        db.session.commit()
+        self.assertEqual(menu_item.times_ordered_today, 11)
+        self.assertTrue(menu_item.is_mostly_ordered)
+        self.assertEqual(
+            MenuItem.query.filter(MenuItem.times_ordered_today > 10).count(), 1
+        )
+        
+        # A stale day stamp reads as zero without touching the stored count.
+        menu_item.last_order_date = datetime.utcnow().date() - timedelta(days=1)
+        db.session.commit()
+        self.assertEqual(menu_item.times_ordered_today, 0)
+        self.assertFalse(menu_item.is_mostly_ordered)
+        self.assertEqual(
+            MenuItem.query.filter(MenuItem.times_ordered_today > 10).count(), 0
+        )
+        self.assertFalse(db.session.is_modified(menu_item))
+        
+        # The next increment starts a new day.
+        menu_item.increment_daily_order_count(2)
+        self.assertEqual(menu_item.times_ordered_today, 2)
+    
+    def test_order_counter_write_behind(self):
+        """Test buffered order counts are visible before and after a flush."""
+        restaurant = self._create_restaurant()
+        menu_item = MenuItem(
+            restaurant_id=restaurant.id,
+            name='Pizza',
+            price=10.99,
+            category='main_course'
+        )
+        db.session.add(menu_item)
+        db.session.commit()
+        
+        record_order(menu_item.id, 7)
+        record_order(menu_item.id, 5)
+        
+        # Pending deltas are merged into reads before they reach the table.
+        self.assertEqual(menu_item._times_ordered_today, 0)
+        self.assertEqual(menu_item.times_ordered_today, 12)
+        self.assertTrue(menu_item.is_mostly_ordered)
+        
+        # The batch stays visible while its UPDATE is in flight.
+        counter = get_order_counter()
+        build_statement = order_counters_module._increment_statement
+        in_flight = []
+        def observe():
+            in_flight.append(counter.pending(menu_item.id))
+            return build_statement()
+        with patch.object(order_counters_module, '_increment_statement', observe):
+            self.assertEqual(counter.flush(), 1)
+        self.assertEqual(in_flight, [12])
+        self.assertEqual(counter.pending(menu_item.id), 0)
+        db.session.refresh(menu_item)
+        self.assertEqual(menu_item._times_ordered_today, 12)
+        self.assertEqual(menu_item.last_order_date, datetime.utcnow().date())
+        self.assertEqual(menu_item.times_ordered_today, 12)
+        
+        # Reaching the event threshold wakes the flush thread; the caller never flushes.
+        counter.flush_events = 2
+        flushed_by = []
+        def observe_thread():
+            flushed_by.append(threading.current_thread().name)
+            return build_statement()
+        with patch.object(order_counters_module, '_increment_statement', observe_thread):
+            record_order(menu_item.id, 1)
+            record_order(menu_item.id, 2)
+            deadline = time.monotonic() + 5
+            while counter.pending(menu_item.id) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(flushed_by, ['order-counter-flush'])
+        db.session.refresh(menu_item)
+        self.assertEqual(menu_item._times_ordered_today, 15)
+    
+    def test_rating_aggregates(self):
+        """Test stored rating aggregates are maintained on write and rebuilt."""
+        restaurant = self._create_restaurant()
+        menu_item = MenuItem(
+            restaurant_id=restaurant.id,
+            name='Pizza',
+            price=10.99,
+            category='main_course'
+        )
+        user = User(username='customer', email='customer@example.com', role=ROLE_CUSTOMER)
+        user.set_password('password123')
+        db.session.add_all([menu_item, user])
+        db.session.flush()
+        customer = Customer(user_id=user.id, name='Test Customer')
+        db.session.add(customer)
+        db.session.flush()
+        
+        for rating in (5, 4):
+            order = Order(customer_id=customer.id, restaurant_id=restaurant.id,
+                          status='completed', total_amount=10.99)
+            db.session.add(order)
+            db.session.flush()
+            feedback = Feedback(order_id=order.id, customer_id=customer.id,
+                                restaurant_id=restaurant.id, rating=rating, message='')
+            dish_rating = DishRating(order_id=order.id, customer_id=customer.id,
+                                     restaurant_id=restaurant.id,
+                                     menu_item_id=menu_item.id, rating=rating - 1)
+            db.session.add_all([feedback, dish_rating])
+            record_feedback(feedback)
+            record_dish_rating(dish_rating)
+        db.session.commit()
+        
+        self.assertEqual(restaurant.total_reviews, 2)
+        self.assertEqual(restaurant.average_rating, 4.5)
+        self.assertEqual(menu_item.total_ratings, 2)
+        self.assertEqual(menu_item.average_rating, 3.5)
+        self.assertEqual(restaurant.rating_distribution,
+                         [(5, 1, 50), (4, 1, 50), (3, 0, 0), (2, 0, 0), (1, 0, 0)])
+        self.assertEqual(menu_item.liked_percent, 50)
+        
+        # Rebuilding from scratch gives the same values.
+        restaurant.rating_sum = restaurant.rating_count = restaurant.stars_5 = 0
+        menu_item.rating_sum = menu_item.rating_count = menu_item.stars_3 = 0
+        db.session.commit()
+        rebuild_rating_aggregates()
+        self.assertEqual(restaurant.average_rating, 4.5)
+        self.assertEqual(restaurant.stars_5, 1)
+        self.assertEqual(menu_item.total_ratings, 2)
+        self.assertEqual(menu_item.average_rating, 3.5)
+        self.assertEqual((menu_item.stars_3, menu_item.stars_4), (1, 1))
+        
+        # Both averages round to one decimal.
+        restaurant.rating_sum, restaurant.rating_count = 13, 3
+        menu_item.rating_sum, menu_item.rating_count = 13, 3
+        self.assertEqual((restaurant.average_rating, menu_item.average_rating), (4.3, 4.3))
+    
+    def test_restaurant_dietary_flags(self):
+        """Test stored dietary flags follow menu changes and filter in SQL."""
+        restaurant = self._create_restaurant()
+        salad = MenuItem(restaurant_id=restaurant.id, name='Salad', price=5.99,
+                         category='appetizer', is_vegetarian=True, is_vegan=True)
+        db.session.add(salad)
+        restaurant.refresh_dietary_flags()
+        db.session.commit()
+        
+        self.assertEqual(restaurant.get_dietary_options(), {
+            'has_vegetarian': True,
+            'has_vegan': True,
+            'has_guilt_free': False,
+            'has_non_vegetarian': False
+        })
+        vegan = Restaurant.matches_dietary_restrictions(['vegan'])
+        self.assertEqual(Restaurant.query.filter(vegan).count(), 1)
+        guilt_free = Restaurant.matches_dietary_restrictions(['guilt_free'])
+        self.assertEqual(Restaurant.query.filter(guilt_free).count(), 0)
+        self.assertIsNone(Restaurant.matches_dietary_restrictions(['halal']))
+        
+        db.session.delete(salad)
+        restaurant.refresh_dietary_flags()
+        db.session.commit()
+        self.assertFalse(restaurant.has_vegan)
+        self.assertEqual(Restaurant.query.filter(vegan).count(), 0)
+    
+    def test_restaurant_full_text_search(self):
+        """Test FTS5 restaurant search stays in sync and ranks matches."""
+        restaurant = self._create_restaurant()
+        other = Restaurant(
+            owner_id=restaurant.owner_id,
+            name='Spice Route',
+            description='Biryani and kebabs',
+            location='Connaught Place'
+        )
+        other.set_cuisines(['Mughlai'])
+        db.session.add(other)
+        db.session.commit()
+        self.assertTrue(search_index_available())
+        
+        def search(**kwargs):
+            return [r.name for r in filter_restaurants(Restaurant.query, **kwargs).all()]
+        
+        self.assertEqual(search(text_terms='biry'), ['Spice Route'])
+        self.assertEqual(search(text_terms='mughlai'), ['Spice Route'])
+        self.assertEqual(search(location='connaught'), ['Spice Route'])
+        self.assertEqual(search(text_terms='test', location='connaught'), [])
+        self.assertEqual(search(text_terms='"); DROP'), [])
+        
+        # Updates and deletes are picked up by the triggers.
+        other.name = 'Kebab Corner'
+        db.session.commit()
+        self.assertEqual(search(text_terms='spice'), [])
+        self.assertEqual(search(text_terms='kebab'), ['Kebab Corner'])
+        db.session.delete(other)
+        db.session.commit()
+        self.assertEqual(search(text_terms='kebab'), [])
+        
+        # Without the index, search falls back to LIKE.
+        db.session.execute(db.text('DROP TABLE restaurants_fts'))
+        self.assertFalse(search_index_available())
+        self.assertEqual(search(text_terms='Test Rest'), ['Test Restaurant'])
+    
+    def test_dish_index_facets(self):
+        """Test dish index prefix search, price ranges and facet intersection."""
+        rows = [
+            (1, 'Paneer Tikka', 'Grilled cottage cheese', 180.0, 'appetizer', True, False, False, '["North Indian"]'),
+            (2, 'Chicken Tikka', 'Grilled chicken', 220.0, 'appetizer', False, False, False, '["North Indian"]'),
+            (3, 'Paneer Butter Masala', 'Rich gravy', 260.0, 'main_course', True, False, False, '["Punjabi"]'),
+            (4, 'Tofu Salad', 'Light and healthy, with paneer-style tofu', 150.0, 'side', True, True, True, None),
+        ]
+        index = DishIndex(sorted(rows, key=lambda row: (row[3], row[0])))
+        
+        result = index.search(text='pane')
+        self.assertEqual(result['ids'], [1, 3, 4])  # Name matches first.
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(index.search(text='paneer tik')['ids'], [1])
+        self.assertEqual(index.search(text='tikka', dietary=['vegetarian'])['ids'], [1])
+        self.assertEqual(index.search(min_price=170, max_price=230)['ids'], [1, 2])
+        self.assertEqual(index.search(cuisines=['Punjabi', 'North Indian'], categories=['main_course'])['ids'], [3])
+        self.assertEqual(index.search(text='nothing')['total'], 0)
+        
+        facets = index.search(text='paneer')['facets']
+        self.assertEqual(facets['dietary'], {'guilt_free': 1, 'vegan': 1, 'vegetarian': 3})
+        self.assertEqual(facets['cuisines'], {'North Indian': 1, 'Punjabi': 1})
+        self.assertEqual(index.search(offset=1, limit=2)['ids'], [1, 2])
+    
+    def test_cart_store_backends(self):
+        """Test both cart backends keep one restaurant per cart and stored totals."""
+        restaurant = self._create_restaurant()
+        other = Restaurant(owner_id=restaurant.owner_id, name='Other Restaurant', location='Elsewhere')
+        db.session.add(other)
+        db.session.flush()
+        pizza = MenuItem(restaurant_id=restaurant.id, name='Pizza', price=10.0, category='main_course')
+        pasta = MenuItem(restaurant_id=restaurant.id, name='Pasta', price=8.0, category='main_course')
+        curry = MenuItem(restaurant_id=other.id, name='Curry', price=9.0, category='main_course')
+        db.session.add_all([pizza, pasta, curry])
+        db.session.commit()
+        
+        for backend in (MemoryCartBackend(), SQLCartBackend()):
+            store = CartStore(backend)
+            store.add_item(1, pizza, 2)
+            cart = store.add_item(1, pasta)
+            self.assertEqual(cart.restaurant_id, restaurant.id)
+            self.assertEqual(store.totals(1), (2, 28.0))
+            
+            with self.assertRaises(CartRestaurantMismatch):
+                store.add_item(1, curry)
+            
+            store.add_item(1, pizza)
+            store.set_quantity(1, pasta.id, 0)
+            cart = store.get(1)
+            self.assertEqual([(line.id, line.quantity) for line in cart.items], [(pizza.id, 3)])
+            self.assertEqual(store.totals(1), (1, 30.0))
+            
+            # An emptied cart accepts any restaurant again.
+            store.clear(1)
+            self.assertEqual(store.totals(1), (0, 0))
+            self.assertEqual(store.add_item(1, curry).restaurant_id, other.id)
+            store.clear(1)
+        
+        # The SQL backend only flushes; the caller's commit or rollback decides.
+        store = CartStore(SQLCartBackend())
+        store.add_item(1, pizza)
+        db.session.rollback()
+        self.assertEqual(store.totals(1), (0, 0))
+        store.add_item(1, pizza)
+        db.session.commit()
+        self.assertEqual(store.totals(1), (1, 10.0))
+    
+    def test_group_commit_writer(self):
+        """Test queued writes commit together and a failing unit fails alone."""
+        restaurant_id = self._create_restaurant().id
+        db.session.commit()
+        writer = GroupCommitWriter(self.app, max_batch=10, max_delay=0.05)
+        
+        def add_dish(name):
+            if not name:
+                raise ValueError("Dish needs a name")
+            dish = MenuItem(restaurant_id=restaurant_id, name=name, price=5.0, category='main_course')
+            db.session.add(dish)
+            db.session.flush()
+            return dish.id
+        
+        futures = [writer.submit(add_dish, f'Dish {i}') for i in range(4)]
+        ids = [future.result(timeout=5) for future in futures]
+        self.assertEqual((writer.batches, writer.writes), (1, 4))
+        
+        futures = [writer.submit(add_dish, name) for name in ('Soup', '', 'Salad')]
+        self.assertIsInstance(futures[0].result(timeout=5), int)
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        self.assertIsInstance(futures[2].result(timeout=5), int)
+        
+        # On timeout run_write cancels a unit still queued, but waits for one already running.
+        release = threading.Event()
+        
+        def slow_dish(name):
+            release.wait(5)
+            return add_dish(name)
+        
+        self.app.extensions['write_queue'] = writer
+        self.app.config['WRITE_QUEUE_TIMEOUT'] = 0.1
+        try:
+            threading.Timer(0.3, release.set).start()
+            self.assertIsInstance(run_write(slow_dish, 'Stew'), int)
+            release.clear()
+            blocker = writer.submit(slow_dish, 'Curry')
+            time.sleep(0.1)  # Let the blocker's batch close.
+            with self.assertRaises(TimeoutError):
+                run_write(add_dish, 'Never')
+            release.set()
+            blocker.result(timeout=5)
+        finally:
+            del self.app.extensions['write_queue']
+        writer.stop()
+        
+        names = {dish.name for dish in MenuItem.query.filter_by(restaurant_id=restaurant_id)}
+        self.assertEqual(names, {'Dish 0', 'Dish 1', 'Dish 2', 'Dish 3', 'Soup', 'Salad', 'Stew', 'Curry'})
+        self.assertEqual(len(set(ids)), 4)
+    
+    def test_status_latency_histogram(self):
+        """Test time-in-state quantiles come from incrementally kept histograms."""
+        restaurant = self._create_restaurant()
+        start = datetime(2026, 1, 1, 12, 0)
+        
+        # Ten orders wait 60..600 seconds in pending, then 300 seconds in preparing.
+        for n in range(1, 11):
+            placed = start + timedelta(hours=n)
+            confirmed = placed + timedelta(seconds=60 * n)
+            record_status_change(n, restaurant.id, None, 'pending', at=placed)
+            record_status_change(n, restaurant.id, 'pending', 'preparing', at=confirmed, entered_at=placed)
+            record_status_change(n, restaurant.id, 'preparing', 'ready', at=confirmed + timedelta(seconds=300),
+                                 entered_at=confirmed)
+        db.session.commit()
+        
+        latency = {row.status: row for row in kitchen_latency(restaurant.id)}
+        self.assertEqual(latency['pending'].count, 10)
+        self.assertAlmostEqual(latency['pending'].median, 300, delta=30)
+        self.assertAlmostEqual(latency['pending'].p90, 540, delta=54)
+        self.assertAlmostEqual(latency['pending'].mean, 330)
+        self.assertAlmostEqual(latency['preparing'].p90, 300, delta=30)
+        self.assertEqual(latency['ready'].count, 0)
+        self.assertIsNone(latency['ready'].median)
+        
+        # Rebuilding from the event history gives the same histograms.
+        rebuild_status_latency()
+        self.assertEqual({row.status: row for row in kitchen_latency(restaurant.id)}, latency)
+    
+    def test_daily_sales_rollup(self):
+        """Test checkout and cancellation keep the daily rollup in step with orders."""
+        restaurant = self._create_restaurant()
+        pizza = MenuItem(restaurant_id=restaurant.id, name='Pizza', price=10.0, category='main_course')
+        pasta = MenuItem(restaurant_id=restaurant.id, name='Pasta', price=8.0, category='main_course')
+        db.session.add_all([pizza, pasta])
+        db.session.commit()
+        
+        first = place_order(1, price_cart({pizza.id: 2, pasta.id: 1}))
+        place_order(1, price_cart({pizza.id: 1}))
+        cancelled = place_order(1, price_cart({pasta.id: 3}))
+        set_order_status(cancelled.id, 'cancelled')
+        db.session.commit()
+        
+        self.assertEqual(sales_totals(restaurant.id), (2, 38.0))
+        self.assertEqual([(row.name, row.total) for row in best_sellers(restaurant.id)],
+                         [('Pizza', 3), ('Pasta', 1)])
+        day = first.created_at.date()
+        buckets, (series,) = sales_report([restaurant.id], day, day, 'day')
+        self.assertEqual((buckets, series.orders, series.revenue), ([day.isoformat()], [2], [38.0]))
+        
+        # Reviving a cancelled order counts it again; a rebuild agrees.
+        set_order_status(cancelled.id, 'pending')
+        db.session.commit()
+        self.assertEqual(sales_totals(restaurant.id), (3, 62.0))
+        rebuild_daily_stats()
+        self.assertEqual(sales_totals(restaurant.id), (3, 62.0))
+        self.assertEqual([(row.name, row.total) for row in best_sellers(restaurant.id)],
+                         [('Pasta', 4), ('Pizza', 3)])
+        
+        # A rebuild writes the same hour keys checkout does, so new orders still merge.
+        place_order(1, price_cart({pizza.id: 1}))
+        hourly = sales_report([restaurant.id], day, day, 'hour')[1][0]
+        self.assertEqual(sum(hourly.orders), 4)
+        self.assertEqual(RestaurantHourlyStats.query.count(), len([n for n in hourly.orders if n]))
+        get_order_counter().flush()
+    
+    def test_sales_report_buckets(self):
+        """Test sales reports bucket the rollup by hour, day, week and month."""
+        first = self._create_restaurant()
+        second = Restaurant(owner_id=first.owner_id, name='Second Outlet', location='Test Location')
+        db.session.add(second)
+        db.session.commit()
+        record_sale(first.id, datetime(2026, 3, 30, 9, 15), 10.0, [])   # Monday.
+        record_sale(first.id, datetime(2026, 3, 30, 9, 45), 5.0, [])
+        record_sale(first.id, datetime(2026, 4, 5, 20, 0), 7.5, [])     # Sunday.
+        record_sale(second.id, datetime(2026, 4, 6, 12, 0), 4.0, [])
+        record_sale(second.id, datetime(2026, 5, 1, 12, 0), 3.0, [])    # Outside the range.
+        db.session.commit()
+        
+        start, end = date(2026, 3, 30), date(2026, 4, 7)
+        buckets, (a, b) = sales_report([first.id, second.id], start, end, 'week')
+        self.assertEqual(buckets, ['2026-03-30', '2026-04-06'])
+        self.assertEqual((a.orders, a.revenue, b.orders), ([3, 0], [22.5, 0.0], [0, 1]))
+        
+        buckets, (a, b) = sales_report([first.id, second.id], start, end, 'month')
+        self.assertEqual((buckets, a.orders, b.orders), (['2026-03', '2026-04'], [2, 1], [0, 1]))
+        
+        buckets, (a,) = sales_report([first.id], start, end, 'day')
+        self.assertEqual(len(buckets), 9)
+        self.assertEqual(a.orders, [2, 0, 0, 0, 0, 0, 1, 0, 0])
+        
+        buckets, (a,) = sales_report([first.id], start, start, 'hour')
+        self.assertEqual(len(buckets), 24)
+        self.assertEqual((buckets[9], a.orders[9], a.revenue[9], sum(a.orders)), ('2026-03-30T09:00', 2, 15.0, 2))
+        
+        with self.assertRaises(ValueError):
+            sales_report([first.id], start, end, 'fortnight')
+        with self.assertRaises(ValueError):
+            sales_report([first.id], date(2020, 1, 1), end, 'hour')
+    
+    def test_order_export(self):
+        """Test order exports stream one CSV row per line and one NDJSON object per order."""
+        restaurant = self._create_restaurant()
+        pizza = MenuItem(restaurant_id=restaurant.id, name='Pizza', price=10.0, category='main_course')
+        pasta = MenuItem(restaurant_id=restaurant.id, name='Pasta', price=8.0, category='main_course')
+        db.session.add_all([pizza, pasta])
+        db.session.commit()
+        first = place_order(1, price_cart({pizza.id: 2, pasta.id: 1}))
+        second = place_order(1, price_cart({pasta.id: 1}))
+        old = Order(customer_id=1, restaurant_id=restaurant.id, total_amount=5.0,
+                    created_at=datetime(2020, 1, 1, 12, 0))
+        db.session.add(old)
+        db.session.commit()
+        get_order_counter().flush()
+        
+        rows = list(csv.reader(io.StringIO(''.join(export_orders([restaurant.id], 'csv')))))
+        self.assertEqual(rows[0], CSV_COLUMNS)
+        self.assertEqual([(row[0], row[9], row[10]) for row in rows[1:]], [
+            (str(old.id), '', ''),
+            (str(first.id), 'Pizza', '2'),
+            (str(first.id), 'Pasta', '1'),
+            (str(second.id), 'Pasta', '1'),
+        ])
+        
+        # Small chunks still join into whole lines; the date range drops the old order.
+        with patch('app.services.order_export.EXPORT_CHUNK_SIZE', 10):
+            chunks = list(export_orders([restaurant.id], 'ndjson', start=first.created_at.date()))
+        self.assertGreater(len(chunks), 2)
+        orders = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        self.assertEqual([(o['id'], o['total_amount'], [i['name'] for i in o['items']]) for o in orders],
+                         [(first.id, 28.0, ['Pizza', 'Pasta']), (second.id, 8.0, ['Pasta'])])
+        self.assertEqual(list(export_orders([restaurant.id], 'ndjson', end=date(2020, 1, 1))),
+                         [json.dumps({
+                             'id': old.id, 'created_at': '2020-01-01T12:00:00', 'restaurant_id': restaurant.id,
+                             'restaurant': restaurant.name, 'customer_id': 1, 'status': 'pending',
+                             'total_amount': 5.0, 'item_count': 0, 'items': []
+                         }) + '\n'])
+        
+        text = ''.join(export_orders([restaurant.id], 'csv'))
+        self.assertEqual(gzip.decompress(b''.join(gzip_chunks(export_orders([restaurant.id], 'csv')))).decode(), text)
+        with self.assertRaises(ValueError):
+            list(export_orders([restaurant.id], 'xml'))
+        
+        # Several restaurants are read one by one and merged oldest first.
+        other = Restaurant(owner_id=restaurant.owner_id, name='Second Outlet',
+                           description='Test Description', location='Test Location')
+        db.session.add(other)
+        db.session.flush()
+        between = Order(customer_id=1, restaurant_id=other.id, total_amount=7.0,
+                        created_at=datetime(2021, 1, 1, 12, 0))
+        db.session.add(between)
+        db.session.commit()
+        orders = [json.loads(line) for line in ''.join(export_orders([restaurant.id, other.id], 'ndjson')).splitlines()]
+        self.assertEqual([(o['id'], o['restaurant']) for o in orders], [
+            (old.id, restaurant.name), (between.id, 'Second Outlet'),
+            (first.id, restaurant.name), (second.id, restaurant.name),
+        ])
+    
+    def _create_analytics_orders(self):
+        """Create a restaurant with a week of orders for analytics tests."""
+        restaurant = self._create_restaurant()
+        pizza = MenuItem(restaurant_id=restaurant.id, name='Pizza', price=10.0, category='main_course')
+        pasta = MenuItem(restaurant_id=restaurant.id, name='Pasta', price=8.0, category='main_course')
+        naan = MenuItem(restaurant_id=restaurant.id, name='Naan', price=2.0, category='side')
+        db.session.add_all([pizza, pasta, naan])
+        db.session.flush()
+        
+        def add(at, lines, status='completed'):
+            order = Order(customer_id=1, restaurant_id=restaurant.id, status=status, total_amount=0.0,
+                          item_count=sum(quantity for _, quantity in lines), created_at=at)
+            db.session.add(order)
+            db.session.flush()
+            db.session.add_all(OrderItem(order_id=order.id, menu_item_id=item.id, quantity=quantity, price=1.0)
+                               for item, quantity in lines)
+        
+        add(datetime(2026, 4, 6, 12, 10), [(pizza, 2), (pasta, 1)])               # Monday noon.
+        add(datetime(2026, 4, 6, 12, 40), [(pizza, 1), (pasta, 1), (naan, 1)])
+        add(datetime(2026, 4, 8, 19, 5), [(pizza, 1)])                            # Wednesday evening.
+        add(datetime(2026, 4, 7, 9, 0), [(pasta, 4)], status='cancelled')
+        add(datetime(2026, 1, 1, 12, 0), [(pizza, 1)])                            # Outside the window.
+        db.session.commit()
+        return restaurant, add, (pizza, pasta, naan)
+    
+    def test_order_analytics(self):
+        """Test demand heatmaps, basket percentiles and co-purchases, and their per-day cache."""
+        restaurant, add, (pizza, pasta, naan) = self._create_analytics_orders()
+        today = date(2026, 4, 8)
+        with patch('app.services.order_analytics.np', None):
+            analytics = order_analytics(restaurant.id, today=today)
+        
+        self.assertEqual((analytics.days, analytics.orders, analytics.peak), (28, 3, 2))
+        self.assertEqual(analytics.heatmap[0][12], 2)
+        self.assertEqual(analytics.heatmap[2][19], 1)
+        self.assertEqual(sum(map(sum, analytics.heatmap)), 3)
+        self.assertEqual(analytics.basket_percentiles, {50: 3, 90: 3, 99: 3})
+        self.assertAlmostEqual(analytics.mean_basket, 7 / 3)
+        self.assertEqual([(p.first, p.second, p.orders) for p in analytics.pairs],
+                         [('Pizza', 'Pasta', 2), ('Pizza', 'Naan', 1), ('Pasta', 'Naan', 1)])
+        self.assertAlmostEqual(analytics.pairs[0].rate, 2 / 3)
+        self.assertAlmostEqual(analytics.pairs[0].attach_rate, 2 / 3)
+        self.assertAlmostEqual(analytics.pairs[2].attach_rate, 1 / 2)
+        
+        # Earlier days come from the cache; today is always recomputed.
+        add(datetime(2026, 4, 6, 13, 0), [(naan, 1)])
+        add(datetime(2026, 4, 8, 20, 0), [(naan, 1)])
+        db.session.commit()
+        with patch('app.services.order_analytics.np', None):
+            self.assertEqual(order_analytics(restaurant.id, today=today).orders, 4)
+            self.app.extensions['order_analytics_cache'].clear()
+            self.assertEqual(order_analytics(restaurant.id, today=today).orders, 5)
+        
+        # A checkout committed between the order and line reads is left out, not misattributed.
+        load_columns = order_analytics_module._load_columns
+        def racing_load(restaurant_id, first_day, last_day):
+            orders, _ = load_columns(restaurant_id, first_day, last_day)
+            add(datetime(2026, 4, 7, 12, 0), [(pizza, 1), (naan, 1)])
+            db.session.commit()
+            return orders, load_columns(restaurant_id, first_day, last_day)[1]
+        days = [date(2026, 4, 1) + timedelta(days=n) for n in range(8)]
+        for numpy in {None, order_analytics_module.np}:
+            with patch('app.services.order_analytics.np', numpy):
+                expected = compute_day_stats(restaurant.id, days)
+                with patch.object(order_analytics_module, '_load_columns', racing_load):
+                    self.assertEqual(compute_day_stats(restaurant.id, days), expected)
+    
+    @unittest.skipUnless(order_analytics_module.np is not None, 'NumPy is not installed')
+    def test_order_analytics_numpy_matches_python(self):
+        """Test the vectorized reductions agree with the pure-Python ones."""
+        restaurant, _, _ = self._create_analytics_orders()
+        days = [date(2026, 4, 1) + timedelta(days=n) for n in range(8)] + [date(2026, 1, 1)]
+        vectorized = compute_day_stats(restaurant.id, days)
+        with patch('app.services.order_analytics.np', None):
+            self.assertEqual(compute_day_stats(restaurant.id, days), vectorized)
+    
+    def test_order_event_spool_fan_out(self):
+        """Test spooled order events reach every worker with the same ids, across rotation."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.spool')
+            workers = [SpoolTransport(OrderEventBroker(100), path, poll_interval=60, max_bytes=300)
+                       for _ in range(2)]
+            start = workers[0].broker.last_id
+            ids = [workers[i % 2].publish('order_status', ['order:1'], {'n': i}) for i in range(6)]
+            self.assertEqual(ids, sorted(ids))
+            self.assertTrue(os.path.exists(path + '.1'))
+            
+            for worker in workers:
+                worker.poll()
+                events, complete = worker.broker.wait(start, {'order:1'}, timeout=0)
+                self.assertTrue(complete)
+                self.assertEqual([e.id for e in events], ids)
+                self.assertEqual([e.data['n'] for e in events], list(range(6)))
+                
+                # Other channels see nothing; a stale cursor asks for a reset.
+                self.assertEqual(worker.broker.wait(start, {'order:2'}, timeout=0), ([], True))
+                self.assertFalse(worker.broker.wait(ids[-1] + 1, {'order:1'}, timeout=0)[1])
+                worker.stop()
+                self.assertFalse(worker._thread.is_alive())
+    
+    def test_sqlite_engine_profile(self):
+        """Test each new connection gets the profile's pragmas and the WAL is checkpointed."""
+        self.assertEqual(profile_pragmas('wal', {'cache_size': -2000, 'mmap_size': None})['cache_size'], -2000)
+        self.assertNotIn('mmap_size', profile_pragmas('wal', {'mmap_size': None}))
+        with self.assertRaises(ValueError):
+            profile_pragmas('turbo')
+        
+        with tempfile.TemporaryDirectory() as directory:
+            expected = {'wal': ('wal', 1, 5000, 2), 'default': ('delete', 2, 5000, 0)}
+            for profile, pragmas in expected.items():
+                app = create_app({
+                    'TESTING': True,
+                    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, profile + '.db')}",
+                    'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 2},
+                    'SQLITE_PROFILE': profile,
+                    'SQLITE_CHECKPOINT_INTERVAL': 3600,
+                    'SQLITE_CHECKPOINT_TRUNCATE_PAGES': 1,
+                })
+                with app.app_context():
+                    self.assertEqual(db.engine.pool.size(), 2)
+                    with db.engine.connect() as connection:
+                        self.assertEqual(tuple(
+                            connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+                            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store')
+                        ), pragmas)
+                    
+                    checkpointer = app.extensions['sqlite_checkpointer']
+                    if profile == 'wal':
+                        self.assertIsNotNone(checkpointer._thread)
+                        db.create_all()
+                        self.assertGreater(os.path.getsize(os.path.join(directory, 'wal.db-wal')), 0)
+                        busy, pages, done = checkpointer.run_once()
+                        self.assertEqual((busy, checkpointer.truncations), (0, 1))
+                        self.assertEqual(os.path.getsize(os.path.join(directory, 'wal.db-wal')), 0)
+                    else:
+                        self.assertIsNone(checkpointer._thread)
+                    checkpointer.stop()
+                    app.extensions['order_counter'].stop()
+                    db.engine.dispose()
+
 
 if __name__ == '__main__':
     unittest.main()
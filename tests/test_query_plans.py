@@ -0,0 +1,185 @@
+"""EXPLAIN QUERY PLAN regression tests for hot controller queries.
+
+Each test drives one or more hot routes, records every SELECT they run and
+replays it under EXPLAIN QUERY PLAN. A test fails when a plan reads a table
+that grows with orders or menus row by row instead of through an index, or
+sorts all of its matching rows instead of reading them in index order, so
+a dropped index or a query rewrite that loses one shows up here.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from flask import g
+
+from app import create_app, db
+from app.models import (
+    Customer,
+    DishRating,
+    Feedback,
+    MenuItem,
+    Order,
+    OrderItem,
+    Restaurant,
+    RestaurantOwner,
+    User,
+)
+from app.models import ROLE_CUSTOMER, ROLE_OWNER, STATUS_COMPLETED
+from app.services.sales_rollup import rebuild_daily_stats
+from app.utils.query_plans import capture_queries, explain_query_plan, full_scans, temp_sorts
+
+# Tables that grow with orders, menus or customers. Small lookup tables
+# (restaurants, owners, cuisines) may be scanned.
+LARGE_TABLES = {
+    'users', 'customers', 'menu_items', 'orders', 'order_items', 'feedback', 'dish_ratings',
+    'order_status_events', 'carts', 'cart_items', 'restaurant_daily_stats',
+    'restaurant_hourly_stats', 'menu_item_daily_stats',
+}
+
+class TestQueryPlans(unittest.TestCase):
+    """Query plan checks for hot customer and owner routes."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'WTF_CSRF_ENABLED': False,
+            'SERVER_NAME': 'localhost'
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self._create_test_data()
+    
+    def tearDown(self):
+        """Clean up test environment."""
+        self.app.extensions['order_counter'].flush()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def _create_test_data(self):
+        """Create a customer, an owner and two restaurants, one with rated, reviewed orders."""
+        customer_user = User(username='customer', email='customer@example.com', role=ROLE_CUSTOMER)
+        customer_user.set_password('password123')
+        owner_user = User(username='owner', email='owner@example.com', role=ROLE_OWNER)
+        owner_user.password_hash = customer_user.password_hash
+        db.session.add_all([customer_user, owner_user])
+        db.session.flush()
+        customer = Customer(user_id=customer_user.id, name='Test Customer')
+        owner = RestaurantOwner(user_id=owner_user.id, name='Test Owner')
+        db.session.add_all([customer, owner])
+        db.session.flush()
+        
+        restaurant = Restaurant(owner_id=owner.id, name='Test Restaurant',
+                                description='Test Description', location='Test Location')
+        restaurant.set_cuisines(['Italian'])
+        db.session.add(restaurant)
+        db.session.flush()
+        items = [
+            MenuItem(restaurant_id=restaurant.id, name=f'Dish {i}', price=5.0 + i,
+                     category='main_course' if i % 2 else 'starter')
+            for i in range(4)
+        ]
+        db.session.add_all(items)
+        db.session.flush()
+        
+        for day in range(3):
+            order = Order(customer_id=customer.id, restaurant_id=restaurant.id, status=STATUS_COMPLETED,
+                          total_amount=11.0, item_count=2,
+                          created_at=datetime.utcnow() - timedelta(days=day))
+            db.session.add(order)
+            db.session.flush()
+            db.session.add_all([
+                OrderItem(order_id=order.id, menu_item_id=items[0].id, quantity=1, price=5.0),
+                OrderItem(order_id=order.id, menu_item_id=items[1].id, quantity=1, price=6.0),
+            ])
+            db.session.add(Feedback(order_id=order.id, customer_id=customer.id, restaurant_id=restaurant.id,
+                                    rating=4, message='Good'))
+            db.session.add(DishRating(order_id=order.id, customer_id=customer.id, restaurant_id=restaurant.id,
+                                      menu_item_id=items[0].id, rating=5))
+        # A second restaurant so owner queries span several restaurant_ids.
+        outlet = Restaurant(owner_id=owner.id, name='Second Outlet',
+                            description='Test Description', location='Test Location')
+        db.session.add(outlet)
+        db.session.flush()
+        db.session.add(Order(customer_id=customer.id, restaurant_id=outlet.id, status=STATUS_COMPLETED,
+                             total_amount=9.0, item_count=0))
+        db.session.commit()
+        rebuild_daily_stats()
+        
+        self.restaurant_id = restaurant.id
+        self.order_id = order.id
+        self.menu_item_id = items[0].id
+    
+    def _login(self, username):
+        """Log in as the customer or the owner."""
+        g.pop('_login_user', None)
+        self.client.post('/auth/login', data={
+            'username': username,
+            'password': 'password123',
+            'role': 'customer' if username == 'customer' else 'owner'
+        })
+    
+    def assertIndexedPlans(self, *urls):
+        """Fetch urls and assert none of their SELECTs fully scans or sorts a large table."""
+        with capture_queries(db.engine) as queries:
+            for url in urls:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+        self.assertTrue(queries)
+        
+        failures = []
+        connection = db.session.connection()
+        for statement, parameters in queries:
+            plan = explain_query_plan(connection, statement, parameters)
+            for problem, tables in (('scan', full_scans(plan, LARGE_TABLES, statement)),
+                                    ('sort', temp_sorts(plan, LARGE_TABLES, statement))):
+                if tables:
+                    failures.append(f"{problem} {', '.join(tables)}:\n  {' '.join(statement.split())}\n  {plan}")
+        self.assertFalse(failures, 'Full table scans or sorts:\n' + '\n'.join(failures))
+    
+    def test_customer_pages(self):
+        """Test the customer dashboard, order history and order detail use indexes."""
+        self._login('customer')
+        self.assertIndexedPlans(
+            '/customer/dashboard',
+            '/customer/orders',
+            f'/customer/order/{self.order_id}',
+            '/customer/cart',
+        )
+    
+    def test_restaurant_detail(self):
+        """Test the restaurant page menu, feedback and recommendations use indexes."""
+        self._login('customer')
+        self.assertIndexedPlans(
+            f'/customer/restaurant/{self.restaurant_id}',
+            f'/customer/restaurant/{self.restaurant_id}?category=starter',
+        )
+    
+    def test_owner_pages(self):
+        """Test the owner dashboard, order board and restaurant page use indexes."""
+        self._login('owner')
+        self.assertIndexedPlans(
+            '/owner/dashboard',
+            '/owner/orders',
+            '/owner/orders?status=completed',
+            f'/owner/restaurant/{self.restaurant_id}',
+            f'/owner/order/{self.order_id}',
+            '/owner/feedback',
+        )
+    
+    def test_owner_reports(self):
+        """Test the reports page, its data endpoint and the order export use indexes."""
+        self._login('owner')
+        self.assertIndexedPlans(
+            f'/owner/reports?restaurant_id={self.restaurant_id}',
+            f'/owner/reports/data?restaurant_id={self.restaurant_id}&granularity=week',
+            f'/owner/reports/data?restaurant_id={self.restaurant_id}&granularity=hour',
+            '/owner/orders/export?format=ndjson',
+        )
+
+if __name__ == '__main__':
+    unittest.main()
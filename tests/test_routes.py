@@ -1,13 +1,23 @@
 """Tests for application routes."""
 
+import base64
+import gzip
 import json
+import os
+import re
+import tempfile
 import unittest
+from datetime import datetime
+from unittest.mock import patch
 
-from flask import url_for
+from flask import g, url_for
 
 from app import create_app, db
-from app.models import Customer, MenuItem, Restaurant, RestaurantOwner, User
+from app.models import Customer, DishRating, Feedback, MenuItem, Order, OrderStatusEvent, Restaurant, RestaurantOwner, User
 from app.models import ROLE_CUSTOMER, ROLE_OWNER
+from app.services.owner_dashboard import get_dashboard, invalidate_dashboard
+from app.services.read_replica import ReplicaSync
+from app.services.sales_rollup import record_sale
 
 class TestRoutes(unittest.TestCase):
     """Test cases for application routes."""
@@ -27,7 +37,7 @@ class TestRoutes(unittest.TestCase):
         
         # Create test data.
         self._create_test_data()
-        
+    
     def tearDown(self):
         """Clean up test environment."""
         db.session.remove()
@@ -162,6 +172,55 @@ class TestRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'RESTAURANT OWNER DASHBOARD', response.data)
     
+    def test_owner_dashboard_cache(self):
+        """Test owner dashboard payload is cached as plain data until invalidated."""
+        customer = Customer.query.first()
+        restaurant = Restaurant.query.first()
+        menu_item = MenuItem.query.filter_by(name='Pizza').first()
+        order = Order(customer_id=customer.id, restaurant_id=restaurant.id,
+                      total_amount=10.99, item_count=1)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(DishRating(order_id=order.id, customer_id=customer.id, restaurant_id=restaurant.id,
+                                  menu_item_id=menu_item.id, rating=4))
+        db.session.commit()
+        
+        self._login('owner', 'password123')
+        response = self.client.get('/owner/dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Test Restaurant', response.data)
+        
+        owner = RestaurantOwner.query.first()
+        with self.app.test_request_context():
+            payload = get_dashboard(owner.id)
+            self.assertIs(get_dashboard(owner.id), payload)
+            self.assertEqual(len(payload['restaurants']), 1)
+            self.assertEqual(payload['dish_rating_stats'],
+                             {payload['restaurants'][0]['id']: {'total_ratings': 0, 'average_rating': 0}})
+            self.assertEqual(payload['recent_orders'][0]['restaurant'], {'name': 'Test Restaurant'})
+            self.assertEqual(payload['recent_dish_ratings'][0]['order'], {'customer': {'name': 'Test Customer'}})
+            
+            # Nothing in the payload is tied to a session.
+            pending = [payload]
+            while pending:
+                value = pending.pop()
+                self.assertNotIsInstance(value, db.Model)
+                if isinstance(value, dict):
+                    pending.extend(value.values())
+                elif isinstance(value, list):
+                    pending.extend(value)
+        
+        # A later request renders the cached payload after its session is gone.
+        db.session.remove()
+        response = self.client.get('/owner/dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Test Customer', response.data)
+        self.assertIn(b'Pizza', response.data)
+        
+        with self.app.test_request_context():
+            invalidate_dashboard(owner.id)
+            self.assertIsNot(get_dashboard(owner.id), payload)
+    
     def test_role_based_access(self):
         """Test role-based access control."""
         # Customer trying to access owner routes (forbidden; expect 403).
@@ -182,6 +241,348 @@ class TestRoutes(unittest.TestCase):
         self.assertIn(b'Test Restaurant', response.data)
         self.assertIn(b'Italian', response.data)
     
+    def test_restaurant_listing_keyset_pages(self):
+        """Test restaurant listing pages by cursor and serves JSON pages."""
+        owner = RestaurantOwner.query.first()
+        for name in ('Alpha Diner', 'Beta Bistro', 'Zeta Grill'):
+            db.session.add(Restaurant(owner_id=owner.id, name=name,
+                                      description='Neighbourhood favourite', location='Test Location'))
+        db.session.commit()
+        self._login('customer', 'password123')
+        
+        seen = []
+        url = '/customer/restaurants?per_page=2&format=json'
+        while url:
+            payload = json.loads(self.client.get(url).data)
+            self.assertLessEqual(len(payload['restaurants']), 2)
+            self.assertEqual(payload['html']['gridView'].count('View Menu'), len(payload['restaurants']))
+            seen.extend(r['name'] for r in payload['restaurants'])
+            url = payload['next_url'] and payload['next_url'] + '&format=json'
+        self.assertEqual(seen, ['Alpha Diner', 'Beta Bistro', 'Test Restaurant', 'Zeta Grill'])
+        
+        # Page size is capped on the server and bad cursors restart from the top.
+        payload = json.loads(self.client.get('/customer/restaurants?per_page=1000&cursor=junk&format=json').data)
+        self.assertEqual(len(payload['restaurants']), 4)
+        self.assertIsNone(payload['next_url'])
+        for values in ('[{"a":1},1]', '["x",[1]]', '["x",99999999999999999999999]', '["x",{"$dt":5}]'):
+            cursor = base64.urlsafe_b64encode(values.encode()).decode()
+            response = self.client.get(f'/customer/restaurants?cursor={cursor}&format=json')
+            self.assertEqual(response.status_code, 200, values)
+            self.assertEqual(len(json.loads(response.data)['restaurants']), 4)
+        
+        response = self.client.get('/customer/restaurants?per_page=1')
+        self.assertIn(b'Alpha Diner', response.data)
+        self.assertNotIn(b'Beta Bistro', response.data)
+        self.assertIn(b'LOAD MORE RESTAURANTS', response.data)
+    
+    def test_order_history_pages(self):
+        """Test order history pages by cursor, batches feedback and finds orders by number."""
+        from datetime import datetime, timedelta
+        
+        customer = Customer.query.first()
+        restaurant = Restaurant.query.first()
+        orders = [
+            Order(customer_id=customer.id, restaurant_id=restaurant.id, status='completed',
+                  total_amount=10.0 + i, created_at=datetime(2026, 1, 1) + timedelta(days=i))
+            for i in range(5)
+        ]
+        db.session.add_all(orders)
+        db.session.flush()
+        db.session.add(Feedback(order_id=orders[4].id, customer_id=customer.id,
+                                restaurant_id=restaurant.id, rating=4, message='Good'))
+        db.session.commit()
+        self._login('customer', 'password123')
+        
+        response = self.client.get('/customer/orders?per_page=2')
+        self.assertIn(f'ORDER #{orders[4].id}<'.encode(), response.data)
+        self.assertIn(f'ORDER #{orders[3].id}<'.encode(), response.data)
+        self.assertNotIn(f'ORDER #{orders[2].id}<'.encode(), response.data)
+        self.assertIn(b'RATED', response.data)
+        self.assertIn(b'OLDER ORDERS', response.data)
+        
+        # Follow the cursor to the last page.
+        next_url = url_for('customer.orders', per_page=2)
+        seen = 0
+        while next_url:
+            response = self.client.get(next_url)
+            seen += response.data.count(b'<h5 class="mb-1 fw-bold text-primary">ORDER #')
+            match = re.search(r'href="(/customer/orders\?[^"]*cursor=[^"]*)"', response.data.decode())
+            next_url = match and match.group(1).replace('&amp;', '&')
+        self.assertEqual(seen, 5)
+        
+        response = self.client.get(f'/customer/orders?search=%23{orders[1].id}')
+        self.assertIn(f'ORDER #{orders[1].id}<'.encode(), response.data)
+        self.assertNotIn(f'ORDER #{orders[2].id}<'.encode(), response.data)
+        
+        response = self.client.get('/customer/orders?search=test+rest')
+        self.assertEqual(response.data.count(b'<h5 class="mb-1 fw-bold text-primary">ORDER #'), 5)
+        
+        # Digits int() rejects or SQLite cannot bind search restaurant names instead.
+        for term in ('%C2%B2', '9' * 23):
+            response = self.client.get(f'/customer/orders?search={term}')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(b'<h5 class="mb-1 fw-bold text-primary">ORDER #', response.data)
+    
+    def test_owner_order_board(self):
+        """Test owner order board pages orders and counts live statuses."""
+        customer = Customer.query.first()
+        restaurant = Restaurant.query.first()
+        for status in ('pending', 'pending', 'preparing', 'completed', 'completed'):
+            db.session.add(Order(customer_id=customer.id, restaurant_id=restaurant.id,
+                                 status=status, total_amount=10.0))
+        db.session.commit()
+        self._login('owner', 'password123')
+        
+        response = self.client.get('/owner/orders?per_page=2')
+        counts = re.findall(r'>(\d+)</h3>\s*<small class="text-muted text-uppercase">(\w+)<',
+                            response.data.decode())
+        self.assertEqual(counts, [('2', 'pending'), ('0', 'confirmed'), ('1', 'preparing'), ('0', 'ready')])
+        self.assertEqual(response.data.count(b'<i class="fas fa-receipt text-primary me-2"></i>Order #'), 2)
+        self.assertIn(b'OLDER ORDERS', response.data)
+        
+        response = self.client.get('/owner/orders?status=completed')
+        self.assertEqual(response.data.count(b'<i class="fas fa-receipt text-primary me-2"></i>Order #'), 2)
+        self.assertNotIn(b'OLDER ORDERS', response.data)
+        
+        # Orders of several restaurants are merged into one newest-first sequence.
+        from datetime import timedelta
+        
+        outlet = Restaurant(owner_id=restaurant.owner_id, name='Second Outlet',
+                            description='Test Description', location='Test Location')
+        db.session.add(outlet)
+        db.session.flush()
+        for i in range(4):
+            db.session.add(Order(customer_id=customer.id, restaurant_id=outlet.id, status='completed',
+                                 total_amount=10.0, created_at=datetime(2026, 1, 1) + timedelta(hours=i)))
+        db.session.commit()
+        expected = [o.id for o in Order.query.order_by(Order.created_at.desc(), Order.id.desc())]
+        seen = []
+        next_url = url_for('owner.orders', per_page=3)
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(int(i) for i in re.findall(r'me-2"></i>Order #(\d+)', response.data.decode()))
+            match = re.search(r'href="(/owner/orders\?[^"]*cursor=[^"]*)"', response.data.decode())
+            next_url = match and match.group(1).replace('&amp;', '&')
+        self.assertEqual(seen, expected)
+    
+    def test_order_event_streams(self):
+        """Test order events reach the owner and customer SSE streams and resume by id."""
+        self.app.config.update(ORDER_EVENTS_STREAM_TIMEOUT=0.2, ORDER_EVENTS_HEARTBEAT=0.05)
+        customer = Customer.query.first()
+        restaurant = Restaurant.query.first()
+        order = Order(customer_id=customer.id, restaurant_id=restaurant.id,
+                      status='pending', total_amount=10.0)
+        db.session.add(order)
+        db.session.commit()
+        start = self.app.extensions['order_events'].broker.last_id
+        
+        self._login('owner', 'password123')
+        self.client.post(f'/owner/order/{order.id}', data={'status': 'preparing'})
+        
+        response = self.client.get(f'/owner/orders/events?last_event_id={start}')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        body = response.get_data(as_text=True)
+        self.assertIn('event: order_status', body)
+        self.assertIn('"previous_status": "pending"', body)
+        self.assertIn(': heartbeat', body)
+        
+        # Resuming after the last event replays nothing.
+        last_id = re.findall(r'^id: (\d+)$', body, re.M)[-1]
+        response = self.client.get('/owner/orders/events', headers={'Last-Event-ID': last_id})
+        self.assertNotIn('event: order_status', response.get_data(as_text=True))
+        
+        # Requests share this test's app context, so drop the owner cached by Flask-Login.
+        g.pop('_login_user', None)
+        customer_client = self.app.test_client()
+        customer_client.post('/auth/login', data={
+            'username': 'customer', 'password': 'password123', 'role': 'customer'
+        })
+        response = customer_client.get(f'/customer/order/{order.id}/events?last_event_id={start}')
+        self.assertIn('"status": "preparing"', response.get_data(as_text=True))
+    
+    def test_kitchen_latency_report(self):
+        """Test status changes are logged and summarised on the reports page."""
+        customer = Customer.query.first()
+        restaurant = Restaurant.query.first()
+        order = Order(customer_id=customer.id, restaurant_id=restaurant.id,
+                      status='pending', total_amount=10.0)
+        db.session.add(order)
+        db.session.commit()
+        
+        self._login('owner', 'password123')
+        for status in ('preparing', 'ready', 'completed'):
+            self.client.post(f'/owner/order/{order.id}', data={'status': status})
+        events = OrderStatusEvent.query.filter_by(order_id=order.id).order_by(OrderStatusEvent.id).all()
+        self.assertEqual([(e.from_status, e.to_status) for e in events],
+                         [('pending', 'preparing'), ('preparing', 'ready'), ('ready', 'completed')])
+        
+        response = self.client.get(f'/owner/reports?restaurant_id={restaurant.id}')
+        html = response.data.decode()
+        self.assertIn('Kitchen Latency', html)
+        self.assertRegex(html, r'data-status-latency="preparing">\s*<td[^>]*>Preparing</td>\s*<td[^>]*>1</td>')
+        
+        # The order lands in today's row of the hour-of-week heatmap.
+        self.assertIn('Demand by Hour of Week', html)
+        self.assertIn(f'data-demand-day="{order.created_at.strftime("%a")}"', html)
+    
+    def test_reports_data(self):
+        """Test the reports JSON endpoint compares outlets over a chosen range."""
+        restaurant = Restaurant.query.first()
+        other = Restaurant(owner_id=restaurant.owner_id, name='Second Outlet', location='Test Location')
+        foreign = Restaurant(owner_id=restaurant.owner_id + 1, name='Not Mine', location='Test Location')
+        db.session.add_all([other, foreign])
+        db.session.commit()
+        record_sale(restaurant.id, datetime(2026, 4, 1, 12, 30), 20.0, [])
+        record_sale(other.id, datetime(2026, 4, 9, 18, 0), 12.5, [])
+        db.session.commit()
+        
+        self._login('owner', 'password123')
+        response = self.client.get(f'/owner/reports/data?restaurant_id={restaurant.id}&restaurant_id={other.id}'
+                                   '&start=2026-04-01&end=2026-04-14&granularity=week')
+        self.assertEqual(response.status_code, 200)
+        report = json.loads(response.data)
+        self.assertEqual(report['buckets'], ['2026-03-30', '2026-04-06', '2026-04-13'])
+        self.assertEqual([(r['name'], r['orders'], r['total_revenue']) for r in report['restaurants']],
+                         [('Test Restaurant', [1, 0, 0], 20.0), ('Second Outlet', [0, 1, 0], 12.5)])
+        
+        response = self.client.get('/owner/reports/data?granularity=fortnight')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json.loads(response.data)['ok'])
+        self.assertEqual(self.client.get('/owner/reports/data?start=April').status_code, 400)
+        
+        # Dates at the ends of the calendar report or fail cleanly instead of overflowing.
+        response = self.client.get('/owner/reports/data?start=9999-11-01&end=9999-12-31&granularity=month')
+        self.assertEqual(json.loads(response.data)['buckets'], ['9999-11', '9999-12'])
+        for query in ('start=0001-01-01&end=9999-12-31&granularity=hour', 'end=0001-01-05'):
+            response = self.client.get(f'/owner/reports/data?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertFalse(json.loads(response.data)['ok'])
+        self.assertEqual(self.client.get(f'/owner/reports/data?restaurant_id={foreign.id}').status_code, 403)
+        
+        # A malformed restaurant_id is rejected rather than dropped (which would report on every outlet).
+        response = self.client.get(f'/owner/reports/data?restaurant_id={restaurant.id}&restaurant_id=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json.loads(response.data)['ok'])
+    
+    def test_export_orders(self):
+        """Test owners can download their orders as a gzipped stream."""
+        restaurant = Restaurant.query.first()
+        order = Order(customer_id=Customer.query.first().id, restaurant_id=restaurant.id,
+                      status='completed', total_amount=12.5)
+        db.session.add(order)
+        db.session.commit()
+        
+        self._login('owner', 'password123')
+        response = self.client.get('/owner/orders/export?format=ndjson', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        lines = gzip.decompress(response.data).decode().splitlines()
+        self.assertEqual([(o['id'], o['total_amount']) for o in map(json.loads, lines)], [(order.id, 12.5)])
+        
+        response = self.client.get('/owner/orders/export?start=2000-01-01&status=completed')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(response.data.decode().splitlines()), 2)
+        self.assertEqual(self.client.get('/owner/orders/export?format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/owner/orders/export?end=soon').status_code, 400)
+        response = self.client.get('/owner/orders/export?format=ndjson&end=9999-12-31')
+        self.assertEqual(len(response.data.decode().splitlines()), 1)
+        self.assertEqual(self.client.get('/owner/orders/export?restaurant_id=999').status_code, 403)
+        self.assertEqual(self.client.get('/owner/orders/export?restaurant_id=abc').status_code, 400)
+    
+    def test_checkout(self):
+        """Test checkout prices the cart and writes the order with all its lines."""
+        pizza = MenuItem.query.filter_by(name='Pizza').first()
+        pasta = MenuItem.query.filter_by(name='Pasta').first()
+        self._login('customer', 'password123')
+        self.client.get(f'/customer/add_to_cart/{pizza.id}?quantity=2')
+        self.client.get(f'/customer/add_to_cart/{pasta.id}?quantity=1')
+        
+        response = self.client.get('/customer/cart')
+        self.assertIn(b'Test Restaurant', response.data)
+        
+        response = self.client.post('/customer/cart')
+        self.assertEqual(response.status_code, 302)
+        order = Order.query.one()
+        self.assertAlmostEqual(order.total_amount, 2 * 10.99 + 8.99)
+        self.assertEqual(order.status, 'pending')
+        self.assertEqual(sorted((i.menu_item_id, i.quantity, i.price) for i in order.items),
+                         [(pizza.id, 2, 10.99), (pasta.id, 1, 8.99)])
+        self.assertEqual(order.item_count, 3)
+        self.assertEqual(order.items_summary, '2× Pizza, 1× Pasta')
+        self.assertEqual([(e.from_status, e.to_status) for e in OrderStatusEvent.query.all()],
+                         [(None, 'pending')])
+        
+        # Order lists render the stored summary without reading order_items.
+        self.assertIn('2× Pizza, 1× Pasta', self.client.get('/customer/orders').data.decode())
+        
+        # Daily counters are buffered, then written in one batched UPDATE.
+        self.assertEqual(self.app.extensions['order_counter'].flush(), 2)
+        db.session.refresh(pizza)
+        self.assertEqual(pizza.times_ordered_today, 2)
+        
+        # The cart is emptied, so a second submit places nothing.
+        self.client.post('/customer/cart')
+        self.assertEqual(Order.query.count(), 1)
+    
+    def test_failed_checkout_keeps_cart(self):
+        """Test a checkout failing after the order insert commits neither the order nor the cart change."""
+        pizza = MenuItem.query.filter_by(name='Pizza').first()
+        self._login('customer', 'password123')
+        self.client.get(f'/customer/add_to_cart/{pizza.id}?quantity=2')
+        customer_id = Customer.query.first().id
+        
+        for target in ('app.services.checkout.record_sale', 'app.services.cart_store.CartStore.clear'):
+            with patch(target, side_effect=RuntimeError('disk full')):
+                with self.assertRaises(RuntimeError):
+                    self.client.post('/customer/cart')
+            db.session.rollback()
+            self.assertEqual(Order.query.count(), 0, target)
+            self.assertEqual(self.app.extensions['cart_store'].totals(customer_id).item_count, 1, target)
+        
+        self.client.post('/customer/cart')
+        self.assertEqual(Order.query.count(), 1)
+        self.assertEqual(self.app.extensions['cart_store'].totals(customer_id).item_count, 0)
+        self.app.extensions['order_counter'].flush()
+    
+    def test_cart_is_stored_server_side(self):
+        """Test the cart lives in the cart store, not the session cookie."""
+        pizza = MenuItem.query.filter_by(name='Pizza').first()
+        self._login('customer', 'password123')
+        response = self.client.get(f'/customer/add_to_cart/{pizza.id}?quantity=2',
+                                   headers={'X-Requested-With': 'XMLHttpRequest'})
+        data = json.loads(response.data)
+        self.assertEqual((data['cart_count'], data['quantity']), (1, 2))
+        self.assertAlmostEqual(data['cart_total'], 2 * 10.99)
+        with self.client.session_transaction() as session:
+            self.assertNotIn('cart', session)
+        
+        # A second restaurant is refused without looking at the cart lines.
+        other = Restaurant(owner_id=pizza.restaurant.owner_id, name='Other Restaurant', location='Elsewhere')
+        db.session.add(other)
+        db.session.flush()
+        curry = MenuItem(restaurant_id=other.id, name='Curry', price=9.5, category='main_course')
+        db.session.add(curry)
+        db.session.commit()
+        response = self.client.get(f'/customer/add_to_cart/{curry.id}',
+                                   headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 400)
+        
+        # The badge reads the stored count.
+        response = self.client.get('/customer/cart')
+        self.assertRegex(response.data.decode(), r'id="cart-badge"[^>]*inline-block[^>]*>\s*1\s*<')
+        
+        # A price change since the dish was added stops checkout for review.
+        pizza.price = 12.5
+        db.session.commit()
+        response = self.client.post('/customer/cart', follow_redirects=True)
+        self.assertIn(b'PLEASE REVIEW YOUR ORDER', response.data)
+        self.assertEqual(Order.query.count(), 0)
+        self.client.post('/customer/cart')
+        self.assertAlmostEqual(Order.query.one().total_amount, 25.0)
+        self.app.extensions['order_counter'].flush()
+    
     def test_restaurant_detail(self):
         """Test restaurant detail page."""
         self._login('customer', 'password123')
@@ -195,6 +596,81 @@ class TestRoutes(unittest.TestCase):
         self.assertIn(b'Pizza', response.data)
         self.assertIn(b'Pasta', response.data)
     
+    def test_read_replica_routing(self):
+        """Test read-only views read the replica unless the user wrote recently."""
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app({
+                'TESTING': True,
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'primary.db')}",
+                'SQLALCHEMY_BINDS': {'replica': f"sqlite:///{os.path.join(directory, 'replica.db')}"},
+                'REPLICA_SYNC_INTERVAL': 0,
+                'REPLICA_STICKY_SECONDS': 60,
+                'SQLITE_CHECKPOINT_INTERVAL': 0,
+                'WTF_CSRF_ENABLED': False,
+                'SERVER_NAME': 'localhost'
+            })
+            replica = app.extensions['read_replica']
+            with app.app_context():
+                db.create_all()
+                self._create_test_data()
+                sync = ReplicaSync(db.engines[None], replica.engine, 0)
+                sync.sync()
+                restaurant = Restaurant.query.filter_by(name='Test Restaurant').first()
+                restaurant_id = restaurant.id
+                restaurant.name = 'Renamed Restaurant'
+                db.session.commit()
+            
+            client = app.test_client()
+            url = f'/customer/restaurant/{restaurant_id}'
+            client.post('/auth/login', data={'username': 'customer', 'password': 'password123', 'role': 'customer'})
+            
+            # Logging in wrote, so the user reads the primary for a while.
+            self.assertIn(b'Renamed Restaurant', client.get(url).data)
+            with client.session_transaction() as session:
+                session['_primary_until'] = 0
+            self.assertIn(b'Test Restaurant', client.get(url).data)
+            
+            # A GET that writes pins the user to the primary too.
+            client.get(f'/customer/toggle_favorite/{restaurant_id}')
+            self.assertIn(b'Renamed Restaurant', client.get(url).data)
+            
+            with client.session_transaction() as session:
+                session['_primary_until'] = 0
+            sync.sync()
+            self.assertIn(b'Renamed Restaurant', client.get(url).data)
+            
+            app.extensions['order_counter'].stop()
+            with app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+    
+    def test_dish_search(self):
+        """Test city-wide dish search with facets."""
+        self._login('customer', 'password123')
+        response = self.client.get('/customer/dishes?query=pas')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Pasta', response.data)
+        self.assertNotIn(b'Delicious pizza', response.data)
+        
+        response = self.client.get('/customer/dishes?max_price=9&cuisines=Italian&dietary=vegetarian')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Tasty pasta', response.data)
+        self.assertNotIn(b'Delicious pizza', response.data)
+        
+        # The commit marks the index stale; the next search starts a background
+        # rebuild and later searches see the new dish.
+        restaurant = Restaurant.query.filter_by(name='Test Restaurant').first()
+        db.session.add(MenuItem(restaurant_id=restaurant.id, name='Paneer Tikka',
+                                price=12.5, category='appetizer'))
+        db.session.flush()
+        self.assertFalse(self.app.extensions['dish_search']._stale)
+        db.session.commit()
+        self.assertEqual(self.client.get('/customer/dishes?query=paneer+tik').status_code, 200)
+        self.app.extensions['dish_search'].wait(5)
+        response = self.client.get('/customer/dishes?query=paneer+tik')
+        self.assertIn(b'Paneer Tikka', response.data)
+        self.assertIn(b'1 Dish Found', response.data)
+    
     def test_logout(self):
         """Test logout functionality."""
         self._login('customer', 'password123')